@@ -0,0 +1,8 @@
+import os
+
+# Directory for every on-disk cache the pipeline keeps between runs
+CACHE_DIR = os.environ.get("NEWSLENS_CACHE_DIR", ".newslens_cache")
+
+
+def cache_path(name: str) -> str:
+    return os.path.join(CACHE_DIR, name)
@@ -0,0 +1,47 @@
+import os
+from typing import Callable, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from Cache import cache_path
+from Cache.sqlite_cache import SQLiteCache
+
+# Extracted article text is reused for this long before the page is fetched again
+CONTENT_TTL = float(os.environ.get("NEWSLENS_CONTENT_TTL", str(24 * 3600)))
+CONTENT_MAX_ENTRIES = int(os.environ.get("NEWSLENS_CONTENT_MAX_ENTRIES", "5000"))
+
+# Query parameters that name the page rather than track the visit
+# (youtube.com/watch?v=<video id>)
+IDENTIFYING_PARAMS = {"v"}
+
+content_cache = SQLiteCache(
+    cache_path("articles.sqlite3"),
+    ttl=CONTENT_TTL,
+    max_entries=CONTENT_MAX_ENTRIES,
+)
+
+
+def canonical_url(url: str) -> str:
+    """
+    Normalizes an article URL so tracking parameters and fragments don't
+    create separate cache entries for the same page.
+    """
+    parts = urlsplit(url.strip())
+    path = parts.path.rstrip("/") or "/"
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(parts.query) if k in IDENTIFYING_PARAMS))
+    return urlunsplit(("https", parts.netloc.lower(), path, query, ""))
+
+
+def cached_content(url: str, extract: Callable[[], str]) -> str:
+    """
+    Returns the cached article text for `url`, or runs `extract` and caches a
+    non-empty result.
+    """
+    key = canonical_url(url)
+    content: Optional[str] = content_cache.get(key)
+    if content is not None:
+        return content
+
+    content = extract()
+    if content:
+        content_cache.set(key, content)
+    return content
@@ -0,0 +1,148 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+import feedparser
+
+from Cache import cache_path
+from Cache.sqlite_cache import SQLiteCache
+from Metrics.metrics import DOWNLOADED_BYTES, STAGE_ITEMS, cache_lookup, timed
+from News_Agents.http_client import REQUEST_TIMEOUT, get_async_client, get_session
+
+# Validators older than this are forgotten, forcing one full download
+FEED_STATE_TTL = float(os.environ.get("NEWSLENS_FEED_STATE_TTL", str(7 * 24 * 3600)))
+
+
+class FeedCache:
+    """
+    Conditional-GET cache for RSS/Atom feeds shared by all news agents.
+
+    For every feed URL it keeps the last ETag / Last-Modified validators and
+    the feed's entries. Polls send If-None-Match / If-Modified-Since; on a 304
+    the cached entries are returned as-is and nothing is downloaded or parsed.
+    State is persisted as JSON, one row per feed, in a SQLiteCache so one-shot
+    runs benefit as well; only the string fields of each entry are kept,
+    which is all the agents read.
+    """
+
+    def __init__(self, store: Optional[SQLiteCache] = None):
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+        self._feeds: Dict[str, Optional[Dict]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _dump(state: Dict) -> str:
+        entries = [
+            {key: value for key, value in entry.items() if isinstance(value, str)}
+            for entry in state["feed"].entries
+        ]
+        return json.dumps({**state, "feed": entries}, ensure_ascii=False)
+
+    @staticmethod
+    def _undump(text: str) -> Dict:
+        state = json.loads(text)
+        entries = [feedparser.FeedParserDict(entry) for entry in state["feed"]]
+        state["feed"] = feedparser.FeedParserDict(entries=entries)
+        return state
+
+    def _state(self, url: str) -> Optional[Dict]:
+        """The validators and entries kept for `url`, read from disk once per process."""
+        with self._lock:
+            if url in self._feeds:
+                return self._feeds[url]
+        state = None
+        text = self.store.get(url) if self.store else None
+        if text is not None:
+            try:
+                state = self._undump(text)
+            except (ValueError, KeyError, TypeError) as e:
+                print(f"[WARN] Ignoring unreadable cached state for feed {url}: {e}")
+        with self._lock:
+            return self._feeds.setdefault(url, state)
+
+    def _validators(self, url: str):
+        """Returns (cached_entry, conditional request headers) for `url`."""
+        cached = self._state(url)
+
+        headers = {}
+        if cached and cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached and cached.get("modified"):
+            headers["If-Modified-Since"] = cached["modified"]
+        return cached, headers
+
+    def _not_modified(self, cached: Dict) -> feedparser.FeedParserDict:
+        with self._lock:
+            self.hits += 1
+        cache_lookup("feeds", hit=True)
+        STAGE_ITEMS.inc(len(cached["feed"].entries), stage="feed_fetch")
+        return cached["feed"]
+
+    def _fallback(self, url: str, cached: Optional[Dict], error: Exception) -> feedparser.FeedParserDict:
+        print(f"[ERROR] Failed to fetch feed {url}: {error}")
+        # A stale copy beats no feed at all
+        return cached["feed"] if cached else feedparser.FeedParserDict(entries=[])
+
+    def _store(self, url: str, content: bytes, headers) -> feedparser.FeedParserDict:
+        DOWNLOADED_BYTES.inc(len(content), stage="feed_fetch")
+        with timed("feed_parse"):
+            feed = feedparser.parse(content, response_headers=dict(headers))
+        cache_lookup("feeds", hit=False)
+        STAGE_ITEMS.inc(len(feed.entries), stage="feed_fetch")
+        state = {
+            "etag": headers.get("ETag"),
+            "modified": headers.get("Last-Modified"),
+            "feed": feed,
+            "fetched_at": time.time(),
+        }
+        with self._lock:
+            self.misses += 1
+            self._feeds[url] = state
+        # Only this feed's row is written
+        if self.store:
+            self.store.set(url, self._dump(state))
+        return feed
+
+    def parse(self, url: str) -> feedparser.FeedParserDict:
+        """Drop-in replacement for feedparser.parse(url)."""
+        cached, headers = self._validators(url)
+        try:
+            # raise_for_status() lets a 304 through
+            with timed("feed_fetch"):
+                resp = get_session().get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+                resp.raise_for_status()
+            if resp.status_code == 304 and cached:
+                return self._not_modified(cached)
+        except Exception as e:
+            return self._fallback(url, cached, e)
+        return self._store(url, resp.content, resp.headers)
+
+    async def aparse(self, url: str) -> feedparser.FeedParserDict:
+        """Async parse() over the shared httpx client; parsing runs off the event loop."""
+        cached, headers = self._validators(url)
+        try:
+            with timed("feed_fetch"):
+                resp = await get_async_client().get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+                resp.raise_for_status()
+            if resp.status_code == 304 and cached:
+                return self._not_modified(cached)
+        except Exception as e:
+            return self._fallback(url, cached, e)
+        return await asyncio.to_thread(self._store, url, resp.content, resp.headers)
+
+
+feed_cache = FeedCache(SQLiteCache(cache_path("feeds.sqlite3"), ttl=FEED_STATE_TTL,
+                                   max_entries=1000, name="feed_state"))
+
+
+def parse_feed(url: str) -> feedparser.FeedParserDict:
+    return feed_cache.parse(url)
+
+
+async def aparse_feed(url: str) -> feedparser.FeedParserDict:
+    return await feed_cache.aparse(url)
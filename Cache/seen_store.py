@@ -0,0 +1,116 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+from Cache import cache_path
+from Cache.content_cache import canonical_url
+
+# Size of the merged brief when runs only summarize new items
+DIGEST_SIZE = int(os.environ.get("NEWSLENS_DIGEST_SIZE", "30"))
+
+
+def item_key(item: Dict[str, str]) -> str:
+    """Stable identity of a news item: its video id, canonical URL, or title as a last resort."""
+    if item.get("video_id"):
+        return f"youtube:{item['video_id']}"
+    return result_key(item)
+
+
+def result_key(item: Dict[str, str]) -> str:
+    """
+    Identity shared by an item and its summary result, which carries the
+    item's URL but not its video id: the canonical URL, or the title.
+    """
+    if item.get("url"):
+        return canonical_url(item["url"])
+    return f"title:{item.get('title', '').strip()}"
+
+
+def fingerprint(item: Dict[str, str]) -> str:
+    """Hash of the item's text, so edited articles count as changed."""
+    text = f"{item.get('title', '').strip()}\n{(item.get('content') or '').strip()}"
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def with_fingerprints(items: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    """
+    Tags raw items with their fingerprint before preprocessing rewrites the
+    content, so the value recorded by mark_seen matches what filter_new sees.
+    """
+    return [item if item.get("fingerprint") else {**item, "fingerprint": fingerprint(item)} for item in items]
+
+
+class SeenStore:
+    """
+    Persistent record of every item that has been summarized, keyed by
+    item_key and remembering the fingerprint it had at the time.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS seen (
+                    key TEXT PRIMARY KEY,
+                    fingerprint TEXT NOT NULL,
+                    first_seen REAL NOT NULL,
+                    last_seen REAL NOT NULL
+                )
+                """
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def filter_new(self, items: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """
+        Returns the items that are new or whose fingerprint changed, each
+        tagged with its "fingerprint" so mark_seen can record it later.
+        """
+        fresh = []
+        with self._lock:
+            conn = self._connect()
+            for item in with_fingerprints(items):
+                row = conn.execute("SELECT fingerprint FROM seen WHERE key = ?", (item_key(item),)).fetchone()
+                if row is None or row[0] != item["fingerprint"]:
+                    fresh.append(item)
+        return fresh
+
+    def mark_seen(self, items: Iterable[Dict[str, str]]) -> None:
+        now = time.time()
+        rows = [(item_key(item), item.get("fingerprint") or fingerprint(item), now, now) for item in items]
+        with self._lock:
+            conn = self._connect()
+            conn.executemany(
+                """
+                INSERT INTO seen (key, fingerprint, first_seen, last_seen) VALUES (?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET fingerprint = excluded.fingerprint, last_seen = excluded.last_seen
+                """,
+                rows,
+            )
+            conn.commit()
+
+
+seen_store = SeenStore(cache_path("seen.sqlite3"))
+
+
+def merge_results(new: List[Dict[str, str]], previous: List[Dict[str, str]],
+                  limit: int = DIGEST_SIZE) -> List[Dict[str, str]]:
+    """
+    New summaries first, then earlier ones they don't replace, capped at
+    `limit` so the brief doesn't grow forever.
+    """
+    replaced = {item_key(result) for result in new}
+    kept = [result for result in previous if item_key(result) not in replaced]
+    return (new + kept)[:limit]
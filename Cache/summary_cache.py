@@ -0,0 +1,25 @@
+import hashlib
+import json
+import os
+
+from Cache import cache_path
+from Cache.sqlite_cache import SQLiteCache
+
+# Summaries of unchanged articles are reused for this long
+SUMMARY_TTL = float(os.environ.get("NEWSLENS_SUMMARY_TTL", str(7 * 24 * 3600)))
+SUMMARY_MAX_ENTRIES = int(os.environ.get("NEWSLENS_SUMMARY_MAX_ENTRIES", "20000"))
+
+summary_cache = SQLiteCache(
+    cache_path("summaries.sqlite3"),
+    ttl=SUMMARY_TTL,
+    max_entries=SUMMARY_MAX_ENTRIES,
+)
+
+
+def summary_key(prompt_template: str, model_name: str, title: str, content: str) -> str:
+    """
+    Hash of everything that determines a summary, so editing the prompt,
+    switching models or a changed article all miss the cache.
+    """
+    payload = json.dumps([prompt_template, model_name, title, content], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
@@ -0,0 +1,25 @@
+import os
+
+from Cache import cache_path
+from Cache.sqlite_cache import SQLiteCache
+
+# A published video's transcript doesn't change, so it is kept for a long time
+TRANSCRIPT_TTL = float(os.environ.get("NEWSLENS_TRANSCRIPT_TTL", str(30 * 24 * 3600)))
+TRANSCRIPT_MAX_ENTRIES = int(os.environ.get("NEWSLENS_TRANSCRIPT_MAX_ENTRIES", "2000"))
+# Videos without a transcript are not asked about again for this long;
+# captions are often added a few hours after upload
+MISSING_TRANSCRIPT_TTL = float(os.environ.get("NEWSLENS_MISSING_TRANSCRIPT_TTL", str(6 * 3600)))
+
+# video_id -> transcript text
+transcript_cache = SQLiteCache(
+    cache_path("transcripts.sqlite3"),
+    ttl=TRANSCRIPT_TTL,
+    max_entries=TRANSCRIPT_MAX_ENTRIES,
+)
+
+# video_id -> why no transcript is available
+missing_transcript_cache = SQLiteCache(
+    cache_path("missing_transcripts.sqlite3"),
+    ttl=MISSING_TRANSCRIPT_TTL,
+    max_entries=TRANSCRIPT_MAX_ENTRIES,
+)
@@ -1,9 +1,21 @@
-from fastapi import FastAPI, BackgroundTasks, HTTPException, Security, Depends
+from fastapi import FastAPI, HTTPException, Security, Depends, Header, Query, Response
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.security.api_key import APIKeyHeader
 from fastapi.responses import JSONResponse
+from collections import OrderedDict
+from typing import List, Optional
+from pydantic import BaseModel
+import hashlib
 import os
 import json
 import sys
+import threading
+import time
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the standard library encoder
+    orjson = None
 from dotenv import load_dotenv
 
 # Load environments
@@ -24,62 +36,230 @@ root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if root_dir not in sys.path:
     sys.path.append(root_dir)
 
-from Preprocessing.preprocessing import fetch_and_process_data
+from Preprocessing.preprocessing import afetch_and_process_data
 from Mail_SMTP import mail
+from FAST_API.jobs import Job, JobManager
+from FAST_API.snapshot_cache import SnapshotCache
+from Storage.news_store import news_store
+from Metrics.metrics import registry
 import app
 
+# /news/raw serves a shared snapshot of the last scrape instead of scraping per request
+RAW_NEWS_MAX_AGE = float(os.getenv("NEWSLENS_RAW_MAX_AGE", "300"))
+RAW_NEWS_MAX_STALE = float(os.getenv("NEWSLENS_RAW_MAX_STALE", "3600"))
+raw_news_cache = SnapshotCache(afetch_and_process_data, RAW_NEWS_MAX_AGE, RAW_NEWS_MAX_STALE)
+
+# /news/summaries keeps its most recently rendered pages, keyed by store version
+rendered_summaries: "OrderedDict[str, tuple]" = OrderedDict()
+rendered_summaries_lock = threading.Lock()
+RENDERED_SUMMARIES_MAX = 64
+
+
+def dump_json(data) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
 api = FastAPI(
     title="NewsLens AI Controller",
     description="API to control the NewsLens AI pipeline",
     version="1.0.0"
 )
+api.add_middleware(GZipMiddleware, minimum_size=1000)
 
 @api.get("/")
-def read_root():
+async def read_root():
     return {
         "status": "online",
         "message": "Welcome to NewsLens AI API. Go to /docs for the interactive control panel."
     }
 
+@api.get("/metrics")
+def get_metrics():
+    """
+    Prometheus metrics for the pipeline runs served by this process: latency
+    histograms and item counts per stage, bytes downloaded, cache hits and
+    misses, LLM calls and token usage, and emails sent. Like a Prometheus
+    exporter it needs no API key; it holds counters only, no news content.
+    """
+    return Response(content=registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @api.get("/news/raw")
-def get_raw_news(api_key: str = Depends(get_api_key)):
-    """Fetches news from BBC, CNN, and YouTube without summarizing."""
+async def get_raw_news(response: Response, api_key: str = Depends(get_api_key)):
+    """
+    Fetches news from BBC, CNN, and YouTube without summarizing.
+    Recent results are served from a snapshot; stale ones are served while a
+    background refresh runs, and concurrent requests share a single scrape.
+    The scrape itself runs on the event loop with the async agents.
+    """
     try:
-        data = fetch_and_process_data()
-        return {"count": len(data), "articles": data}
+        data, age, status = await raw_news_cache.get()
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    response.headers["Age"] = str(int(age))
+    response.headers["X-Cache"] = status
+    return {"count": len(data), "articles": data}
 
 @api.get("/news/summaries")
-def get_latest_summaries(api_key: str = Depends(get_api_key)):
-    """Returns the most recent summarized news from the local JSON file."""
-    if os.path.exists("summarized_news.json"):
-        with open("summarized_news.json", "r", encoding="utf-8") as f:
-            return json.load(f)
-    return {"message": "No summaries found. Run /pipeline/run first."}
+def get_latest_summaries(
+    source: Optional[str] = Query(None, description="Only articles whose source contains this text"),
+    limit: Optional[int] = Query(None, ge=1),
+    offset: int = Query(0, ge=0),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. title,summary"),
+    if_none_match: Optional[str] = Header(None),
+    api_key: str = Depends(get_api_key),
+):
+    """
+    Returns the current brief from the news store.
+    Supports filtering, pagination (total in X-Total-Count) and field
+    projection. Responses carry an ETag; send it back in If-None-Match to get
+    a 304 while nothing has changed.
+    """
+    version = news_store.version()
+    if version == 0:
+        return {"message": "No summaries found. Run /pipeline/run first."}
+
+    query = f"{version}|{source}|{limit}|{offset}|{fields}"
+    etag = '"' + hashlib.sha1(query.encode("utf-8")).hexdigest()[:20] + '"'
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    with rendered_summaries_lock:
+        cached = rendered_summaries.get(etag)
+        if cached is not None:
+            rendered_summaries.move_to_end(etag)
+
+    if cached is None:
+        articles = news_store.brief()
+        if source:
+            articles = [a for a in articles if source.lower() in a.get("source", "").lower()]
+        total = len(articles)
+        articles = articles[offset:offset + limit] if limit is not None else articles[offset:]
+        if fields:
+            wanted = [f.strip() for f in fields.split(",") if f.strip()]
+            articles = [{f: a[f] for f in wanted if f in a} for a in articles]
+        cached = (total, dump_json(articles))
+        with rendered_summaries_lock:
+            rendered_summaries[etag] = cached
+            while len(rendered_summaries) > RENDERED_SUMMARIES_MAX:
+                rendered_summaries.popitem(last=False)
+
+    total, body = cached
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"ETag": etag, "X-Total-Count": str(total), "Cache-Control": "no-cache"},
+    )
+
+@api.get("/news/archive")
+def get_archived_summaries(
+    source: Optional[str] = Query(None, description="Source prefix, e.g. BBC or YouTube"),
+    since: Optional[str] = Query(None, description="ISO date or datetime, inclusive"),
+    until: Optional[str] = Query(None, description="ISO date or datetime, exclusive"),
+    url: Optional[str] = Query(None, description="Exact article URL"),
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    api_key: str = Depends(get_api_key),
+):
+    """
+    Searches every summary ever stored, newest first. Each filter is served
+    from an index, so the archive's size doesn't affect response time.
+    """
+    try:
+        articles = news_store.query(source=source, since=since, until=until, url=url,
+                                    limit=limit, offset=offset)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid date: {e}")
+    return Response(content=dump_json(articles), media_type="application/json")
+
+@api.get("/news/search")
+def search_news(
+    q: str = Query(..., min_length=1, description="Words to search for; all must match"),
+    source: Optional[str] = Query(None, description="Source prefix, e.g. BBC or YouTube"),
+    days: Optional[float] = Query(None, gt=0, description="Only the last N days"),
+    since: Optional[str] = Query(None, description="ISO date or datetime, inclusive"),
+    until: Optional[str] = Query(None, description="ISO date or datetime, exclusive"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    api_key: str = Depends(get_api_key),
+):
+    """
+    Full-text search over the titles, summaries and article text of every
+    stored summary, ranked best match first. Each result carries a snippet
+    with the matched words in [brackets].
+    """
+    if days is not None:
+        since = time.time() - days * 86400
+    try:
+        articles = news_store.search(q, source=source, since=since, until=until,
+                                     limit=limit, offset=offset)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid date: {e}")
+    return Response(content=dump_json(articles), media_type="application/json")
+
+class ArticleIn(BaseModel):
+    title: str
+    content: str
+    source: str = "Unknown"
+    url: Optional[str] = None
+
+
+@api.post("/news/summarize")
+async def summarize_articles(articles: List[ArticleIn], api_key: str = Depends(get_api_key)):
+    """
+    Summarizes the posted articles with the Groq chain's async interface.
+    Cached summaries are reused; the request holds no worker thread while
+    waiting on the LLM.
+    """
+    summaries = await app.summarizer.asummarize(
+        [article.model_dump(exclude_none=True) for article in articles], verbose=False
+    )
+    return {"count": len(summaries), "summaries": summaries}
+
+
+def run_pipeline_job(job: Job, send_email: bool) -> None:
+    print(f"Starting pipeline job {job.id}...")
+    # 1. Run the app logic (Fetch & Summarize); each of its stages reports
+    # its own timing and item counts
+    app.main(progress=job.progress)
+    # 2. Run the mailer if requested
+    if send_email:
+        with job.stage("email") as detail:
+            stats = mail.main()
+            if stats is not None:
+                detail.update(sent=stats.sent, failed=stats.failed)
+        print(f"Pipeline job {job.id} complete: News sent!")
+
+
+# One pipeline at a time by default: runs share Groq quota and the brief
+PIPELINE_WORKERS = int(os.getenv("NEWSLENS_PIPELINE_WORKERS", "1"))
+pipeline_jobs = JobManager(run_pipeline_job, max_workers=PIPELINE_WORKERS)
+
 
 @api.post("/pipeline/run")
-def run_full_pipeline(background_tasks: BackgroundTasks, send_email: bool = True, api_key: str = Depends(get_api_key)):
+def run_full_pipeline(send_email: bool = True, api_key: str = Depends(get_api_key)):
     """
     Triggers the full pipeline: Fetch -> Summarize -> Email.
-    It runs in the background so you don't have to wait.
+    It runs in the background so you don't have to wait. While a run with the
+    same options is queued or in progress, triggering again returns that run.
+    Poll /pipeline/jobs/{job_id} for progress.
     """
-    def task():
-        print("Starting background pipeline...")
-        # 1. Run the app logic (Fetch & Summarize)
-        app.main()
-        # 2. Run the mailer if requested
-        if send_email:
-            mail.main()
-            print("Background pipeline complete: News sent!")
-    
-    background_tasks.add_task(task)
+    job, created = pipeline_jobs.submit(send_email=send_email)
     
     return {
-        "status": "started",
+        "status": "started" if created else "already_running",
+        "job_id": job.id,
         "message": "The news pipeline is running in the background. You'll receive an email shortly if successful."
     }
 
+@api.get("/pipeline/jobs/{job_id}")
+def get_pipeline_job(job_id: str, api_key: str = Depends(get_api_key)):
+    """Status of a pipeline run with per-stage progress and timings."""
+    job = pipeline_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job id")
+    return job.to_dict()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(api, host="127.0.0.1", port=8000)
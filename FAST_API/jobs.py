@@ -0,0 +1,147 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field, fields
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+@dataclass
+class StageInfo:
+    status: str = "running"
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    seconds: Optional[float] = None
+    detail: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class Job:
+    id: str
+    params: Dict[str, Any]
+    status: str = "queued"
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+    stages: Dict[str, StageInfo] = field(default_factory=dict)
+    # Guards every update made by the worker against to_dict() in request threads
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False, compare=False)
+
+    @contextmanager
+    def stage(self, name: str):
+        """Records start, end and outcome of one pipeline stage; yields its detail dict."""
+        info = StageInfo(started_at=time.time())
+        with self._lock:
+            self.stages[name] = info
+        # Filled in by the stage and published with its outcome
+        detail: Dict[str, Any] = {}
+        start = time.perf_counter()
+        status = "failed"
+        try:
+            yield detail
+            status = "succeeded"
+        finally:
+            with self._lock:
+                info.detail.update(detail)
+                info.finished_at = time.time()
+                info.seconds = round(time.perf_counter() - start, 3)
+                info.status = status
+
+    def progress(self, name: str, counts: Dict[str, int], done: bool = False) -> None:
+        """
+        Progress callback for stages that overlap, as in the streaming pipeline:
+        the first call starts stage `name`, each call publishes its counts, and
+        done=True marks it succeeded.
+        """
+        with self._lock:
+            info = self.stages.get(name)
+            if info is None:
+                info = self.stages[name] = StageInfo(started_at=time.time())
+            info.detail.update(counts)
+            if done:
+                info.finished_at = time.time()
+                info.seconds = round(info.finished_at - info.started_at, 3)
+                info.status = "succeeded"
+
+    def start(self) -> None:
+        with self._lock:
+            self.started_at = time.time()
+            self.status = "running"
+
+    def finish(self, error: Optional[str] = None) -> None:
+        """
+        Records the outcome; the status changes last, so it never runs ahead of
+        the other fields. Stages still running when the job fails failed with it.
+        """
+        with self._lock:
+            if error is not None:
+                for info in self.stages.values():
+                    if info.status == "running":
+                        info.status = "failed"
+            self.finished_at = time.time()
+            self.error = error
+            self.status = "failed" if error is not None else "succeeded"
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            data = {f.name: getattr(self, f.name) for f in fields(self) if f.name != "_lock"}
+            data["params"] = dict(self.params)
+            data["stages"] = {name: asdict(info) for name, info in self.stages.items()}
+        return data
+
+
+class JobManager:
+    """
+    Runs pipeline jobs on a bounded worker pool.
+
+    Triggers are single-flight: while a job with the same parameters is queued
+    or running, submitting again returns that job instead of starting another.
+    Finished jobs are kept (up to `history`) so their status can be queried.
+    """
+
+    def __init__(self, runner: Callable[..., None], max_workers: int = 1, history: int = 100):
+        self.runner = runner
+        self.history = history
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pipeline")
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._active: Dict[Tuple, Job] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, **params) -> Tuple[Job, bool]:
+        """Returns (job, created); created is False when an identical job was already active."""
+        key = tuple(sorted(params.items()))
+        with self._lock:
+            active = self._active.get(key)
+            if active is not None:
+                return active, False
+            job = Job(id=uuid.uuid4().hex[:12], params=params)
+            self._jobs[job.id] = job
+            self._active[key] = job
+            while len(self._jobs) > self.history:
+                oldest_id, oldest = next(iter(self._jobs.items()))
+                if oldest.status in ("queued", "running"):
+                    break
+                del self._jobs[oldest_id]
+        self._executor.submit(self._run, job, key)
+        return job, True
+
+    def _run(self, job: Job, key: Tuple) -> None:
+        job.start()
+        error = "interrupted"
+        try:
+            self.runner(job, **job.params)
+            error = None
+        except Exception as e:
+            error = str(e)
+            print(f"[ERROR] Pipeline job {job.id} failed: {e}")
+        finally:
+            job.finish(error)
+            with self._lock:
+                self._active.pop(key, None)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
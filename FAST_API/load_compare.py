@@ -0,0 +1,166 @@
+"""
+Load comparison between the old sync handler design and the async one.
+
+Starts a fake upstream news feed with a fixed response latency, then serves
+the BBC agent twice from a single uvicorn worker:
+
+- /sync:  a plain `def` handler calling the blocking requests-based agent,
+          so every in-flight request holds one threadpool thread
+- /async: an `async def` handler awaiting the httpx-based agent
+
+and fires the same number of concurrent clients at each, while a probe
+measures how long a cheap unrelated sync endpoint takes to answer meanwhile.
+
+    python FAST_API/load_compare.py --clients 200 --latency 0.5
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+# Keep the benchmark's feed cache away from the real one
+os.environ.setdefault("NEWSLENS_CACHE_DIR", tempfile.mkdtemp(prefix="newslens-load-"))
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request, Response
+
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if root_dir not in sys.path:
+    sys.path.append(root_dir)
+
+from News_Agents.async_agents import afetch_bbc
+from News_Agents.bbc_news_agent import NewsScraper
+
+RSS = (
+    "<?xml version='1.0'?><rss version='2.0'><channel><title>Fake</title>"
+    + "".join(
+        f"<item><title>Story {i}</title><link>https://example.com/{i}</link>"
+        f"<description>Summary of story {i}.</description></item>"
+        for i in range(20)
+    )
+    + "</channel></rss>"
+)
+ETAG = '"fake-feed-v1"'
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def serve(app: FastAPI, port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="error"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def upstream_app(latency: float) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/rss.xml")
+    async def feed(request: Request):
+        await asyncio.sleep(latency)
+        # Real feeds send validators, so most polls end in a 304
+        if request.headers.get("if-none-match") == ETAG:
+            return Response(status_code=304, headers={"ETag": ETAG})
+        return Response(RSS, media_type="application/rss+xml", headers={"ETag": ETAG})
+
+    return app
+
+
+def service_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/sync")
+    def sync_bbc():
+        return [art.__dict__ for art in NewsScraper().get_bbc_news(limit=3)]
+
+    @app.get("/async")
+    async def async_bbc():
+        return await afetch_bbc(limit=3)
+
+    # Stands in for the service's other sync endpoints (e.g. /news/summaries)
+    @app.get("/probe")
+    def probe():
+        return {"ok": True}
+
+    return app
+
+
+async def hammer(url: str, probe_url: str, clients: int):
+    latencies = []
+    probes = []
+    errors = 0
+    done = asyncio.Event()
+
+    async def one(client: httpx.AsyncClient):
+        nonlocal errors
+        start = time.perf_counter()
+        try:
+            resp = await client.get(url)
+            resp.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+        except Exception:
+            errors += 1
+
+    async def probe(client: httpx.AsyncClient):
+        # How long an unrelated cheap request waits while the load is running
+        while not done.is_set():
+            start = time.perf_counter()
+            await client.get(probe_url)
+            probes.append(time.perf_counter() - start)
+            await asyncio.sleep(0.05)
+
+    limits = httpx.Limits(max_connections=clients + 1)
+    async with httpx.AsyncClient(timeout=300, limits=limits) as client:
+        prober = asyncio.create_task(probe(client))
+        start = time.perf_counter()
+        await asyncio.gather(*(one(client) for _ in range(clients)))
+        wall = time.perf_counter() - start
+        done.set()
+        await prober
+
+    latencies.sort()
+    return {
+        "wall": wall,
+        "rps": len(latencies) / wall if wall else 0.0,
+        "p50": statistics.median(latencies) if latencies else float("nan"),
+        "p95": latencies[int(len(latencies) * 0.95) - 1] if latencies else float("nan"),
+        "probe": max(probes) if probes else float("nan"),
+        "errors": errors,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Sync vs async handler load comparison")
+    parser.add_argument("--clients", type=int, default=200, help="Concurrent requests per endpoint")
+    parser.add_argument("--latency", type=float, default=0.5, help="Upstream response latency in seconds")
+    args = parser.parse_args()
+
+    upstream_port, service_port = free_port(), free_port()
+    serve(upstream_app(args.latency), upstream_port)
+    NewsScraper.BBC_RSS = f"http://127.0.0.1:{upstream_port}/rss.xml"
+    serve(service_app(), service_port)
+
+    print(f"{args.clients} concurrent clients, upstream latency {args.latency}s, one uvicorn worker\n")
+    print(f"{'handler':<8} {'wall':>8} {'req/s':>8} {'p50':>8} {'p95':>8} {'probe max':>10} {'errors':>7}")
+    base = f"http://127.0.0.1:{service_port}"
+    for name in ("sync", "async"):
+        result = asyncio.run(hammer(f"{base}/{name}", f"{base}/probe", args.clients))
+        print(
+            f"{name:<8} {result['wall']:>7.2f}s {result['rps']:>8.1f} "
+            f"{result['p50']:>7.2f}s {result['p95']:>7.2f}s {result['probe']:>9.2f}s {result['errors']:>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Optional, Tuple
+
+
+class SnapshotCache:
+    """
+    In-process stale-while-revalidate cache around one expensive async loader.
+
+    - fresh (younger than `max_age`): served as-is
+    - stale (younger than `max_stale`): served as-is while a single background
+      refresh runs
+    - missing or too old: the caller waits for a load; concurrent callers
+      share that one load instead of starting their own
+
+    Meant to be used from a single event loop; the in-flight load is a task
+    every concurrent caller awaits.
+    """
+
+    def __init__(self, loader: Callable[[], Awaitable[Any]], max_age: float, max_stale: float):
+        self.loader = loader
+        self.max_age = max_age
+        self.max_stale = max_stale
+        self._value: Any = None
+        self._loaded_at: Optional[float] = None
+        self._inflight: Optional[asyncio.Task] = None
+
+    async def _load(self) -> Any:
+        try:
+            value = await self.loader()
+            self._value = value
+            self._loaded_at = time.monotonic()
+            return value
+        finally:
+            self._inflight = None
+
+    def _start_load(self) -> asyncio.Task:
+        if self._inflight is None:
+            self._inflight = asyncio.create_task(self._load())
+            self._inflight.add_done_callback(self._report_failure)
+        return self._inflight
+
+    @staticmethod
+    def _report_failure(task: asyncio.Task) -> None:
+        # Background refreshes have nobody awaiting them
+        if not task.cancelled() and task.exception() is not None:
+            print(f"[ERROR] Snapshot refresh failed: {task.exception()}")
+
+    async def get(self) -> Tuple[Any, float, str]:
+        """Returns (value, age_seconds, status) with status one of HIT, STALE, MISS."""
+        age = None if self._loaded_at is None else time.monotonic() - self._loaded_at
+        if age is not None and age < self.max_age:
+            return self._value, age, "HIT"
+        if age is not None and age < self.max_stale:
+            self._start_load()
+            return self._value, age, "STALE"
+        # shield: a client disconnecting must not cancel the load others wait on.
+        # The loader's exception reaches every coalesced caller.
+        return await asyncio.shield(self._start_load()), 0.0, "MISS"
+
+    def invalidate(self) -> None:
+        self._loaded_at = None
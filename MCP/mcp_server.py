@@ -1,7 +1,9 @@
 from fastmcp import FastMCP
+import asyncio
 import os
 import sys
 import json
+import time
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -12,9 +14,11 @@ root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if root_dir not in sys.path:
     sys.path.append(root_dir)
 
+from Cache.seen_store import result_key
 from Preprocessing.preprocessing import fetch_and_process_data
 import app
 from Mail_SMTP import mail
+from Storage.news_store import news_store
 
 # Initialize FastMCP server
 mcp = FastMCP("NewsLens AI")
@@ -36,43 +40,27 @@ def fetch_latest_news(limit: int = 3) -> str:
         return f"Error fetching news: {str(e)}"
 
 @mcp.tool()
-def summarize_news_data(news_json: str) -> str:
+async def summarize_news_data(news_json: str) -> str:
     """
     Summarizes the provided news JSON using the Groq-powered AI pipeline.
     Expects a JSON string containing a list of articles with 'title' and 'content'.
     """
     try:
         articles = json.loads(news_json)
-        summarized = []
         
-        # We can use the existing chain from app.py
-        from app import chain
+        # We can use the existing summarizer from app.py; unchanged articles
+        # come straight from the summary cache and the rest run concurrently
+        from app import summarizer
         
-        for article in articles:
-            print(f"Summarizing: {article.get('title')}")
-            summary = chain.invoke({
-                "title": article.get('title', 'No Title'),
-                "content": article.get('content', 'No Content')
-            })
-            
-            # Simple cleaning as done in app.py
-            clean_summary = summary.strip()
-            prefixes = ["Here is a summary", "Here's a summary", "The following is a summary", "Summary:"]
-            for prefix in prefixes:
-                if clean_summary.lower().startswith(prefix.lower()):
-                    clean_summary = clean_summary[len(prefix):].strip().lstrip(":").strip()
+        summarized = await summarizer.asummarize(articles, verbose=False)
+        if not summarized:
+            # Keep the current brief rather than replacing it with an empty one
+            return "No articles were summarized."
+
+        # Archive the summaries and make them the brief the mailer sends
+        contents = {result_key(a): a.get("content") for a in articles}
+        await asyncio.to_thread(news_store.save_brief, summarized, contents=contents)
 
-            summarized.append({
-                "source": article.get('source', 'Unknown'),
-                "title": article.get('title', 'No Title'),
-                "summary": clean_summary
-            })
-        
-        # Save to file as expected by mailer
-        output_filename = "summarized_news.json"
-        with open(output_filename, "w", encoding="utf-8") as f:
-            json.dump(summarized, f, indent=2, ensure_ascii=False)
-            
         return json.dumps(summarized, indent=2)
     except Exception as e:
         return f"Error summarizing news: {str(e)}"
@@ -80,7 +68,7 @@ def summarize_news_data(news_json: str) -> str:
 @mcp.tool()
 def send_news_brief_email() -> str:
     """
-    Sends the current summarized news brief (from summarized_news.json) via email.
+    Sends the current summarized news brief (from the news store) via email.
     """
     try:
         mail.main()
@@ -88,15 +76,52 @@ def send_news_brief_email() -> str:
     except Exception as e:
         return f"Error sending email: {str(e)}"
 
+@mcp.tool()
+def query_news_archive(source: str = "", since: str = "", until: str = "", url: str = "", limit: int = 20) -> str:
+    """
+    Searches previously summarized news, newest first.
+    Args:
+        source: Source prefix, e.g. "BBC", "CNN" or "YouTube" (empty for all).
+        since: ISO date or datetime to start from, inclusive (e.g. "2026-10-01").
+        until: ISO date or datetime to stop at, exclusive.
+        url: Exact article URL.
+        limit: Maximum number of summaries to return (default 20).
+    """
+    try:
+        results = news_store.query(source=source or None, since=since, until=until,
+                                   url=url or None, limit=limit)
+        return json.dumps(results, indent=2, ensure_ascii=False)
+    except Exception as e:
+        return f"Error querying news: {str(e)}"
+
+@mcp.tool()
+def search_news(query: str, days: float = 0, source: str = "", limit: int = 10) -> str:
+    """
+    Full-text search over every summarized article, best match first.
+    Args:
+        query: Words to look for, e.g. "interest rates". All words must match.
+        days: Only search the last N days (0 for the whole archive).
+        source: Source prefix, e.g. "BBC", "CNN" or "YouTube" (empty for all).
+        limit: Maximum number of results (default 10).
+    """
+    try:
+        since = time.time() - days * 86400 if days > 0 else None
+        results = news_store.search(query, source=source or None, since=since, limit=limit)
+        if not results:
+            return f"No summarized news matches '{query}'."
+        return json.dumps(results, indent=2, ensure_ascii=False)
+    except Exception as e:
+        return f"Error searching news: {str(e)}"
+
 @mcp.resource("news://latest")
 def get_latest_summarized_news() -> str:
     """
-    Returns the contents of summarized_news.json if it exists.
+    Returns the current summarized news brief if there is one.
     """
     try:
-        if os.path.exists("summarized_news.json"):
-            with open("summarized_news.json", "r", encoding="utf-8") as f:
-                return f.read()
+        brief = news_store.brief()
+        if brief:
+            return json.dumps(brief, indent=2, ensure_ascii=False)
         return "No summarized news found. Run summarize_news_data first."
     except Exception as e:
         return f"Error reading news: {str(e)}"
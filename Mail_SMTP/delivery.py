@@ -0,0 +1,258 @@
+import os
+import random
+import smtplib
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from email.message import Message
+from typing import Callable, Dict, Iterable, Optional
+
+from Metrics.metrics import EMAILS, STAGE_ITEMS, timed
+from Summarization.rate_limiter import TokenBucket
+
+SMTP_HOST = os.environ.get("NEWSLENS_SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.environ.get("NEWSLENS_SMTP_PORT", "465"))
+# Implicit TLS (port 465); set to false for a plain local SMTP stand-in
+SMTP_SSL = os.environ.get("NEWSLENS_SMTP_SSL", "true").lower() == "true"
+# Authenticated connections kept open and used in parallel
+SMTP_CONNECTIONS = int(os.environ.get("NEWSLENS_SMTP_CONNECTIONS", "3"))
+# Messages per second across all connections
+SMTP_RATE = float(os.environ.get("NEWSLENS_SMTP_RATE", "5"))
+SMTP_MAX_RETRIES = int(os.environ.get("NEWSLENS_SMTP_MAX_RETRIES", "3"))
+# Providers drop long-lived sessions; reconnect after this many messages
+MESSAGES_PER_CONNECTION = int(os.environ.get("NEWSLENS_SMTP_MESSAGES_PER_CONNECTION", "100"))
+SMTP_TIMEOUT = float(os.environ.get("NEWSLENS_SMTP_TIMEOUT", "30"))
+
+
+@dataclass
+class DeliveryStats:
+    sent: int = 0
+    failed: int = 0
+    retries: int = 0
+    connections: int = 0
+    seconds: float = 0.0
+    # recipient -> last error, for the ones that could not be delivered
+    failures: Dict[str, str] = field(default_factory=dict)
+    # Why the whole send stopped early, e.g. the login was rejected
+    aborted: Optional[str] = None
+
+    def report(self) -> str:
+        rate = self.sent / self.seconds if self.seconds else 0.0
+        text = (f"Delivered {self.sent}, failed {self.failed}, retries {self.retries}, "
+                f"{self.connections} connections, {self.seconds:.2f}s ({rate:.1f} msg/s)")
+        return f"{text}, aborted: {self.aborted}" if self.aborted else text
+
+
+def is_transient(error: Exception) -> bool:
+    """4xx replies and dropped connections are worth retrying; 5xx replies are not."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    return isinstance(error, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, socket.error))
+
+
+def describe(error: Exception) -> str:
+    """Short "<code> <reply>" text for SMTP replies instead of their raw repr."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused) and error.recipients:
+        code, reply = next(iter(error.recipients.values()))
+    elif isinstance(error, smtplib.SMTPResponseException):
+        code, reply = error.smtp_code, error.smtp_error
+    else:
+        return str(error) or type(error).__name__
+    if isinstance(reply, bytes):
+        reply = reply.decode("utf-8", errors="replace")
+    return f"{code} {reply}"
+
+
+def is_fatal(error: Exception) -> bool:
+    """
+    Errors about the account rather than the recipient: every other message
+    would fail the same way, and repeated bad logins can get the account locked.
+    """
+    return isinstance(error, (smtplib.SMTPAuthenticationError, smtplib.SMTPSenderRefused,
+                              smtplib.SMTPNotSupportedError))
+
+
+def connection_survives(error: Exception) -> bool:
+    """A refused recipient or message leaves the session usable; anything else may not."""
+    if isinstance(error, (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused)):
+        return True
+    # 421: the server is closing the session
+    return isinstance(error, smtplib.SMTPResponseException) and error.smtp_code != 421
+
+
+class SmtpDelivery:
+    """
+    Sends one message per recipient over a small pool of authenticated SMTP
+    connections.
+
+    Each worker thread owns one connection and reuses it for every message it
+    sends; a shared token bucket throttles the overall send rate. Transient
+    failures are retried with exponential backoff, on a fresh connection when
+    the server closed or broke the session; permanent ones are recorded and
+    reported in the returned DeliveryStats.
+    A rejected login or sender stops the whole send: recipients not yet
+    tried are marked failed without connecting again.
+    """
+
+    def __init__(self, username: Optional[str], password: Optional[str],
+                 host: str = SMTP_HOST, port: int = SMTP_PORT, use_ssl: bool = SMTP_SSL,
+                 connections: int = SMTP_CONNECTIONS, rate: float = SMTP_RATE,
+                 max_retries: int = SMTP_MAX_RETRIES,
+                 messages_per_connection: int = MESSAGES_PER_CONNECTION,
+                 timeout: float = SMTP_TIMEOUT):
+        self.username = username
+        self.password = password
+        self.host = host
+        self.port = port
+        self.use_ssl = use_ssl
+        self.connections = max(1, connections)
+        self.max_retries = max_retries
+        self.messages_per_connection = messages_per_connection
+        self.timeout = timeout
+        self._bucket = TokenBucket(rate, period=1.0) if rate > 0 else None
+        self._bucket_lock = threading.Lock()
+        self._local = threading.local()
+        self._open = []
+        self._open_lock = threading.Lock()
+
+    def _throttle(self) -> None:
+        if self._bucket is None:
+            return
+        while True:
+            with self._bucket_lock:
+                delay = self._bucket.wait_time(1)
+                if delay <= 0:
+                    self._bucket.take(1)
+                    return
+            time.sleep(delay)
+
+    def _connect(self, stats: DeliveryStats) -> smtplib.SMTP:
+        if self.use_ssl:
+            server = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout)
+        else:
+            server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            server.ehlo()
+            if self.username and self.password and server.has_extn("auth"):
+                server.login(self.username, self.password)
+        except Exception:
+            server.close()
+            raise
+        with self._open_lock:
+            self._open.append(server)
+            stats.connections += 1
+        return server
+
+    def _connection(self, stats: DeliveryStats) -> smtplib.SMTP:
+        """This thread's connection, (re)opened when missing or used up."""
+        server = getattr(self._local, "server", None)
+        if server is not None and self._local.sent >= self.messages_per_connection:
+            self._drop()
+            server = None
+        if server is None:
+            server = self._connect(stats)
+            self._local.server = server
+            self._local.sent = 0
+        return server
+
+    def _drop(self) -> None:
+        server = getattr(self._local, "server", None)
+        self._local.server = None
+        if server is None:
+            return
+        with self._open_lock:
+            if server in self._open:
+                self._open.remove(server)
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+    @staticmethod
+    def _fail(recipient: str, reason: str, stats: DeliveryStats, lock: threading.Lock) -> None:
+        with lock:
+            stats.failed += 1
+            stats.failures[recipient] = reason
+        EMAILS.inc(outcome="failed")
+
+    def _send_one(self, sender: str, recipient: str, message: Message, stats: DeliveryStats,
+                  lock: threading.Lock) -> None:
+        payload = message.as_string()
+        for attempt in range(self.max_retries + 1):
+            self._throttle()
+            if stats.aborted:
+                self._fail(recipient, stats.aborted, stats, lock)
+                return
+            try:
+                with timed("smtp_send"):
+                    server = self._connection(stats)
+                    server.sendmail(sender, [recipient], payload)
+                self._local.sent += 1
+                with lock:
+                    stats.sent += 1
+                EMAILS.inc(outcome="sent")
+                STAGE_ITEMS.inc(stage="smtp_send")
+                return
+            except Exception as e:
+                if not connection_survives(e):
+                    self._drop()
+                if is_fatal(e):
+                    with lock:
+                        first = stats.aborted is None
+                        if first:
+                            stats.aborted = describe(e)
+                    if first:
+                        print(f"[ERROR] Stopping delivery, the SMTP server rejected the account: {describe(e)}")
+                    self._fail(recipient, stats.aborted, stats, lock)
+                    return
+                if not is_transient(e) or attempt == self.max_retries:
+                    print(f"[ERROR] Could not deliver to {recipient}: {describe(e)}")
+                    self._fail(recipient, describe(e), stats, lock)
+                    return
+                with lock:
+                    stats.retries += 1
+                delay = min(30.0, 2 ** attempt) * (0.5 + random.random() / 2)
+                print(f"[WARN] Delivery to {recipient} failed ({describe(e)}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    def send(self, sender: str, recipients: Iterable[str],
+             build_message: Callable[[str], Message]) -> DeliveryStats:
+        """Builds and sends one message per recipient; returns the delivery stats."""
+        recipients = list(dict.fromkeys(r for r in recipients if r))
+        stats = DeliveryStats()
+        lock = threading.Lock()
+        start = time.perf_counter()
+
+        def deliver(recipient: str) -> None:
+            if stats.aborted:
+                self._fail(recipient, stats.aborted, stats, lock)
+                return
+            self._send_one(sender, recipient, build_message(recipient), stats, lock)
+
+        workers = min(self.connections, len(recipients)) or 1
+        try:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="smtp") as executor:
+                # The first message goes alone, so the other workers only log in
+                # once the credentials are known to work
+                if recipients:
+                    executor.submit(deliver, recipients[0]).result()
+                list(executor.map(deliver, recipients[1:]))
+        finally:
+            self.close()
+        if stats.aborted:
+            print(f"[ERROR] Delivery stopped; {stats.failed} of {len(recipients)} recipients not reached")
+        stats.seconds = round(time.perf_counter() - start, 3)
+        return stats
+
+    def close(self) -> None:
+        with self._open_lock:
+            servers, self._open = self._open, []
+        for server in servers:
+            try:
+                server.quit()
+            except Exception:
+                server.close()
@@ -0,0 +1,180 @@
+import html
+import re
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from Metrics.metrics import STAGE_ITEMS, STAGE_SECONDS
+
+_PLACEHOLDER = re.compile(r"\{\{\s*(\w+)(\|raw)?\s*\}\}")
+
+
+def _brace_escape(literal: str) -> str:
+    return literal.replace("{", "{{").replace("}", "}}")
+
+
+class Template:
+    """
+    Tiny precompiled template: "{{name}}" slots are HTML-escaped, "{{name|raw}}"
+    slots are inserted as-is. The text is compiled once into a str.format
+    pattern, so rendering is one C-level format call with no re-parsing.
+    """
+
+    def __init__(self, text: str):
+        self.slots: List[tuple] = []
+        pattern = []
+        pos = 0
+        for match in _PLACEHOLDER.finditer(text):
+            pattern.append(_brace_escape(text[pos:match.start()]))
+            pattern.append("{%d}" % len(self.slots))
+            self.slots.append((match.group(1), bool(match.group(2))))
+            pos = match.end()
+        pattern.append(_brace_escape(text[pos:]))
+        self._pattern = "".join(pattern)
+
+    def render(self, values: Dict[str, object]) -> str:
+        return self._pattern.format(*[
+            str(values.get(name, "")) if raw else html.escape(str(values.get(name, "")))
+            for name, raw in self.slots
+        ])
+
+
+# Static sections are built once at import and reused for every digest
+HTML_HEAD = """<html>
+<head>
+    <style>
+        body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; }
+        .container { max-width: 600px; margin: 0 auto; padding: 20px; }
+        .header { background-color: #2c3e50; color: white; padding: 15px; text-align: center; border-radius: 5px 5px 0 0; }
+        .article { border: 1px solid #ddd; border-top: none; padding: 15px; margin-bottom: 0; background-color: #fff; }
+        .article:first-of-type { border-top: 1px solid #ddd; }
+        .source { color: #e74c3c; font-weight: bold; font-size: 0.9em; }
+        .title { color: #2c3e50; font-size: 1.2em; margin: 5px 0; font-weight: bold; }
+        .summary { color: #555; background-color: #f9f9f9; padding: 10px; border-left: 4px solid #3498db; border-radius: 3px; }
+        .coverage { font-size: 0.85em; color: #777; margin-top: 8px; }
+        .coverage a { color: #2980b9; }
+        .footer { text-align: center; font-size: 0.8em; color: #888; margin-top: 20px; padding: 10px; }
+    </style>
+</head>
+<body>
+    <div class="container">
+"""
+
+HEADER_HTML = Template("""        <div class="header">
+            <h2>{{heading}}</h2>
+            <p>{{date}}</p>
+        </div>
+""")
+
+ARTICLE_HTML = Template("""        <div class="article">
+            <div class="source">{{source}}</div>
+            <div class="title">{{title}}</div>
+            <div class="summary">{{summary|raw}}</div>{{coverage|raw}}
+        </div>
+""")
+
+COVERAGE_HTML = Template("""
+            <div class="coverage">Covered by: {{links|raw}}</div>""")
+
+COVERAGE_LINK_HTML = Template("""<a href="{{url}}" title="{{title}}">{{source}}</a>""")
+
+COVERAGE_SOURCE_HTML = Template("""<span title="{{title}}">{{source}}</span>""")
+
+FOOTER_HTML = Template("""        <div class="footer">
+            <p>Generated by AI News Agent</p>{{recipient_line|raw}}
+        </div>
+    </div>
+</body>
+</html>
+""")
+
+RECIPIENT_HTML = Template("""
+            <p>Sent to {{recipient}}</p>""")
+
+ARTICLE_TEXT = Template("""[{{source|raw}}] {{title|raw}}
+{{summary|raw}}
+{{coverage|raw}}""")
+
+COVERAGE_TEXT = Template("""  - {{source|raw}}: {{title|raw}} {{url|raw}}
+""")
+
+TEXT_RULE = "-" * 60 + "\n"
+
+
+def _summary_html(summary: str) -> str:
+    return html.escape(summary).replace("\n", "<br>")
+
+
+def _coverage_html(coverage: List[Dict[str, str]]) -> str:
+    if not coverage:
+        return ""
+    links = " &middot; ".join(
+        (COVERAGE_LINK_HTML if item.get("url") else COVERAGE_SOURCE_HTML).render(item)
+        for item in coverage
+    )
+    return COVERAGE_HTML.render({"links": links})
+
+
+def _coverage_text(coverage: List[Dict[str, str]]) -> str:
+    if not coverage:
+        return ""
+    return "Covered by:\n" + "".join(COVERAGE_TEXT.render(item) for item in coverage)
+
+
+@dataclass
+class Digest:
+    """
+    A rendered digest. The article sections are rendered once; per-recipient
+    variants only add the small recipient-specific footer.
+    """
+    head_html: str
+    articles_html: str
+    text: str
+
+    def html_for(self, recipient: Optional[str] = None) -> str:
+        recipient_line = RECIPIENT_HTML.render({"recipient": recipient}) if recipient else ""
+        return "".join((self.head_html, self.articles_html, FOOTER_HTML.render({"recipient_line": recipient_line})))
+
+    def text_for(self, recipient: Optional[str] = None) -> str:
+        footer = "Generated by AI News Agent\n" + (f"Sent to {recipient}\n" if recipient else "")
+        return self.text + footer
+
+
+def render_digest(articles: List[Dict[str, str]], heading: str = "Daily News Brief",
+                  date: Optional[datetime] = None) -> Digest:
+    """
+    Renders HTML and plain-text bodies in one linear pass over the articles.
+    Each story is one section; stories covered by several sources come first
+    and list every source they were summarized from.
+    """
+    start = time.perf_counter()
+    date_text = (date or datetime.now()).strftime('%B %d, %Y')
+    html_parts = []
+    text_parts = [f"{heading} - {date_text}\n", "=" * 60 + "\n\n"]
+
+    # Stable sort: the brief's order is kept among stories with equal coverage
+    for article in sorted(articles, key=lambda a: -len(a.get("coverage") or ())):
+        source = article.get("source", "Unknown Source")
+        title = article.get("title", "No Title")
+        summary = article.get("summary", "No Summary Available")
+        coverage = article.get("coverage") or []
+        html_parts.append(ARTICLE_HTML.render({
+            "source": source,
+            "title": title,
+            "summary": _summary_html(summary),
+            "coverage": _coverage_html(coverage),
+        }))
+        text_parts.append(ARTICLE_TEXT.render({
+            "source": source,
+            "title": title,
+            "summary": summary,
+            "coverage": _coverage_text(coverage),
+        }))
+        text_parts.append(TEXT_RULE)
+
+    head = HTML_HEAD + HEADER_HTML.render({"heading": heading, "date": date_text})
+    digest = Digest(head_html=head, articles_html="".join(html_parts), text="".join(text_parts))
+    STAGE_SECONDS.observe(time.perf_counter() - start, stage="email_render")
+    STAGE_ITEMS.inc(len(articles), stage="email_render")
+    return digest
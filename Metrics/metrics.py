@@ -0,0 +1,268 @@
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Seconds; wide enough for both a cache read and a slow LLM call
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Metric:
+    """A named metric family with a fixed set of label names."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """Monotonic total per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def values(self) -> Dict[LabelValues, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def samples(self) -> Iterable[str]:
+        for key, value in sorted(self.values().items()):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Histogram(Metric):
+    """Observation counts per bucket, plus their count and sum, per label set."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # label values -> [per-bucket counts (not cumulative), count, sum]
+        self._values: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = next(i for i, bound in enumerate(self.buckets) if value <= bound)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0, 0.0]
+            state[0][index] += 1
+            state[1] += 1
+            state[2] += value
+
+    def values(self) -> Dict[LabelValues, Tuple[List[int], int, float]]:
+        with self._lock:
+            return {key: (list(counts), count, total) for key, (counts, count, total) in self._values.items()}
+
+    def quantile(self, q: float, counts: List[int]) -> float:
+        """
+        Estimates the q-quantile (0..1) from bucket counts the way Prometheus'
+        histogram_quantile() does: linear interpolation inside the bucket.
+        """
+        count = sum(counts)
+        if not count:
+            return 0.0
+        rank = q * count
+        seen = 0
+        for i, bucket_count in enumerate(counts):
+            if seen + bucket_count >= rank and bucket_count:
+                low = self.buckets[i - 1] if i else 0.0
+                high = self.buckets[i]
+                if high == math.inf:
+                    return low
+                return low + (high - low) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.buckets[-2]
+
+    def samples(self) -> Iterable[str]:
+        for key, (counts, count, total) in sorted(self.values().items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, key)} {count}"
+
+
+class Registry:
+    """Process-wide set of metrics, rendered for Prometheus or as a JSON report."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+registry = Registry()
+
+STAGE_SECONDS = registry.histogram(
+    "newslens_stage_duration_seconds", "Time spent per operation of a pipeline stage.", ["stage"])
+STAGE_ITEMS = registry.counter(
+    "newslens_stage_items_total", "Items produced by a pipeline stage.", ["stage"])
+STAGE_ERRORS = registry.counter(
+    "newslens_stage_errors_total", "Failed operations of a pipeline stage.", ["stage"])
+DOWNLOADED_BYTES = registry.counter(
+    "newslens_downloaded_bytes_total", "Bytes downloaded by a fetch stage.", ["stage"])
+CACHE_LOOKUPS = registry.counter(
+    "newslens_cache_lookups_total", "Cache lookups by cache and result (hit or miss).", ["cache", "result"])
+LLM_REQUESTS = registry.counter(
+    "newslens_llm_requests_total", "LLM calls by outcome (ok, rate_limited or error).", ["outcome"])
+LLM_TOKENS = registry.counter(
+    "newslens_llm_tokens_total",
+    "LLM tokens by type (prompt or completion), as reported by the API or estimated when it reports none.",
+    ["type"])
+EMAILS = registry.counter(
+    "newslens_emails_total", "Messages handed to the SMTP server by outcome (sent or failed).", ["outcome"])
+
+
+@contextmanager
+def timed(stage: str):
+    """Records the duration of the block under `stage`, and an error if it raises."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.inc(stage=stage)
+        raise
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage)
+
+
+# Per-run progress callback, progress(stage, counts, done): called when a
+# stage starts, whenever its item counts change, and once with done=True
+Progress = Callable[[str, Dict[str, int], bool], None]
+
+
+def no_progress(stage: str, counts: Dict[str, int], done: bool = False) -> None:
+    pass
+
+
+def cache_lookup(cache: str, hit: bool) -> None:
+    CACHE_LOOKUPS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def report() -> Dict:
+    """JSON-friendly summary of every metric, with latency percentiles estimated from the buckets."""
+    def by_label(counter: Counter) -> Dict[str, float]:
+        return {key[0]: value for key, value in counter.values().items()}
+
+    items, errors, downloaded = by_label(STAGE_ITEMS), by_label(STAGE_ERRORS), by_label(DOWNLOADED_BYTES)
+    stages = {}
+    for (stage,), (counts, count, total) in sorted(STAGE_SECONDS.values().items()):
+        stages[stage] = {
+            "operations": count,
+            "errors": int(errors.get(stage, 0)),
+            "seconds": round(total, 3),
+            "mean_ms": round(total / count * 1000, 2) if count else 0.0,
+            "p50_ms": round(STAGE_SECONDS.quantile(0.50, counts) * 1000, 2),
+            "p95_ms": round(STAGE_SECONDS.quantile(0.95, counts) * 1000, 2),
+            "p99_ms": round(STAGE_SECONDS.quantile(0.99, counts) * 1000, 2),
+        }
+        if stage in items:
+            stages[stage]["items"] = int(items[stage])
+        if stage in downloaded:
+            stages[stage]["bytes"] = int(downloaded[stage])
+
+    caches: Dict[str, Dict] = {}
+    for (cache, result), value in sorted(CACHE_LOOKUPS.values().items()):
+        caches.setdefault(cache, {"hits": 0, "misses": 0})["hits" if result == "hit" else "misses"] = int(value)
+    for stats in caches.values():
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+
+    tokens = by_label(LLM_TOKENS)
+    return {
+        "stages": stages,
+        "caches": caches,
+        "llm": {
+            "requests": {outcome: int(v) for outcome, v in by_label(LLM_REQUESTS).items()},
+            "prompt_tokens": int(tokens.get("prompt", 0)),
+            "completion_tokens": int(tokens.get("completion", 0)),
+        },
+        "emails": {outcome: int(v) for outcome, v in by_label(EMAILS).items()},
+    }
+
+
+def write_report(path: str, **extra) -> Optional[str]:
+    """Writes report() plus `extra` fields to `path` as JSON; returns the path, or None on failure."""
+    data = {**extra, **report()}
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"[WARN] Could not write run report to {path}: {e}")
+        return None
+    return path
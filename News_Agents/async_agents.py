@@ -0,0 +1,135 @@
+import asyncio
+import os
+import sys
+from typing import Callable, Dict, List, Optional
+
+# Ensure root directory is in path so the agents also run as a script
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if root_dir not in sys.path:
+    sys.path.append(root_dir)
+
+from Cache.content_cache import canonical_url, content_cache
+from Cache.feed_cache import aparse_feed
+from News_Agents.bbc_news_agent import (
+    ARTICLE_TIMEOUT, FULL_TEXT as BBC_FULL_TEXT, ArticleFetcher as BBCFetcher, NewsScraper as BBCScraper
+)
+from News_Agents.cnn_news_agent import ArticleFetcher as CNNFetcher, NewsScraper as CNNScraper
+from News_Agents.http_client import FETCH_WORKERS, REQUEST_TIMEOUT, afetch_text
+from News_Agents.youtube_news_agent import YoutubeNewsAgent
+
+# Async versions of the BBC, CNN and YouTube agents for the FastAPI service.
+# Network I/O is awaited on the event loop; HTML/XML parsing and the
+# synchronous transcript client run in worker threads so the loop stays free.
+
+# Items taken per run from each source
+BBC_LIMIT = int(os.environ.get("NEWSLENS_BBC_LIMIT", "3"))
+CNN_LIMIT = int(os.environ.get("NEWSLENS_CNN_LIMIT", "3"))
+YOUTUBE_PER_CHANNEL = int(os.environ.get("NEWSLENS_YOUTUBE_PER_CHANNEL", "1"))
+
+
+async def _article_body(url: str, extract: Callable[[Optional[str]], str],
+                        timeout: float = REQUEST_TIMEOUT) -> str:
+    key = canonical_url(url)
+    content = await asyncio.to_thread(content_cache.get, key)
+    if content is not None:
+        return content
+    try:
+        html = await asyncio.wait_for(afetch_text(url, timeout=timeout), timeout)
+    except asyncio.TimeoutError:
+        print(f"[ERROR] Gave up on {url} after {timeout}s")
+        return ""
+    content = await asyncio.to_thread(extract, html)
+    if content:
+        await asyncio.to_thread(content_cache.set, key, content)
+    return content
+
+
+async def afetch_bbc(limit: int = BBC_LIMIT, full_text: bool = BBC_FULL_TEXT,
+                     max_concurrency: int = FETCH_WORKERS) -> List[Dict[str, str]]:
+    feed = await aparse_feed(BBCScraper.BBC_RSS)
+    articles = [
+        {
+            "source": "BBC",
+            "title": entry.get("title", "").strip(),
+            "url": entry.get("link", "").strip(),
+            "content": entry.get("summary", "").strip(),
+        }
+        for entry in feed.entries[:limit]
+    ]
+    if not full_text:
+        return articles
+
+    # Every article falls back to its RSS summary if the body can't be had in time
+    slots = asyncio.Semaphore(max_concurrency)
+
+    async def with_body(article):
+        async with slots:
+            content = await _article_body(article["url"], BBCFetcher.extract_bbc, ARTICLE_TIMEOUT)
+        return {**article, "content": content} if content else article
+
+    return list(await asyncio.gather(*(with_body(article) for article in articles)))
+
+
+async def afetch_cnn(limit: int = CNN_LIMIT, max_concurrency: int = FETCH_WORKERS) -> List[Dict[str, str]]:
+    feed = await aparse_feed(CNNScraper.CNN_RSS)
+    candidates = []
+    for entry in feed.entries:
+        title = entry.get("title", "").strip()
+        link = entry.get("link", "").strip()
+        # Filter junk
+        if not title or not link or "video" in title.lower() or "/videos" in link:
+            continue
+        candidates.append({"source": "CNN", "title": title, "url": link})
+
+    # Same contract as get_cnn_news: the first `limit` articles with content,
+    # in feed order, fetched a window at a time
+    articles = []
+    for start in range(0, len(candidates), max_concurrency):
+        window = candidates[start:start + max_concurrency]
+        bodies = await asyncio.gather(*(_article_body(item["url"], CNNFetcher.extract_cnn) for item in window))
+        for item, content in zip(window, bodies):
+            if content:
+                articles.append({**item, "content": content})
+                if len(articles) >= limit:
+                    return articles
+    return articles
+
+
+async def afetch_channel(name: str, channel_id: str, limit_per_channel: int = 1,
+                        agent: Optional[YoutubeNewsAgent] = None) -> List[Dict[str, str]]:
+    agent = agent or YoutubeNewsAgent()
+    feed = await aparse_feed(agent.feed_url(channel_id))
+    # The transcript client is synchronous; its parallel candidate checks run off the loop
+    return await asyncio.to_thread(agent.channel_transcripts, name, feed.entries, limit_per_channel)
+
+
+async def afetch_youtube(limit_per_channel: int = YOUTUBE_PER_CHANNEL) -> List[Dict[str, str]]:
+    agent = YoutubeNewsAgent()
+    per_channel = await asyncio.gather(*(
+        afetch_channel(name, channel_id, limit_per_channel, agent)
+        for name, channel_id in agent.CHANNELS.items()
+    ))
+    return [item for items in per_channel for item in items]
+
+
+ASYNC_SOURCES = [
+    ("BBC", afetch_bbc),
+    ("CNN", afetch_cnn),
+    ("YouTube", afetch_youtube),
+]
+
+
+async def afetch_sources(timeout: Optional[float] = None) -> List[Dict[str, str]]:
+    """Runs all async sources concurrently; a failed or timed-out source contributes nothing."""
+
+    async def run(name, fn):
+        try:
+            return await asyncio.wait_for(fn(), timeout)
+        except asyncio.TimeoutError:
+            print(f"[ERROR] {name} fetch timed out after {timeout}s")
+        except Exception as e:
+            print(f"[ERROR] {name} fetch failed: {e}")
+        return []
+
+    per_source = await asyncio.gather(*(run(name, fn) for name, fn in ASYNC_SOURCES))
+    return [item for items in per_source for item in items]
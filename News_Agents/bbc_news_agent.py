@@ -1,11 +1,28 @@
 import argparse
+import os
+import sys
+import threading
 from dataclasses import dataclass
 from typing import List, Optional
 
-import feedparser
-import requests
 from bs4 import BeautifulSoup
 
+# Ensure root directory is in path so the agent also runs as a script
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if root_dir not in sys.path:
+    sys.path.append(root_dir)
+
+from Cache.content_cache import cached_content
+from Cache.feed_cache import parse_feed
+from Metrics.metrics import timed
+from News_Agents.html_extract import use_lxml, xpath_texts
+from News_Agents.http_client import HEADERS, REQUEST_TIMEOUT, fetch_text, fetch_until
+
+# Fetch full article bodies instead of using the one-line RSS summary
+FULL_TEXT = os.environ.get("NEWSLENS_BBC_FULL_TEXT", "false").lower() == "true"
+# Total time allowed for one article download in full-text mode
+ARTICLE_TIMEOUT = float(os.environ.get("NEWSLENS_ARTICLE_TIMEOUT", "8"))
+
 
 # =========================
 # Data Model
@@ -22,30 +39,36 @@ class Article:
 # Article Fetchers
 # =========================
 class ArticleFetcher:
-    HEADERS = {
-        "User-Agent": (
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-            "AppleWebKit/537.36 (KHTML, like Gecko) "
-            "Chrome/120.0 Safari/537.36"
-        )
-    }
+    HEADERS = HEADERS
 
     @staticmethod
-    def fetch_html(url: str) -> Optional[str]:
-        try:
-            resp = requests.get(url, headers=ArticleFetcher.HEADERS, timeout=10)
-            resp.raise_for_status()
-            return resp.text
-        except Exception as e:
-            print(f"[ERROR] Failed to fetch article: {e}")
-            return None
+    def fetch_html(url: str, cancel: Optional[threading.Event] = None,
+                   timeout: float = REQUEST_TIMEOUT) -> Optional[str]:
+        return fetch_text(url, cancel=cancel, timeout=timeout)
 
     @staticmethod
-    def parse_bbc(url: str) -> str:
-        html = ArticleFetcher.fetch_html(url)
+    def parse_bbc(url: str, cancel: Optional[threading.Event] = None,
+                  timeout: float = REQUEST_TIMEOUT) -> str:
+        # Recently extracted pages are served from the on-disk content cache
+        return cached_content(
+            url, lambda: ArticleFetcher.extract_bbc(ArticleFetcher.fetch_html(url, cancel=cancel, timeout=timeout))
+        )
+
+    @staticmethod
+    def extract_bbc(html: Optional[str]) -> str:
         if not html:
             return ""
 
+        with timed("body_parse"):
+            if use_lxml():
+                try:
+                    return "\n".join(xpath_texts(html, "(//article)[1]//p") or [])
+                except Exception as e:
+                    print(f"[WARN] lxml extraction failed, falling back to BeautifulSoup: {e}")
+            return ArticleFetcher.extract_bbc_soup(html)
+
+    @staticmethod
+    def extract_bbc_soup(html: str) -> str:
         soup = BeautifulSoup(html, "html.parser")
         article = soup.find("article")
         if not article:
@@ -61,8 +84,8 @@ class ArticleFetcher:
 class NewsScraper:
     BBC_RSS = "https://feeds.bbci.co.uk/news/rss.xml"
 
-    def get_bbc_news(self, limit: int = 5):
-        feed = feedparser.parse(self.BBC_RSS)
+    def get_bbc_news(self, limit: int = 5, full_text: bool = FULL_TEXT):
+        feed = parse_feed(self.BBC_RSS)
         articles = []
 
         for entry in feed.entries[:limit]:
@@ -79,8 +102,25 @@ class NewsScraper:
                 )
             )
 
+        if full_text:
+            # All bodies are fetched at once over the shared pool, so this adds
+            # about one page fetch of latency; any article that can't be fetched
+            # in time keeps its RSS summary.
+            articles = fetch_until(articles, self._with_content, lambda art: art is not None, len(articles))
+
         return articles
 
+    @staticmethod
+    def _with_content(article: Article, cancel: threading.Event) -> Article:
+        try:
+            content = ArticleFetcher.parse_bbc(article.url, cancel=cancel, timeout=ARTICLE_TIMEOUT)
+        except Exception as e:
+            print(f"[ERROR] Failed to extract BBC article {article.url}: {e}")
+            content = ""
+        if not content:
+            return article
+        return Article(title=article.title, url=article.url, source=article.source, content=content)
+
 
 # =========================
 # Output Helper
@@ -109,11 +149,18 @@ def cli() -> None:
         help="Number of articles to fetch",
     )
 
+    parser.add_argument(
+        "--full-text",
+        action="store_true",
+        default=FULL_TEXT,
+        help="Fetch full article bodies instead of RSS summaries",
+    )
+
     args = parser.parse_args()
     scraper = NewsScraper()
 
     print("\n===== BBC NEWS =====")
-    print_articles(scraper.get_bbc_news(args.limit))
+    print_articles(scraper.get_bbc_news(args.limit, full_text=args.full_text))
 
 
 # =========================
@@ -1,11 +1,23 @@
 import argparse
+import os
+import sys
+import threading
 from dataclasses import dataclass
 from typing import List, Optional
 
-import feedparser
-import requests
 from bs4 import BeautifulSoup
 
+# Ensure root directory is in path so the agent also runs as a script
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if root_dir not in sys.path:
+    sys.path.append(root_dir)
+
+from Cache.content_cache import cached_content
+from Cache.feed_cache import parse_feed
+from Metrics.metrics import timed
+from News_Agents.html_extract import use_lxml, xpath_texts
+from News_Agents.http_client import HEADERS, fetch_text, fetch_until
+
 
 # =========================
 # Data Model
@@ -22,30 +34,34 @@ class Article:
 # Article Fetchers
 # =========================
 class ArticleFetcher:
-    HEADERS = {
-        "User-Agent": (
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-            "AppleWebKit/537.36 (KHTML, like Gecko) "
-            "Chrome/120.0 Safari/537.36"
-        )
-    }
+    HEADERS = HEADERS
+
+    @staticmethod
+    def fetch_html(url: str, cancel: Optional[threading.Event] = None) -> Optional[str]:
+        return fetch_text(url, cancel=cancel)
 
     @staticmethod
-    def fetch_html(url: str) -> Optional[str]:
-        try:
-            resp = requests.get(url, headers=ArticleFetcher.HEADERS, timeout=10)
-            resp.raise_for_status()
-            return resp.text
-        except Exception as e:
-            print(f"[ERROR] Failed to fetch article: {e}")
-            return None
+    def parse_cnn(url: str, cancel: Optional[threading.Event] = None) -> str:
+        # Recently extracted pages are served from the on-disk content cache
+        return cached_content(
+            url, lambda: ArticleFetcher.extract_cnn(ArticleFetcher.fetch_html(url, cancel=cancel))
+        )
 
     @staticmethod
-    def parse_cnn(url: str) -> str:
-        html = ArticleFetcher.fetch_html(url)
+    def extract_cnn(html: Optional[str]) -> str:
         if not html:
             return ""
 
+        with timed("body_parse"):
+            if use_lxml():
+                try:
+                    return "\n".join(xpath_texts(html, "//div[@data-component-name='paragraph']", "//p") or [])
+                except Exception as e:
+                    print(f"[WARN] lxml extraction failed, falling back to BeautifulSoup: {e}")
+            return ArticleFetcher.extract_cnn_soup(html)
+
+    @staticmethod
+    def extract_cnn_soup(html: str) -> str:
         soup = BeautifulSoup(html, "html.parser")
 
         paragraphs = soup.select("div[data-component-name='paragraph']")
@@ -62,8 +78,8 @@ class NewsScraper:
     CNN_RSS = "http://rss.cnn.com/rss/edition_world.rss"
 
     def get_cnn_news(self, limit: int = 3) -> List[Article]:
-        feed = feedparser.parse(self.CNN_RSS)
-        articles: List[Article] = []
+        feed = parse_feed(self.CNN_RSS)
+        candidates: List[Article] = []
 
         for entry in feed.entries:
             title = entry.get("title", "").strip()
@@ -77,21 +93,16 @@ class NewsScraper:
             if "/videos" in link:
                 continue
 
-            content = ArticleFetcher.parse_cnn(link)
+            candidates.append(Article(title=title, url=link, source="CNN"))
 
-            articles.append(
-                Article(
-                    title=title,
-                    url=link,
-                    source="CNN",
-                    content=content,
-                )
-            )
+        # Bodies are fetched in parallel over the shared connection pool;
+        # fetching stops once `limit` articles with content are in hand.
+        return fetch_until(candidates, self._with_content, lambda art: bool(art and art.content), limit)
 
-            if len(articles) >= limit:
-                break
-
-        return articles
+    @staticmethod
+    def _with_content(article: Article, cancel: threading.Event) -> Article:
+        content = ArticleFetcher.parse_cnn(article.url, cancel=cancel)
+        return Article(title=article.title, url=article.url, source=article.source, content=content)
 
 
 # =========================
@@ -0,0 +1,48 @@
+import os
+from typing import List, Optional
+
+try:
+    from lxml import html as lxml_html
+except ImportError:  # lxml is optional; the agents fall back to BeautifulSoup
+    lxml_html = None
+
+# "lxml" (default when installed) or "bs4" to force the BeautifulSoup parser
+HTML_PARSER = os.environ.get("NEWSLENS_HTML_PARSER", "lxml").lower()
+
+# Parsing bytes with an explicit encoding avoids lxml rejecting str input
+# that carries its own <?xml encoding=...?> declaration
+_parser = lxml_html.HTMLParser(encoding="utf-8", remove_comments=True) if lxml_html else None
+
+
+def use_lxml() -> bool:
+    return lxml_html is not None and HTML_PARSER == "lxml"
+
+
+def parse_html(html: str):
+    """Parses a page with lxml's C parser; raises ValueError if nothing could be parsed."""
+    root = lxml_html.document_fromstring(html.encode("utf-8", "replace"), parser=_parser)
+    if root is None:
+        raise ValueError("empty document")
+    return root
+
+
+def element_text(element) -> str:
+    """Same text as BeautifulSoup's get_text(strip=True): stripped strings, joined."""
+    return "".join(
+        piece.strip() for piece in element.xpath(".//text()[not(ancestor::script or ancestor::style)]")
+        if piece.strip()
+    )
+
+
+def xpath_texts(html: str, *xpaths: str) -> Optional[List[str]]:
+    """
+    Text of the elements matched by the first of `xpaths` that matches
+    anything, or None when none of them does.
+    """
+    root = parse_html(html)
+    for xpath in xpaths:
+        elements = root.xpath(xpath)
+        if elements:
+            return [element_text(el) for el in elements]
+    return None
+
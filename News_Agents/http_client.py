@@ -0,0 +1,182 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Dict, List, Optional, Sequence, TypeVar
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from Metrics.metrics import DOWNLOADED_BYTES, STAGE_ERRORS, STAGE_ITEMS, STAGE_SECONDS
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/120.0 Safari/537.36"
+    )
+}
+
+# Upper bound on concurrent article-body downloads per scraper run
+FETCH_WORKERS = int(os.environ.get("NEWSLENS_FETCH_WORKERS", "8"))
+REQUEST_TIMEOUT = float(os.environ.get("NEWSLENS_REQUEST_TIMEOUT", "10"))
+CHUNK_SIZE = 64 * 1024
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+# httpx clients are bound to the event loop that created them
+_async_clients: Dict[asyncio.AbstractEventLoop, httpx.AsyncClient] = {}
+
+
+def get_session() -> requests.Session:
+    """
+    Returns the process-wide keep-alive Session shared by all agents, so
+    repeated requests to the same host reuse one TCP+TLS connection.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                session.headers.update(HEADERS)
+                adapter = HTTPAdapter(pool_connections=10, pool_maxsize=max(FETCH_WORKERS, 10))
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _session = session
+    return _session
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """
+    Keep-alive httpx client for the running event loop, the async
+    counterpart of get_session().
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        for stale_loop in [l for l in _async_clients if l.is_closed()]:
+            del _async_clients[stale_loop]
+        client = httpx.AsyncClient(
+            headers=HEADERS,
+            follow_redirects=True,
+            timeout=REQUEST_TIMEOUT,
+            limits=httpx.Limits(max_connections=max(FETCH_WORKERS, 10) * 4, max_keepalive_connections=20),
+        )
+        _async_clients[loop] = client
+    return client
+
+
+def _record_body(start: float, size: Optional[int]) -> None:
+    """Body-fetch metrics for one download; `size` is None when it failed."""
+    STAGE_SECONDS.observe(time.perf_counter() - start, stage="body_fetch")
+    if size is None:
+        STAGE_ERRORS.inc(stage="body_fetch")
+        return
+    STAGE_ITEMS.inc(stage="body_fetch")
+    DOWNLOADED_BYTES.inc(size, stage="body_fetch")
+
+
+async def afetch_text(url: str, timeout: float = REQUEST_TIMEOUT) -> Optional[str]:
+    start = time.perf_counter()
+    try:
+        resp = await get_async_client().get(url, timeout=timeout)
+        resp.raise_for_status()
+    except Exception as e:
+        print(f"[ERROR] Failed to fetch article: {e}")
+        _record_body(start, None)
+        return None
+    _record_body(start, len(resp.content))
+    return resp.text
+
+
+def fetch_text(url: str, cancel: Optional[threading.Event] = None,
+               timeout: float = REQUEST_TIMEOUT) -> Optional[str]:
+    """
+    Downloads `url` over the shared session. The body is streamed in chunks so
+    the download can be abandoned as soon as `cancel` is set or `timeout`
+    seconds have passed in total, not just between two reads.
+    """
+    start = time.perf_counter()
+    deadline = time.monotonic() + timeout
+    try:
+        with get_session().get(url, timeout=timeout, stream=True) as resp:
+            resp.raise_for_status()
+            chunks = []
+            for chunk in resp.iter_content(CHUNK_SIZE):
+                if cancel is not None and cancel.is_set():
+                    return None
+                if time.monotonic() > deadline:
+                    print(f"[ERROR] Gave up on {url} after {timeout}s")
+                    _record_body(start, None)
+                    return None
+                chunks.append(chunk)
+            encoding = resp.encoding or "utf-8"
+            body = b"".join(chunks)
+    except Exception as e:
+        print(f"[ERROR] Failed to fetch article: {e}")
+        _record_body(start, None)
+        return None
+    _record_body(start, len(body))
+    return body.decode(encoding, errors="replace")
+
+
+def fetch_until(items: Sequence[T], fetch: Callable[[T, threading.Event], R],
+                is_good: Callable[[R], bool], limit: int,
+                max_workers: int = FETCH_WORKERS) -> List[R]:
+    """
+    Runs `fetch` over `items` with at most `max_workers` in flight and returns
+    the first `limit` good results in input order.
+
+    Items are submitted as a sliding window rather than all at once. As soon as
+    the first `limit` good results are known, queued work is cancelled and
+    in-flight fetches are told to stop via the shared event.
+    """
+    if limit <= 0 or not items:
+        return []
+
+    cancel = threading.Event()
+    results: Dict[int, R] = {}
+    pending = {}
+    next_index = 0
+
+    def selected() -> Optional[List[R]]:
+        # Good results in input order, as long as no earlier item is still unknown
+        good = []
+        for i in range(len(items)):
+            if i not in results:
+                return None
+            if is_good(results[i]):
+                good.append(results[i])
+                if len(good) >= limit:
+                    return good
+        return good
+
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fetch")
+    try:
+        while True:
+            while len(pending) < max_workers and next_index < len(items):
+                future = executor.submit(fetch, items[next_index], cancel)
+                pending[future] = next_index
+                next_index += 1
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = pending.pop(future)
+                try:
+                    results[index] = future.result()
+                except Exception as e:
+                    print(f"[ERROR] Fetch worker failed: {e}")
+                    results[index] = None
+
+            chosen = selected()
+            if chosen is not None:
+                return chosen
+    finally:
+        # Abandon whatever is still running instead of waiting for it
+        cancel.set()
+        executor.shutdown(wait=False, cancel_futures=True)
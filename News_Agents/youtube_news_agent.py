@@ -1,7 +1,53 @@
 import argparse
-import feedparser
-from youtube_transcript_api import YouTubeTranscriptApi
-from typing import List, Dict, Optional
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from youtube_transcript_api import (
+    CouldNotRetrieveTranscript,
+    InvalidVideoId,
+    NoTranscriptFound,
+    TranscriptsDisabled,
+    VideoUnavailable,
+    VideoUnplayable,
+    YouTubeTranscriptApi,
+)
+from typing import List, Dict, Optional, Tuple
+
+# Ensure root directory is in path so the agent also runs as a script
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if root_dir not in sys.path:
+    sys.path.append(root_dir)
+
+from Cache.feed_cache import parse_feed
+from Cache.transcript_cache import missing_transcript_cache, transcript_cache
+from Metrics.metrics import STAGE_ERRORS, STAGE_ITEMS, STAGE_SECONDS
+from News_Agents.http_client import fetch_until
+
+# Candidate videos checked at once per channel; kept small so we don't look
+# like a scraper to YouTube
+TRANSCRIPT_WORKERS = int(os.environ.get("NEWSLENS_TRANSCRIPT_WORKERS", "3"))
+
+# The video itself has no usable transcript; anything else (blocked IP,
+# network trouble) is transient and worth retrying on the next run
+NO_TRANSCRIPT_ERRORS = (TranscriptsDisabled, NoTranscriptFound, VideoUnavailable, VideoUnplayable, InvalidVideoId)
+
+
+@dataclass
+class TranscriptResult:
+    video_id: str
+    text: Optional[str] = None
+    error: Optional[str] = None
+    # True when the video has no transcript (negative-cached), False for transient errors
+    unavailable: bool = False
+    cached: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return bool(self.text)
+
 
 class YoutubeNewsAgent:
     CHANNELS = {
@@ -10,12 +56,19 @@ class YoutubeNewsAgent:
         "Al Jazeera English": "UCNye-wNBqNL5ZzHSJj3l8Bg"
     }
 
+    def __init__(self):
+        # One client (and its HTTP connection pool) for every transcript request
+        self.api = YouTubeTranscriptApi()
+
+    @staticmethod
+    def feed_url(channel_id: str) -> str:
+        return f"https://www.youtube.com/feeds/videos.xml?channel_id={channel_id}"
+
     def fetch_latest_video_id(self, channel_id: str) -> Optional[Dict[str, str]]:
         """
         Fetches the latest video ID and title from the channel's RSS feed.
         """
-        rss_url = f"https://www.youtube.com/feeds/videos.xml?channel_id={channel_id}"
-        feed = feedparser.parse(rss_url)
+        feed = parse_feed(self.feed_url(channel_id))
 
         if not feed.entries:
             return None
@@ -28,29 +81,52 @@ class YoutubeNewsAgent:
             "link": entry.link
         }
 
-    def get_transcript(self, video_id: str) -> str:
+    def get_transcript(self, video_id: str) -> TranscriptResult:
         """
-        Fetches the transcript for a given video ID.
+        Fetches the transcript for a given video ID. Transcripts are cached by
+        video ID, and videos known to have none are skipped until the
+        negative cache entry expires.
         """
+        text = transcript_cache.get(video_id)
+        if text is not None:
+            return TranscriptResult(video_id, text=text, cached=True)
+        reason = missing_transcript_cache.get(video_id)
+        if reason is not None:
+            return TranscriptResult(video_id, error=reason, unavailable=True, cached=True)
+
+        start = time.perf_counter()
         try:
-            # Create an instance
-            api = YouTubeTranscriptApi()
-            transcript = api.fetch(video_id)
-            
-            # The transcript object (FetchedTranscript) is iterable and yields snippets
-            full_text = " ".join([snippet.text for snippet in transcript])
-                
-            return full_text
+            transcript = self.api.fetch(video_id)
+        except NO_TRANSCRIPT_ERRORS as e:
+            reason = type(e).__name__
+            missing_transcript_cache.set(video_id, reason)
+            return TranscriptResult(video_id, error=reason, unavailable=True)
+        except CouldNotRetrieveTranscript as e:
+            STAGE_ERRORS.inc(stage="transcript_fetch")
+            # The library's messages are multi-paragraph help texts; the type says it all
+            return TranscriptResult(video_id, error=type(e).__name__)
         except Exception as e:
-            return f"[Error fetching transcript: {str(e)}]"
+            STAGE_ERRORS.inc(stage="transcript_fetch")
+            return TranscriptResult(video_id, error=f"{type(e).__name__}: {e}")
+        finally:
+            STAGE_SECONDS.observe(time.perf_counter() - start, stage="transcript_fetch")
+
+        # The transcript object (FetchedTranscript) is iterable and yields snippets
+        text = " ".join(snippet.text for snippet in transcript).strip()
+        if not text:
+            missing_transcript_cache.set(video_id, "EmptyTranscript")
+            return TranscriptResult(video_id, error="EmptyTranscript", unavailable=True)
+
+        STAGE_ITEMS.inc(stage="transcript_fetch")
+        transcript_cache.set(video_id, text)
+        return TranscriptResult(video_id, text=text)
 
     def run(self):
         print("Fetching latest news transcripts from Top 3 Channels...\n")
         
         for name, channel_id in self.CHANNELS.items():
             print(f"=== {name} ===")
-            rss_url = f"https://www.youtube.com/feeds/videos.xml?channel_id={channel_id}"
-            feed = feedparser.parse(rss_url)
+            feed = parse_feed(self.feed_url(channel_id))
             
             if not feed.entries:
                 print("No videos found.\n")
@@ -64,54 +140,65 @@ class YoutubeNewsAgent:
                 link = entry.link
                 
                 print(f"Checking video: {title} ({link})")
-                transcript = self.get_transcript(video_id)
+                result = self.get_transcript(video_id)
                 
-                if not transcript.startswith("[Error"):
+                if result.ok:
+                    transcript = result.text
                     print(f"SUCCESS. Found transcript for: {title}")
                     print("\n--- Transcript (First 2000 chars) ---")
                     print(transcript[:2000] + ("..." if len(transcript) > 2000 else ""))
                     found_transcript = True
                     break
                 else:
-                    print(f"Skipping (No transcript available): {transcript}")
+                    print(f"Skipping (No transcript available): {result.error}")
             
             if not found_transcript:
                 print("Could not find any transcripts for recent videos.")
 
             print("\n" + "="*80 + "\n")
 
+    def _entry_transcript(self, entry, cancel: threading.Event) -> Tuple[object, TranscriptResult]:
+        if cancel.is_set():
+            return entry, TranscriptResult(entry.yt_videoid, error="cancelled")
+        return entry, self.get_transcript(entry.yt_videoid)
+
+    def channel_transcripts(self, name: str, entries, limit_per_channel: int = 1) -> List[Dict[str, str]]:
+        """
+        Transcripts of the first `limit_per_channel` videos in `entries` (feed
+        order) that have one. Candidates are checked a few at a time, so a video
+        without captions doesn't delay the next one.
+        """
+        found = fetch_until(
+            entries,
+            self._entry_transcript,
+            lambda pair: pair is not None and pair[1].ok,
+            limit_per_channel,
+            max_workers=TRANSCRIPT_WORKERS,
+        )
+        return [
+            {
+                "source": f"YouTube - {name}",
+                "title": entry.title,
+                "url": entry.link,
+                "video_id": entry.yt_videoid,
+                "content": result.text
+            }
+            for entry, result in found
+        ]
+
     def get_transcripts(self, limit_per_channel: int = 1) -> List[Dict[str, str]]:
-        results = []
         print("Fetching latest news transcripts from Top 3 Channels...")
-        
-        for name, channel_id in self.CHANNELS.items():
-            rss_url = f"https://www.youtube.com/feeds/videos.xml?channel_id={channel_id}"
-            feed = feedparser.parse(rss_url)
-            
-            if not feed.entries:
-                continue
 
-            found_count = 0
-            for entry in feed.entries:
-                if found_count >= limit_per_channel:
-                    break
-                    
-                video_id = entry.yt_videoid
-                title = entry.title
-                link = entry.link
-                
-                transcript = self.get_transcript(video_id)
-                
-                if not transcript.startswith("[Error"):
-                    results.append({
-                        "source": f"YouTube - {name}",
-                        "title": title,
-                        "url": link,
-                        "content": transcript
-                    })
-                    found_count += 1
-        
-        return results
+        def channel(item):
+            name, channel_id = item
+            feed = parse_feed(self.feed_url(channel_id))
+            return self.channel_transcripts(name, feed.entries, limit_per_channel)
+
+        # Channels are independent, so they are all worked on at once
+        with ThreadPoolExecutor(max_workers=len(self.CHANNELS), thread_name_prefix="youtube") as executor:
+            per_channel = list(executor.map(channel, self.CHANNELS.items()))
+
+        return [item for items in per_channel for item in items]
 
 def main():
     agent = YoutubeNewsAgent()
@@ -0,0 +1,97 @@
+import asyncio
+import os
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, time as dtime, timedelta
+from typing import Awaitable, Callable, List, Optional
+
+# Fraction of an interval added or removed at random so polls don't line up
+JITTER = float(os.environ.get("NEWSLENS_POLL_JITTER", "0.1"))
+
+
+@dataclass
+class Schedule:
+    """Either every `interval` seconds or once a day at wall-clock time `at`."""
+    interval: Optional[float] = None
+    at: Optional[dtime] = None
+
+    @classmethod
+    def parse(cls, spec: str) -> "Schedule":
+        """"900" runs every 900 seconds, "07:30" runs daily at 07:30 local time."""
+        spec = spec.strip()
+        if ":" in spec:
+            hour, minute = spec.split(":")
+            return cls(at=dtime(int(hour), int(minute)))
+        return cls(interval=float(spec))
+
+    def next_delay(self, jitter: float = 0.0) -> float:
+        if self.at is not None:
+            now = datetime.now()
+            run = datetime.combine(now.date(), self.at)
+            if run <= now:
+                run += timedelta(days=1)
+            return (run - now).total_seconds()
+        return self.interval * (1 + random.uniform(-jitter, jitter))
+
+
+@dataclass
+class ScheduledJob:
+    name: str
+    fn: Callable[[], Awaitable[None]]
+    schedule: Schedule
+    jitter: float = 0.0
+    run_at_start: bool = True
+    runs: int = 0
+    skipped: int = 0
+    failures: int = 0
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+
+class Scheduler:
+    """
+    Runs async jobs on independent schedules inside one event loop, so the
+    HTTP clients and connection pools they use stay warm between runs.
+
+    A job that is still running when it comes due again is skipped for that
+    tick rather than started a second time.
+    """
+
+    def __init__(self):
+        self.jobs: List[ScheduledJob] = []
+
+    def add(self, name: str, fn: Callable[[], Awaitable[None]], schedule: Schedule,
+            jitter: float = JITTER, run_at_start: bool = True) -> ScheduledJob:
+        job = ScheduledJob(name, fn, schedule, jitter, run_at_start)
+        self.jobs.append(job)
+        return job
+
+    async def _run(self, job: ScheduledJob) -> None:
+        start = time.perf_counter()
+        try:
+            await job.fn()
+            job.runs += 1
+            print(f"[SCHEDULER] {job.name} finished in {time.perf_counter() - start:.2f}s")
+        except Exception as e:
+            job.failures += 1
+            print(f"[ERROR] Scheduled job {job.name} failed: {e}")
+
+    def _trigger(self, job: ScheduledJob) -> None:
+        if job.task is not None and not job.task.done():
+            job.skipped += 1
+            print(f"[SCHEDULER] {job.name} is still running, skipping this run")
+            return
+        job.task = asyncio.create_task(self._run(job))
+
+    async def _loop(self, job: ScheduledJob) -> None:
+        if not job.run_at_start:
+            await asyncio.sleep(job.schedule.next_delay(job.jitter))
+        while True:
+            self._trigger(job)
+            await asyncio.sleep(job.schedule.next_delay(job.jitter))
+
+    async def run_forever(self) -> None:
+        for job in self.jobs:
+            when = f"every {job.schedule.interval:g}s" if job.schedule.at is None else f"daily at {job.schedule.at:%H:%M}"
+            print(f"[SCHEDULER] {job.name}: {when}")
+        await asyncio.gather(*(self._loop(job) for job in self.jobs))
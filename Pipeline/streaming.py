@@ -0,0 +1,377 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Set, Tuple
+
+from Cache.seen_store import item_key, seen_store, with_fingerprints
+from Metrics.metrics import STAGE_ITEMS, Progress, no_progress, timed
+from Preprocessing.clustering import CLUSTER_WINDOW, CLUSTERING, cluster_articles, members
+from Preprocessing.compression import CONTENT_TOKEN_BUDGET, compress
+from Preprocessing.dedup import DEDUP_THRESHOLD, NearDuplicateIndex
+from Preprocessing.preprocessing import SOURCES, SOURCE_TIMEOUT, clean_item
+from Storage.news_store import NewsStore, news_store
+from Summarization.rate_limiter import AdaptiveConcurrency
+
+# Items buffered between two stages before the upstream stage has to wait
+QUEUE_SIZE = int(os.environ.get("NEWSLENS_QUEUE_SIZE", "16"))
+
+# Marks the end of a stage's output
+_DONE = object()
+
+# Queue entries carry (source position, item position) so the final file
+# keeps the same order as the batch pipeline
+Order = Tuple[int, int]
+Keyed = Tuple[Order, Dict[str, str]]
+
+
+class Superseded:
+    """
+    Orders of items replaced by a richer near-duplicate that arrived later.
+    Filled in by preprocessing, which sets `complete` once no more can come.
+    """
+
+    def __init__(self):
+        self.orders: Set[Order] = set()
+        self.complete = asyncio.Event()
+
+    def __contains__(self, order: Order) -> bool:
+        return order in self.orders
+
+    def add(self, order: Order) -> None:
+        self.orders.add(order)
+
+
+class Duplicates:
+    """
+    Items dropped as duplicates of a kept copy, by that copy's item_key. They
+    are marked seen once the kept copy is summarized, so incremental runs
+    don't summarize them on their own later.
+    """
+
+    def __init__(self):
+        self.waiting: Dict[str, List[Dict[str, str]]] = {}
+        self.done: Set[str] = set()
+
+    def drop(self, item: Dict[str, str], kept_key: str) -> None:
+        if kept_key in self.done:
+            seen_store.mark_seen([item])
+        else:
+            self.waiting.setdefault(kept_key, []).append(item)
+
+    def supersede(self, old: Dict[str, str], new: Dict[str, str]) -> None:
+        """`new` replaces the kept copy `old`, which becomes a duplicate of it."""
+        new_key = item_key(new)
+        for item in self.waiting.pop(item_key(old), []):
+            self.drop(item, new_key)
+        self.drop(old, new_key)
+
+    def summarized(self, items: List[Dict[str, str]]) -> None:
+        """Marks `items` and everything dropped in their favour as seen."""
+        items = list(items)
+        for key in {item_key(item) for item in items}:
+            self.done.add(key)
+            items += self.waiting.pop(key, [])
+        seen_store.mark_seen(items)
+
+
+async def fetch_stage(out: asyncio.Queue, timeout: Optional[float] = SOURCE_TIMEOUT,
+                      only_new: bool = False, progress: Progress = no_progress) -> None:
+    """
+    Runs every source on a thread and forwards each one's items as soon as it
+    finishes. With `only_new`, items already summarized in earlier runs are dropped.
+    """
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=len(SOURCES), thread_name_prefix="source")
+    counts = {"items": 0}
+    progress("fetch", dict(counts), False)
+
+    async def fetch(position: int, name: str, fn) -> None:
+        start = time.perf_counter()
+        try:
+            items = await asyncio.wait_for(loop.run_in_executor(executor, fn), timeout)
+        except asyncio.TimeoutError:
+            print(f"[ERROR] {name} fetch timed out after {timeout}s")
+            return
+        except Exception as e:
+            print(f"[ERROR] {name} fetch failed: {e}")
+            return
+        print(f"Fetched {len(items)} items from {name} in {time.perf_counter() - start:.2f}s")
+        items = with_fingerprints(items)
+        if only_new:
+            items = seen_store.filter_new(items)
+            print(f"{name}: {len(items)} new or changed since last run")
+        counts["items"] += len(items)
+        progress("fetch", dict(counts), False)
+        for index, item in enumerate(items):
+            await out.put(((position, index), item))
+
+    try:
+        await asyncio.gather(*(fetch(pos, name, fn) for pos, (name, fn) in enumerate(SOURCES)))
+        progress("fetch", dict(counts), True)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        await out.put(_DONE)
+
+
+async def preprocess_stage(inp: asyncio.Queue, out: asyncio.Queue,
+                           similarity_threshold: float = DEDUP_THRESHOLD,
+                           token_budget: int = CONTENT_TOKEN_BUDGET,
+                           superseded: Optional[Superseded] = None,
+                           duplicates: Optional[Duplicates] = None,
+                           progress: Progress = no_progress) -> None:
+    """
+    Streaming form of preprocess_data. Items can't wait for later duplicates,
+    so the first version of a story goes ahead; a clearly richer copy arriving
+    later is sent as well, and the order of the copy it replaces is added to
+    `superseded` for the later stages to drop. Every dropped copy is recorded
+    in `duplicates` against the copy kept in its place.
+    """
+    # Title -> the item currently kept for it
+    by_title: Dict[str, Dict[str, str]] = {}
+    index = NearDuplicateIndex(similarity_threshold)
+    orders: Dict[int, Order] = {}
+    superseded = superseded if superseded is not None else Superseded()
+    duplicates = duplicates if duplicates is not None else Duplicates()
+    tokens_before = tokens_after = 0
+    counts = {"items": 0, "dropped": 0}
+    progress("preprocess", dict(counts), False)
+
+    def prepare(order: Order, item: Dict[str, str]) -> Optional[Dict[str, str]]:
+        """The cleaned, compressed item, or None when it duplicates an earlier one."""
+        nonlocal tokens_before, tokens_after
+        item = clean_item(item)
+        if item["title"] in by_title:
+            duplicates.drop(item, item_key(by_title[item["title"]]))
+            return None
+
+        original, replaced = index.match(item)
+        if original is not None and not replaced:
+            print(f"Merged near-duplicate [{item['source']}] {item['title']} into [{original['source']}] {original['title']}")
+            by_title[item["title"]] = original
+            duplicates.drop(item, item_key(original))
+            return None
+        if replaced:
+            print(f"Replaced near-duplicate [{original['source']}] {original['title']} with richer [{item['source']}] {item['title']}")
+            superseded.add(orders.pop(id(original)))
+            duplicates.supersede(original, item)
+            for title, kept in by_title.items():
+                if kept is original:
+                    by_title[title] = item
+        by_title[item["title"]] = item
+        orders[id(item)] = order
+
+        content, before, after = compress(item["content"], item["title"], budget=token_budget)
+        tokens_before += before
+        tokens_after += after
+        return {**item, "content": content}
+
+    while (entry := await inp.get()) is not _DONE:
+        order, item = entry
+        with timed("preprocess"):
+            article = prepare(order, item)
+        counts["items" if article is not None else "dropped"] += 1
+        progress("preprocess", dict(counts), False)
+        if article is not None:
+            STAGE_ITEMS.inc(stage="preprocess")
+            await out.put((order, article))
+
+    if tokens_before:
+        print(f"Compressed content from {tokens_before} to {tokens_after} tokens (saved {tokens_before - tokens_after})")
+    progress("preprocess", dict(counts), True)
+    superseded.complete.set()
+    await out.put(_DONE)
+
+
+async def cluster_stage(inp: asyncio.Queue, out: asyncio.Queue,
+                        superseded: Optional[Superseded] = None,
+                        window: float = CLUSTER_WINDOW,
+                        progress: Progress = no_progress) -> None:
+    """
+    Groups related articles into multi-source stories. A story is only
+    complete once every source is in, so articles are held until the fetch
+    finishes or `window` seconds after the first of them arrived, whichever
+    comes first; articles arriving later are clustered in the next window.
+    A window of 0 waits for the whole fetch.
+    """
+    loop = asyncio.get_running_loop()
+    counts = {"stories": 0}
+    progress("cluster", dict(counts), False)
+
+    async def flush(entries: List[Keyed]) -> None:
+        if superseded is not None:
+            entries = [(order, article) for order, article in entries if order not in superseded]
+        if not entries:
+            return
+        # Feed order, not arrival order, so a story's lead doesn't depend on which source was faster
+        entries = sorted(entries, key=lambda entry: entry[0])
+        first_order = {id(article): order for order, article in entries}
+        stories = await asyncio.to_thread(cluster_articles, [article for _, article in entries])
+        counts["stories"] += len(stories)
+        progress("cluster", dict(counts), False)
+        for story in stories:
+            await out.put((min(first_order[id(item)] for item in members(story)), story))
+
+    entries: List[Keyed] = []
+    deadline: Optional[float] = None
+    # Kept across windows, so an item arriving as a window closes isn't lost
+    getter: Optional[asyncio.Task] = None
+    while True:
+        if getter is None:
+            getter = asyncio.ensure_future(inp.get())
+        timeout = None if deadline is None else max(0.0, deadline - loop.time())
+        done, _ = await asyncio.wait({getter}, timeout=timeout)
+        if not done:
+            await flush(entries)
+            entries, deadline = [], None
+            continue
+        entry, getter = getter.result(), None
+        if entry is _DONE:
+            break
+        if not entries and window > 0:
+            deadline = loop.time() + window
+        entries.append(entry)
+
+    await flush(entries)
+    progress("cluster", dict(counts), True)
+    await out.put(_DONE)
+
+
+async def summarize_stage(inp: asyncio.Queue, out: asyncio.Queue, summarizer,
+                          superseded: Optional[Superseded] = None,
+                          duplicates: Optional[Duplicates] = None,
+                          progress: Progress = no_progress) -> None:
+    """
+    Starts a summary for every article as it arrives; the summarizer's limits
+    bound concurrency. Articles `superseded` by a richer copy are skipped, or
+    their summary dropped if the richer copy turned up during the call.
+    Summarized articles are marked seen with the `duplicates` dropped for them.
+    """
+    slots = AdaptiveConcurrency(summarizer.concurrency)
+    superseded = superseded if superseded is not None else Superseded()
+    duplicates = duplicates if duplicates is not None else Duplicates()
+    tasks = set()
+    counts = {"articles": 0, "failed": 0}
+    progress("summarize", dict(counts), False)
+
+    async def summarize(order, article) -> None:
+        if order in superseded:
+            return
+        summary = await summarizer.asummarize_one(article, slots)
+        counts["articles" if summary is not None else "failed"] += 1
+        progress("summarize", dict(counts), False)
+        if summary is not None and order not in superseded:
+            duplicates.summarized(members(article))
+            # The article text travels along for the store's search index
+            await out.put((order, summarizer.result(article, summary), article.get("content")))
+
+    while (entry := await inp.get()) is not _DONE:
+        task = asyncio.create_task(summarize(*entry))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        # Backpressure: don't pull more articles than can be worked on at once
+        while len(tasks) >= max(summarizer.concurrency, 1) * 2:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+
+    if tasks:
+        await asyncio.gather(*tasks)
+    progress("summarize", dict(counts), True)
+    await out.put(_DONE)
+
+
+async def sink_stage(inp: asyncio.Queue, store: NewsStore = news_store, verbose: bool = True,
+                     merge_previous: bool = False,
+                     superseded: Optional[Superseded] = None) -> List[Dict[str, str]]:
+    """
+    Archives each summary in the store the moment it is ready, then makes the
+    complete, ordered set the current brief in one transaction, merged with
+    the previous brief when `merge_previous` is set. Summaries of copies that
+    were `superseded` by a richer one are never stored: until preprocessing
+    is complete, summaries wait before being archived.
+    """
+    if superseded is None:
+        superseded = Superseded()
+        superseded.complete.set()
+    results: List[Keyed] = []
+    # (result, content) held until no more supersessions can happen
+    pending: List[Tuple[Order, Dict[str, str], Optional[str]]] = []
+
+    async def archive_pending() -> None:
+        await superseded.complete.wait()
+        while pending:
+            order, result, content = pending.pop(0)
+            if order not in superseded:
+                await asyncio.to_thread(store.add, result, content)
+
+    archiver = asyncio.create_task(archive_pending())
+    while (entry := await inp.get()) is not _DONE:
+        order, result, content = entry
+        if order in superseded:
+            continue
+        if superseded.complete.is_set() and not pending:
+            await asyncio.to_thread(store.add, result, content)
+        else:
+            pending.append(entry)
+        results.append((order, result))
+        # Print immediately for feedback
+        if verbose:
+            print(f"\n[{len(results)}] {result['title']}")
+            print(f"Summary: {result['summary']}\n")
+            print("-" * 50)
+    await archiver
+
+    final_results = [result for order, result in sorted(results, key=lambda entry: entry[0])
+                     if order not in superseded]
+    if not final_results:
+        # Keep the previous brief rather than replacing it with an empty one
+        print("No articles were summarized.")
+        return final_results
+
+    # Every result was archived above; only the brief is written here
+    return await asyncio.to_thread(store.save_brief, final_results, merge_previous, archive=False)
+
+
+async def arun_pipeline(summarizer, store: NewsStore = news_store,
+                        queue_size: int = QUEUE_SIZE, verbose: bool = True,
+                        incremental: bool = False,
+                        clustering: bool = CLUSTERING,
+                        progress: Progress = no_progress) -> List[Dict[str, str]]:
+    """
+    fetch -> preprocess -> [cluster] -> summarize -> sink, connected by
+    bounded queues. With clustering (the default, see CLUSTERING), each story
+    is summarized once from the sources that arrived within its window (see
+    CLUSTER_WINDOW); summarization starts when the window closes, while
+    slower sources are still being fetched. Incremental runs only summarize new or changed
+    items and merge them into the existing brief. Every stage reports its item
+    counts to `progress` as it goes; they all start at once.
+    """
+    raw: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    articles: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    summaries: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+    # Items replaced by a richer near-duplicate, and items dropped as
+    # duplicates of a kept one; both filled in by preprocessing
+    superseded = Superseded()
+    duplicates = Duplicates()
+
+    stages = [
+        fetch_stage(raw, only_new=incremental, progress=progress),
+        preprocess_stage(raw, articles, superseded=superseded, duplicates=duplicates, progress=progress),
+    ]
+    if clustering:
+        stories: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        stages.append(cluster_stage(articles, stories, superseded, progress=progress))
+        articles = stories
+    stages += [
+        summarize_stage(articles, summaries, summarizer, superseded, duplicates, progress),
+        sink_stage(summaries, store, verbose=verbose, merge_previous=incremental, superseded=superseded),
+    ]
+    results = await asyncio.gather(*stages)
+    return results[-1]
+
+
+def run_pipeline(summarizer, store: NewsStore = news_store,
+                 queue_size: int = QUEUE_SIZE, verbose: bool = True,
+                 incremental: bool = False, clustering: bool = CLUSTERING,
+                 progress: Progress = no_progress) -> List[Dict[str, str]]:
+    return asyncio.run(arun_pipeline(summarizer, store, queue_size, verbose, incremental, clustering, progress))
@@ -0,0 +1,171 @@
+import math
+import os
+from collections import Counter, defaultdict
+from typing import Dict, List, Tuple
+
+from Metrics.metrics import STAGE_ITEMS, timed
+from Preprocessing.compression import STOPWORDS, compress
+from Preprocessing.dedup import words
+
+# Group related items into one story and summarize each story once
+CLUSTERING = os.environ.get("NEWSLENS_CLUSTERING", "true").lower() == "true"
+# Seconds the streaming pipeline holds articles for clustering before the
+# fetch has finished; sources arriving later are clustered in the next window.
+# 0 waits for every source, at the cost of summarization overlapping fetching
+CLUSTER_WINDOW = float(os.environ.get("NEWSLENS_CLUSTER_WINDOW", "10"))
+# TF-IDF cosine similarity above which two items count as the same story
+CLUSTER_THRESHOLD = float(os.environ.get("NEWSLENS_CLUSTER_THRESHOLD", "0.25"))
+# Largest story sent to the LLM in one prompt
+CLUSTER_MAX_SIZE = int(os.environ.get("NEWSLENS_CLUSTER_MAX_SIZE", "5"))
+# Content tokens per multi-source prompt, shared between its items
+CLUSTER_TOKEN_BUDGET = int(os.environ.get("NEWSLENS_CLUSTER_TOKEN_BUDGET", "1500"))
+
+# Title words say more about the story than body words
+TITLE_WEIGHT = 3
+# Terms kept per item; the tail adds comparisons, not signal
+MAX_TERMS = 40
+# Floor on each item's share of a multi-source prompt
+MIN_MEMBER_TOKENS = 150
+
+Vector = Dict[str, float]
+
+
+def _terms(item: Dict[str, str]) -> Counter:
+    counts = Counter()
+    for word in words(item.get("title", "")):
+        if word not in STOPWORDS and len(word) > 1:
+            counts[word] += TITLE_WEIGHT
+    for word in words(item.get("content", "")):
+        if word not in STOPWORDS and len(word) > 1:
+            counts[word] += 1
+    return counts
+
+
+def tfidf_vectors(items: List[Dict[str, str]], max_terms: int = MAX_TERMS) -> List[Vector]:
+    """
+    Sparse, L2-normalized TF-IDF vectors (sublinear tf, smoothed idf) keeping
+    each item's `max_terms` heaviest terms, so a dot product is a cosine.
+    """
+    counts = [_terms(item) for item in items]
+    doc_freq = Counter(term for terms in counts for term in terms)
+    n = len(items)
+
+    vectors = []
+    for terms in counts:
+        weights = {
+            term: (1 + math.log(tf)) * (math.log((1 + n) / (1 + doc_freq[term])) + 1)
+            for term, tf in terms.items()
+        }
+        top = sorted(weights.items(), key=lambda kv: (-kv[1], kv[0]))[:max_terms]
+        norm = math.sqrt(sum(w * w for _, w in top)) or 1.0
+        vectors.append({term: w / norm for term, w in top})
+    return vectors
+
+
+def similar_pairs(vectors: List[Vector], threshold: float) -> List[Tuple[float, int, int]]:
+    """
+    (similarity, i, j) for every pair at or above `threshold`, most similar
+    first. An inverted index accumulates dot products only between items that
+    share a term, instead of comparing all pairs.
+    """
+    postings: Dict[str, List[Tuple[int, float]]] = defaultdict(list)
+    pairs = []
+    for j, vector in enumerate(vectors):
+        scores: Dict[int, float] = defaultdict(float)
+        for term, weight in vector.items():
+            for i, other in postings[term]:
+                scores[i] += weight * other
+        pairs.extend((score, i, j) for i, score in scores.items() if score >= threshold)
+        for term, weight in vector.items():
+            postings[term].append((j, weight))
+    pairs.sort(key=lambda pair: (-pair[0], pair[1], pair[2]))
+    return pairs
+
+
+def cluster_items(items: List[Dict[str, str]], threshold: float = CLUSTER_THRESHOLD,
+                  max_size: int = CLUSTER_MAX_SIZE) -> List[List[Dict[str, str]]]:
+    """
+    Groups items that cover the same story. Pairs are linked most similar
+    first and a link that would grow a story past `max_size` is skipped, so
+    loosely related items can't chain into one giant cluster. Stories are
+    returned in order of their first item, and items keep their order within
+    a story.
+    """
+    if len(items) < 2:
+        return [[item] for item in items]
+
+    parent = list(range(len(items)))
+    size = [1] * len(items)
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for _, i, j in similar_pairs(tfidf_vectors(items), threshold):
+        root_i, root_j = find(i), find(j)
+        if root_i == root_j or size[root_i] + size[root_j] > max_size:
+            continue
+        parent[root_j] = root_i
+        size[root_i] += size[root_j]
+
+    groups: Dict[int, List[int]] = defaultdict(list)
+    for idx in range(len(items)):
+        groups[find(idx)].append(idx)
+    return [[items[idx] for idx in group] for group in sorted(groups.values(), key=lambda g: g[0])]
+
+
+def story_article(cluster: List[Dict[str, str]], token_budget: int = CLUSTER_TOKEN_BUDGET) -> Dict[str, str]:
+    """
+    The article summarized for a story. A single item is returned unchanged;
+    several become one multi-source article led by the first item, whose
+    source, title and URL it keeps (so source filters on the archive still
+    work) and whose content holds each source's report trimmed to a share of
+    `token_budget`, with the originals under "members" and their
+    source/title/url under "coverage".
+    """
+    if len(cluster) == 1:
+        return cluster[0]
+
+    lead = cluster[0]
+    share = max(token_budget // len(cluster), MIN_MEMBER_TOKENS)
+    reports = []
+    for item in cluster:
+        content, _, _ = compress(item.get("content", ""), item.get("title", ""), budget=share)
+        reports.append(f"Source: {item['source']}\nTitle: {item['title']}\n{content}")
+
+    article = {
+        "source": lead["source"],
+        "title": lead["title"],
+        "content": "\n\n".join(reports),
+        "coverage": [
+            {field: item[field] for field in ("source", "title", "url") if item.get(field)}
+            for item in cluster
+        ],
+        "members": cluster,
+    }
+    if lead.get("url"):
+        article["url"] = lead["url"]
+    return article
+
+
+def members(article: Dict[str, str]) -> List[Dict[str, str]]:
+    """The original items behind an article from story_article()."""
+    return article.get("members", [article])
+
+
+def cluster_articles(articles: List[Dict[str, str]], threshold: float = CLUSTER_THRESHOLD,
+                     max_size: int = CLUSTER_MAX_SIZE) -> List[Dict[str, str]]:
+    """Replaces every group of related articles with one multi-source article."""
+    with timed("cluster"):
+        clusters = cluster_items(articles, threshold=threshold, max_size=max_size)
+        stories = [story_article(cluster) for cluster in clusters]
+    STAGE_ITEMS.inc(len(stories), stage="cluster")
+    for cluster in clusters:
+        if len(cluster) > 1:
+            print("Grouped into one story: " + "; ".join(f"[{a['source']}] {a['title']}" for a in cluster))
+    if len(stories) < len(articles):
+        print(f"Clustered {len(articles)} articles into {len(stories)} stories "
+              f"({len(articles) - len(stories)} fewer LLM calls)")
+    return stories
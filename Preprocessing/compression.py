@@ -0,0 +1,142 @@
+import math
+import os
+import re
+import threading
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from Preprocessing.dedup import jaccard
+
+# Content tokens sent to the LLM per article
+CONTENT_TOKEN_BUDGET = int(os.environ.get("NEWSLENS_CONTENT_TOKEN_BUDGET", "700"))
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+_WORD_RE = re.compile(r"[a-z0-9']+")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])[\"')\]]*\s+(?=[\"'(\[]?[A-Z0-9])")
+# Term overlap above which a sentence counts as repeating one already kept
+REDUNDANCY_THRESHOLD = 0.6
+# Auto-generated transcripts have no punctuation; cut them into word windows
+_MAX_SENTENCE_WORDS = 40
+
+BOILERPLATE = re.compile(
+    r"subscribe|sign up|newsletter|thanks for watching|click here|read more|"
+    r"all rights reserved|copyright|follow us|download the app|advertisement",
+    re.IGNORECASE,
+)
+
+# The tokenizer is loaded on first use: get_encoding() may download its BPE
+# file, which must not block (or break) every import of this module
+_encoding = None
+_encoding_loaded = False
+_encoding_lock = threading.Lock()
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "been", "but", "by", "for", "from",
+    "had", "has", "have", "he", "her", "his", "i", "in", "is", "it", "its", "of",
+    "on", "or", "said", "she", "that", "the", "their", "they", "this", "to", "was",
+    "we", "were", "which", "who", "will", "with", "you",
+}
+
+
+def get_encoding():
+    """tiktoken's cl100k_base encoding, or None when it can't be loaded."""
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        with _encoding_lock:
+            if not _encoding_loaded:
+                try:
+                    import tiktoken
+                    _encoding = tiktoken.get_encoding("cl100k_base")
+                except Exception as e:
+                    print(f"[WARN] tiktoken unavailable ({e}), approximating token counts")
+                _encoding_loaded = True
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    """
+    Token count under tiktoken's cl100k_base, or a word-piece approximation
+    (one token per short word or symbol, plus one per extra four characters
+    in long words) when the encoding can't be loaded.
+    """
+    encoding = get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return sum(1 + max(0, len(piece) - 6) // 4 for piece in _TOKEN_RE.findall(text))
+
+
+def split_sentences(text: str) -> List[str]:
+    sentences = []
+    for paragraph in text.splitlines():
+        for sentence in _SENTENCE_RE.split(paragraph.strip()):
+            words = sentence.split()
+            for i in range(0, len(words), _MAX_SENTENCE_WORDS):
+                sentences.append(" ".join(words[i:i + _MAX_SENTENCE_WORDS]))
+    return sentences
+
+
+def _terms(sentence: str) -> List[str]:
+    return [w for w in _WORD_RE.findall(sentence.lower()) if w not in STOPWORDS]
+
+
+def score_sentences(sentences: List[str], title: str = "") -> List[float]:
+    """
+    TF-IDF salience of each sentence within its article, treating sentences
+    as documents, boosted for early position and overlap with the title and
+    penalized for boilerplate.
+    """
+    sentence_terms = [_terms(s) for s in sentences]
+    doc_freq = Counter(term for terms in sentence_terms for term in set(terms))
+    term_freq = Counter(term for terms in sentence_terms for term in terms)
+    title_terms = set(_terms(title))
+    n = len(sentences)
+
+    scores = []
+    for position, terms in enumerate(sentence_terms):
+        if not terms:
+            scores.append(0.0)
+            continue
+        weight = sum(
+            math.log(1 + term_freq[t]) * math.log(1 + n / doc_freq[t]) for t in set(terms)
+        ) / math.sqrt(len(terms))
+        weight *= 1 + 1 / (1 + position)  # news puts the key facts first
+        weight *= 1 + len(title_terms.intersection(terms)) / (1 + len(title_terms))
+        if BOILERPLATE.search(sentences[position]):
+            weight *= 0.1
+        scores.append(weight)
+    return scores
+
+
+def compress(content: str, title: str = "", budget: int = CONTENT_TOKEN_BUDGET) -> Tuple[str, int, int]:
+    """
+    Packs the highest-scoring sentences of `content` into `budget` tokens and
+    returns them in their original order as (text, tokens_before, tokens_after).
+    Content already within budget is returned unchanged.
+    """
+    before = count_tokens(content)
+    if before <= budget:
+        return content, before, before
+
+    sentences = split_sentences(content)
+    costs = [count_tokens(s) + 1 for s in sentences]
+    scores = score_sentences(sentences, title)
+
+    term_sets = [set(_terms(s)) for s in sentences]
+    chosen, used = set(), 0
+    for idx in sorted(range(len(sentences)), key=lambda i: scores[i], reverse=True):
+        if used + costs[idx] > budget or scores[idx] <= 0:
+            continue
+        # Skip sentences that mostly repeat something already packed
+        if any(jaccard(term_sets[idx], term_sets[c]) > REDUNDANCY_THRESHOLD for c in chosen):
+            continue
+        chosen.add(idx)
+        used += costs[idx]
+
+    text = " ".join(sentences[i] for i in sorted(chosen))
+    return text, before, count_tokens(text)
+
+
+def compression_report(stats: List[Tuple[int, int]]) -> Dict[str, int]:
+    before = sum(b for b, _ in stats)
+    after = sum(a for _, a in stats)
+    return {"tokens_before": before, "tokens_after": after, "tokens_saved": before - after}
@@ -0,0 +1,222 @@
+import hashlib
+import os
+import re
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+# Jaccard similarity above which two items count as the same story
+DEDUP_THRESHOLD = float(os.environ.get("NEWSLENS_DEDUP_THRESHOLD", "0.5"))
+NUM_PERM = 128
+# A later copy of a story replaces the one kept so far only when its content
+# is this much longer; smaller differences aren't worth summarizing it again
+RICHER_RATIO = 1.5
+
+_EMPTY = 1 << 64
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have",
+    "in", "is", "it", "its", "of", "on", "or", "says", "that", "the", "to", "was",
+    "were", "will", "with",
+}
+
+
+def words(text: str) -> List[str]:
+    return _WORD_RE.findall(text.lower())
+
+
+def title_shingles(title: str) -> Set[str]:
+    # Titles are short, so single content words carry the signal
+    return {w for w in words(title) if w not in STOPWORDS}
+
+
+def content_shingles(content: str, size: int = 3, max_words: int = 400) -> Set[str]:
+    # The lead of a story identifies it; hashing whole transcripts adds cost, not signal
+    tokens = words(content)[:max_words]
+    if len(tokens) < size:
+        return set(tokens)
+    return {" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+
+def _hash64(shingle: str) -> int:
+    # Stable across processes, unlike hash()
+    return int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def minhash(shingles: Set[str]) -> Tuple[int, ...]:
+    """
+    One-permutation MinHash signature: each shingle is hashed once, the hash
+    picks one of NUM_PERM bins and every bin keeps its minimum. Empty bins
+    borrow from the next non-empty bin so short sets still compare sensibly.
+    Cost is O(len(shingles)) instead of O(len(shingles) * NUM_PERM).
+    """
+    sig = [_EMPTY] * NUM_PERM
+    for shingle in shingles:
+        h = _hash64(shingle)
+        bin_index, value = h % NUM_PERM, h // NUM_PERM
+        if value < sig[bin_index]:
+            sig[bin_index] = value
+
+    if shingles:
+        for i in range(NUM_PERM):
+            offset = 1
+            while sig[i] == _EMPTY:
+                borrowed = sig[(i + offset) % NUM_PERM]
+                if borrowed != _EMPTY and borrowed < _EMPTY:
+                    sig[i] = borrowed + offset * _EMPTY
+                offset += 1
+    return tuple(sig)
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def lsh_params(threshold: float, num_perm: int = NUM_PERM) -> Tuple[int, int]:
+    """
+    Picks (bands, rows) with bands * rows == num_perm whose S-curve midpoint
+    (1/bands) ** (1/rows) is closest to, but not above, the threshold, so
+    near-threshold pairs are still proposed as candidates.
+    """
+    best = (num_perm, 1)
+    best_gap = float("inf")
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        midpoint = (1 / bands) ** (1 / rows)
+        if midpoint <= threshold and threshold - midpoint < best_gap:
+            best, best_gap = (bands, rows), threshold - midpoint
+    return best
+
+
+def candidate_pairs(signatures: List[Tuple[int, ...]], bands: int, rows: int) -> Set[Tuple[int, int]]:
+    """LSH banding: only items that share at least one band bucket are compared."""
+    pairs = set()
+    for band in range(bands):
+        buckets = defaultdict(list)
+        start = band * rows
+        for idx, sig in enumerate(signatures):
+            if sig[0] == _EMPTY:
+                continue  # empty shingle set
+            buckets[sig[start:start + rows]].append(idx)
+        for members in buckets.values():
+            for i in range(len(members)):
+                for j in range(i + 1, len(members)):
+                    pairs.add((members[i], members[j]))
+    return pairs
+
+
+def find_near_duplicates(items: List[Dict[str, str]],
+                         threshold: float = DEDUP_THRESHOLD) -> Tuple[List[Dict[str, str]], List[Dict]]:
+    """
+    Collapses items that tell the same story, judged by the Jaccard similarity
+    of either their title words or their content shingles. MinHash LSH limits
+    the comparisons to likely pairs, so cost grows roughly linearly with the
+    number of items. Each group keeps its richest member
+    (longest content) at the position where the group first appears.
+
+    Returns (kept_items, merges), where every merge records the kept item and
+    the items folded into it.
+    """
+    if len(items) < 2:
+        return list(items), []
+
+    titles = [title_shingles(item.get("title", "")) for item in items]
+    contents = [content_shingles(item.get("content", "")) for item in items]
+    bands, rows = lsh_params(threshold)
+
+    parent = list(range(len(items)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for shingle_sets in (titles, contents):
+        signatures = [minhash(shingles) for shingles in shingle_sets]
+        # LSH proposes candidates; the exact Jaccard on the sets confirms them
+        for i, j in candidate_pairs(signatures, bands, rows):
+            if jaccard(shingle_sets[i], shingle_sets[j]) >= threshold:
+                parent[find(j)] = find(i)
+
+    groups: Dict[int, List[int]] = defaultdict(list)
+    for idx in range(len(items)):
+        groups[find(idx)].append(idx)
+
+    kept, merges = [], []
+    for members in sorted(groups.values(), key=lambda m: m[0]):
+        best = max(members, key=lambda idx: (len(items[idx].get("content", "")), -idx))
+        kept.append(items[best])
+        if len(members) > 1:
+            merges.append({
+                "kept": {"source": items[best]["source"], "title": items[best]["title"]},
+                "merged": [
+                    {"source": items[idx]["source"], "title": items[idx]["title"]}
+                    for idx in members if idx != best
+                ],
+            })
+    return kept, merges
+
+
+class NearDuplicateIndex:
+    """
+    Incremental form of find_near_duplicates for streaming use: items are
+    checked against everything added so far. A later copy that is clearly
+    richer (see RICHER_RATIO) takes the earlier one's place, so a short feed
+    blurb that arrived first doesn't stand in for a full article or transcript.
+    """
+
+    def __init__(self, threshold: float = DEDUP_THRESHOLD, richer_ratio: float = RICHER_RATIO):
+        self.threshold = threshold
+        self.richer_ratio = richer_ratio
+        self.bands, self.rows = lsh_params(threshold)
+        self.items: List[Dict[str, str]] = []
+        self._shingles: List[Tuple[Set[str], Set[str]]] = []
+        self._buckets = [defaultdict(list), defaultdict(list)]
+
+    def _band_keys(self, signature: Tuple[int, ...]):
+        if signature[0] == _EMPTY:
+            return []
+        return [
+            (band, signature[band * self.rows:(band + 1) * self.rows])
+            for band in range(self.bands)
+        ]
+
+    def _richer(self, item: Dict[str, str], other: Dict[str, str]) -> bool:
+        return len(item.get("content", "")) > len(other.get("content", "")) * self.richer_ratio
+
+    def match(self, item: Dict[str, str]) -> Tuple[Optional[Dict[str, str]], bool]:
+        """
+        Indexes `item` and returns (original, replaced): the earlier item it
+        duplicates, or None, and whether `item` replaced that item as the
+        story's kept copy because it is richer.
+        """
+        shingle_sets = (title_shingles(item.get("title", "")), content_shingles(item.get("content", "")))
+        band_keys = [self._band_keys(minhash(shingles)) for shingles in shingle_sets]
+
+        for kind, keys in enumerate(band_keys):
+            candidates = {idx for key in keys for idx in self._buckets[kind].get(key, ())}
+            for idx in sorted(candidates):
+                if jaccard(shingle_sets[kind], self._shingles[idx][kind]) >= self.threshold:
+                    original = self.items[idx]
+                    if not self._richer(item, original):
+                        return original, False
+                    self.items[idx] = item
+                    self._shingles[idx] = shingle_sets
+                    self._index(idx, band_keys)
+                    return original, True
+
+        idx = len(self.items)
+        self.items.append(item)
+        self._shingles.append(shingle_sets)
+        self._index(idx, band_keys)
+        return None, False
+
+    def _index(self, idx: int, band_keys) -> None:
+        for kind, keys in enumerate(band_keys):
+            for key in keys:
+                self._buckets[kind][key].append(idx)
@@ -1,5 +1,8 @@
+import asyncio
 import json
-from typing import List, Dict
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, List, Dict, Optional, Tuple
 import sys
 import os
 
@@ -9,72 +12,247 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from News_Agents.bbc_news_agent import NewsScraper as BBCScraper
 from News_Agents.cnn_news_agent import NewsScraper as CNNScraper
 from News_Agents.youtube_news_agent import YoutubeNewsAgent
+from News_Agents.async_agents import BBC_LIMIT, CNN_LIMIT, YOUTUBE_PER_CHANNEL, afetch_sources
+from Cache.content_cache import content_cache
+from Cache.transcript_cache import missing_transcript_cache, transcript_cache
+from Cache.feed_cache import feed_cache
+from Cache.seen_store import item_key, seen_store, with_fingerprints
+from Metrics.metrics import STAGE_ITEMS, Progress, no_progress, timed
+from Preprocessing.compression import CONTENT_TOKEN_BUDGET, compress, compression_report
+from Preprocessing.dedup import DEDUP_THRESHOLD, find_near_duplicates
+
+# Seconds each source may take before its results are dropped from the run
+SOURCE_TIMEOUT = float(os.environ.get("NEWSLENS_SOURCE_TIMEOUT", "60"))
+
+# An item dropped as a duplicate and the item_key of the copy kept in its place
+Dropped = Tuple[Dict[str, str], str]
 
-def fetch_and_process_data():
-    unified_data = []
 
-    print("Fetching BBC News...")
+def fetch_bbc() -> List[Dict[str, str]]:
     bbc_scraper = BBCScraper()
-    bbc_articles = bbc_scraper.get_bbc_news(limit=3)
-    for art in bbc_articles:
-        unified_data.append({
-            "source": f"BBC",
+    return [
+        {
+            "source": "BBC",
             "title": art.title,
             "url": art.url,
             "content": art.content
-        })
+        }
+        for art in bbc_scraper.get_bbc_news(limit=BBC_LIMIT)
+    ]
+
 
-    print("Fetching CNN News...")
+def fetch_cnn() -> List[Dict[str, str]]:
     cnn_scraper = CNNScraper()
-    cnn_articles = cnn_scraper.get_cnn_news(limit=3)
-    for art in cnn_articles:
-        unified_data.append({
-            "source": f"CNN",
+    return [
+        {
+            "source": "CNN",
             "title": art.title,
             "url": art.url,
             "content": art.content
-        })
+        }
+        for art in cnn_scraper.get_cnn_news(limit=CNN_LIMIT)
+    ]
+
 
-    print("Fetching YouTube Transcripts...")
+def fetch_youtube() -> List[Dict[str, str]]:
     yt_agent = YoutubeNewsAgent()
-    yt_items = yt_agent.get_transcripts(limit_per_channel=1)
-    unified_data.extend(yt_items) # they are already in dict format from my helper
+    # they are already in dict format from my helper
+    return yt_agent.get_transcripts(limit_per_channel=YOUTUBE_PER_CHANNEL)
+
+
+# Order here is the order items appear in the unified list
+SOURCES: List[Tuple[str, Callable[[], List[Dict[str, str]]]]] = [
+    ("BBC", fetch_bbc),
+    ("CNN", fetch_cnn),
+    ("YouTube", fetch_youtube),
+]
+
+
+def fetch_sources(concurrent: bool = True, timeout: Optional[float] = SOURCE_TIMEOUT):
+    """
+    Runs every source in SOURCES and returns (items, timings).
+    In concurrent mode all sources run in parallel on a thread pool; a source
+    that raises or exceeds `timeout` contributes no items but never blocks the
+    others. Items are always returned in SOURCES order.
+    """
+    results: Dict[str, List[Dict[str, str]]] = {}
+    timings: Dict[str, Dict] = {}
+
+    def run_source(name, fn):
+        start = time.perf_counter()
+        try:
+            items = fn()
+            info = {"status": "ok", "items": len(items)}
+        except Exception as e:
+            print(f"[ERROR] {name} fetch failed: {e}")
+            items, info = [], {"status": "error", "items": 0, "error": str(e)}
+        info["seconds"] = round(time.perf_counter() - start, 3)
+        return items, info
+
+    if concurrent:
+        print(f"Fetching {', '.join(name for name, _ in SOURCES)} concurrently...")
+        executor = ThreadPoolExecutor(max_workers=len(SOURCES), thread_name_prefix="source")
+        futures = {executor.submit(run_source, name, fn): name for name, fn in SOURCES}
+        done, _ = wait(futures, timeout=timeout)
+        for future, name in futures.items():
+            if future in done:
+                results[name], timings[name] = future.result()
+            else:
+                print(f"[ERROR] {name} fetch timed out after {timeout}s")
+                results[name] = []
+                timings[name] = {"status": "timeout", "items": 0, "seconds": timeout}
+        # Don't wait on stragglers; their late results are simply discarded
+        executor.shutdown(wait=False, cancel_futures=True)
+    else:
+        for name, fn in SOURCES:
+            print(f"Fetching {name}...")
+            results[name], timings[name] = run_source(name, fn)
+
+    unified_data = []
+    for name, _ in SOURCES:
+        unified_data.extend(results[name])
+
+    return unified_data, {name: timings[name] for name, _ in SOURCES}
+
+
+def print_timing_report(timings: Dict[str, Dict], wall_seconds: float) -> None:
+    print("\nSource timings:")
+    for name, info in timings.items():
+        print(f"  {name:<10} {info['seconds']:>8.2f}s  {info['items']:>3} items  [{info['status']}]")
+    serial = sum(info["seconds"] for info in timings.values())
+    print(f"  {'total':<10} {wall_seconds:>8.2f}s  (sum of sources {serial:.2f}s)")
+    print(f"  feeds: {feed_cache.hits} not modified, {feed_cache.misses} downloaded")
+    stats = content_cache.stats()
+    print(f"  article cache: {stats['hits']} hits, {stats['misses']} misses (hit rate {stats['hit_rate']:.0%})")
+    stats = transcript_cache.stats()
+    print(f"  transcript cache: {stats['hits']} hits, {stats['misses']} misses, "
+          f"{missing_transcript_cache.hits} known without transcript")
+
+
+def fetch_and_process_data(concurrent: bool = True, timeout: Optional[float] = SOURCE_TIMEOUT,
+                           only_new: bool = False, dropped: Optional[List[Dropped]] = None,
+                           progress: Progress = no_progress):
+    """
+    Fetches and preprocesses all sources. With `only_new`, items already
+    summarized in an earlier run (same URL/video and unchanged content) are
+    dropped; call seen_store.mark_seen() once the rest have been summarized,
+    including the duplicates reported in `dropped` (see preprocess_data).
+    """
+    progress("fetch", {"items": 0}, False)
+    start = time.perf_counter()
+    unified_data, timings = fetch_sources(concurrent=concurrent, timeout=timeout)
+    print_timing_report(timings, time.perf_counter() - start)
 
     print(f"\nTotal items fetched: {len(unified_data)}")
+    unified_data = with_fingerprints(unified_data)
+
+    if only_new:
+        fetched_count = len(unified_data)
+        unified_data = seen_store.filter_new(unified_data)
+        print(f"New or changed since last run: {len(unified_data)} (skipped {fetched_count - len(unified_data)})")
+    progress("fetch", {"items": len(unified_data)}, True)
     
     # Processing
-    processed_data = preprocess_data(unified_data)
+    progress("preprocess", {"items": 0}, False)
+    processed_data = preprocess_data(unified_data, dropped=dropped)
+    progress("preprocess", {"items": len(processed_data)}, True)
     
     return processed_data
 
-def preprocess_data(data: List[Dict[str, str]]) -> List[Dict[str, str]]:
-    seen_titles = set()
-    cleaned_data = []
+async def afetch_and_process_data(timeout: Optional[float] = SOURCE_TIMEOUT):
+    """Async fetch_and_process_data for callers that run on an event loop."""
+    start = time.perf_counter()
+    unified_data = with_fingerprints(await afetch_sources(timeout=timeout))
+    print(f"Fetched {len(unified_data)} items asynchronously in {time.perf_counter() - start:.2f}s")
+    # Dedup and compression are CPU-bound; keep them off the event loop
+    return await asyncio.to_thread(preprocess_data, unified_data)
+
+
+def clean_item(item: Dict[str, str]) -> Dict[str, str]:
+    # 1. Strip extra whitespace
+    title = item.get("title", "").strip()
+    content = item.get("content", "")
+    if content:
+         content = content.strip()
+    else:
+        content = ""
+
+    cleaned_item = {
+        "source": item["source"],
+        "title": title,
+        "content": content
+    }
+    # Identity fields used by the seen-article store, when present
+    for field in ("url", "video_id", "fingerprint"):
+        if item.get(field):
+            cleaned_item[field] = item[field]
+    return cleaned_item
+
+
+def preprocess_data(data: List[Dict[str, str]],
+                    similarity_threshold: float = DEDUP_THRESHOLD,
+                    token_budget: int = CONTENT_TOKEN_BUDGET,
+                    dropped: Optional[List[Dropped]] = None) -> List[Dict[str, str]]:
+    """
+    Cleans, deduplicates and compresses `data`. When `dropped` is given, every
+    item removed as a duplicate is appended to it with the item_key of the
+    copy kept in its place, so it can be marked seen along with that copy.
+    """
+    with timed("preprocess"):
+        cleaned_data = _preprocess(data, similarity_threshold, token_budget, dropped)
+    STAGE_ITEMS.inc(len(cleaned_data), stage="preprocess")
+    return cleaned_data
+
+
+def _preprocess(data: List[Dict[str, str]], similarity_threshold: float,
+                token_budget: int, dropped: Optional[List[Dropped]] = None) -> List[Dict[str, str]]:
+    by_title: Dict[str, Dict[str, str]] = {}
+    title_duplicates = []
+    unique_data = []
 
     for item in data:
-        # 1. Strip extra whitespace
-        title = item.get("title", "").strip()
-        content = item.get("content", "")
-        if content:
-             content = content.strip()
-        else:
-            content = ""
+        cleaned_item = clean_item(item)
 
         # 2. Duplicate Removal (simple title check)
-        if title in seen_titles:
+        if cleaned_item["title"] in by_title:
+            title_duplicates.append(cleaned_item)
             continue
-        seen_titles.add(title)
+        by_title[cleaned_item["title"]] = cleaned_item
 
-        # 3. Limit content length
-        if len(content) > 3000:
-            content = content[:3000] + "..."
+        unique_data.append(cleaned_item)
 
-        cleaned_item = {
-            "source": item["source"],
-            "title": title,
-            "content": content
-        }
-        cleaned_data.append(cleaned_item)
+    # 3. Near-duplicate removal: the same story from several sources is kept once
+    unique_data, merges = find_near_duplicates(unique_data, threshold=similarity_threshold)
+    # Titles are unique at this point, so they identify the merged items
+    survivor = {item["title"]: item for item in unique_data}
+    for merge in merges:
+        for merged in merge["merged"]:
+            survivor[merged["title"]] = survivor[merge["kept"]["title"]]
+        names = "; ".join(f"[{m['source']}] {m['title']}" for m in merge["merged"])
+        print(f"Merged near-duplicates into [{merge['kept']['source']}] {merge['kept']['title']}: {names}")
+
+    if dropped is not None:
+        dropped.extend((item, item_key(survivor[item["title"]])) for item in title_duplicates)
+        dropped.extend(
+            (by_title[merged["title"]], item_key(survivor[merge["kept"]["title"]]))
+            for merge in merges for merged in merge["merged"]
+        )
+
+    cleaned_data = []
+    token_stats = []
+    for item in unique_data:
+        # 4. Limit content length: keep the most informative sentences within the token budget
+        content, before, after = compress(item["content"], item["title"], budget=token_budget)
+        token_stats.append((before, after))
+
+        cleaned_data.append({**item, "content": content})
+
+    report = compression_report(token_stats)
+    if report["tokens_before"]:
+        print(
+            f"Compressed content from {report['tokens_before']} to {report['tokens_after']} tokens "
+            f"(saved {report['tokens_saved']}, {report['tokens_saved'] / report['tokens_before']:.0%})"
+        )
 
     return cleaned_data
 
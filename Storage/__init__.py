@@ -0,0 +1,8 @@
+import os
+
+# Directory for the pipeline's persistent data (unlike Cache/, not safe to delete)
+DATA_DIR = os.environ.get("NEWSLENS_DATA_DIR", ".newslens_data")
+
+
+def data_path(name: str) -> str:
+    return os.path.join(DATA_DIR, name)
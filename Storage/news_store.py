@@ -0,0 +1,408 @@
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Union
+
+# Ensure root directory is in path so the store also runs as a script
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if root_dir not in sys.path:
+    sys.path.append(root_dir)
+
+from Cache.seen_store import DIGEST_SIZE, item_key, merge_results, result_key
+from Storage import data_path
+
+# Archived summaries older than this are pruned (0 keeps everything);
+# summaries in the current brief are always kept
+RETENTION_DAYS = float(os.environ.get("NEWSLENS_RETENTION_DAYS", "365"))
+# Brief written by earlier versions; imported once into an empty store
+LEGACY_JSON = "summarized_news.json"
+
+# Full-text ranking weights for title, summary and article text
+SEARCH_WEIGHTS = (10.0, 4.0, 1.0)
+
+Timestamp = Union[float, str, datetime, None]
+
+
+def to_epoch(value: Timestamp) -> Optional[float]:
+    """Accepts epoch seconds, datetimes or ISO dates ("2026-10-01", "2026-10-01T08:00")."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, (int, float)):
+        return float(value)
+    return datetime.fromisoformat(value).timestamp()
+
+
+def match_expression(text: str) -> Optional[str]:
+    """
+    Turns free text into an FTS5 query that matches documents containing
+    every word, so user input can't hit FTS5 syntax errors ("covid-19", "U.S.").
+    """
+    words = re.findall(r"\w+", text)
+    return " ".join(f'"{word}"' for word in words) or None
+
+
+class NewsStore:
+    """
+    SQLite (WAL) archive of every summary plus the current brief.
+
+    - summaries: one row per news item (keyed like the seen store), indexed by
+      source + time, time and URL, holding the full result as JSON
+    - brief: the ordered list of keys that make up the latest digest
+    - summaries_fts: FTS5 index over title, summary and article text, kept
+      in sync with summaries by triggers
+
+    Each write happens in one transaction, so readers in other processes (the
+    API, the MCP server, the mailer) see either the old brief or the new one.
+    A version counter is bumped on every write for cheap change detection.
+    """
+
+    def __init__(self, path: str, retention_days: float = RETENTION_DAYS,
+                 legacy_json: Optional[str] = LEGACY_JSON):
+        self.path = path
+        self.retention_days = retention_days
+        self.legacy_json = legacy_json
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            # Must be set before the first table exists to take effect
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS summaries (
+                    key TEXT PRIMARY KEY,
+                    source TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    url TEXT,
+                    summarized_at REAL NOT NULL,
+                    data TEXT NOT NULL,
+                    summary TEXT,
+                    content TEXT
+                );
+                CREATE INDEX IF NOT EXISTS idx_summaries_source_time ON summaries(source, summarized_at);
+                CREATE INDEX IF NOT EXISTS idx_summaries_time ON summaries(summarized_at);
+                CREATE INDEX IF NOT EXISTS idx_summaries_url ON summaries(url);
+                CREATE TABLE IF NOT EXISTS brief (
+                    position INTEGER PRIMARY KEY,
+                    key TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS meta (
+                    name TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                );
+                INSERT OR IGNORE INTO meta (name, value) VALUES ('version', 0);
+                """
+            )
+            needs_index = self._migrate(conn)
+            conn.executescript(
+                """
+                CREATE VIRTUAL TABLE IF NOT EXISTS summaries_fts USING fts5(
+                    title, summary, content,
+                    content='summaries', content_rowid='rowid',
+                    tokenize='porter unicode61 remove_diacritics 2'
+                );
+                CREATE TRIGGER IF NOT EXISTS summaries_fts_insert AFTER INSERT ON summaries BEGIN
+                    INSERT INTO summaries_fts (rowid, title, summary, content)
+                    VALUES (new.rowid, new.title, new.summary, new.content);
+                END;
+                CREATE TRIGGER IF NOT EXISTS summaries_fts_delete AFTER DELETE ON summaries BEGIN
+                    INSERT INTO summaries_fts (summaries_fts, rowid, title, summary, content)
+                    VALUES ('delete', old.rowid, old.title, old.summary, old.content);
+                END;
+                CREATE TRIGGER IF NOT EXISTS summaries_fts_update AFTER UPDATE ON summaries BEGIN
+                    INSERT INTO summaries_fts (summaries_fts, rowid, title, summary, content)
+                    VALUES ('delete', old.rowid, old.title, old.summary, old.content);
+                    INSERT INTO summaries_fts (rowid, title, summary, content)
+                    VALUES (new.rowid, new.title, new.summary, new.content);
+                END;
+                """
+            )
+            if needs_index:
+                conn.execute("INSERT INTO summaries_fts (summaries_fts) VALUES ('rebuild')")
+            conn.commit()
+            self._conn = conn
+            self._import_legacy(conn)
+        return self._conn
+
+    @staticmethod
+    def _migrate(conn: sqlite3.Connection) -> bool:
+        """
+        Adds the searchable columns to stores created before full-text search.
+        Returns True when the search index has to be built from existing rows.
+        """
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(summaries)")}
+        has_index = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'summaries_fts'"
+        ).fetchone() is not None
+        if "content" not in columns:
+            conn.execute("ALTER TABLE summaries ADD COLUMN summary TEXT")
+            conn.execute("ALTER TABLE summaries ADD COLUMN content TEXT")
+            conn.execute("UPDATE summaries SET summary = json_extract(data, '$.summary')")
+        return not has_index
+
+    def _import_legacy(self, conn: sqlite3.Connection) -> None:
+        if not self.legacy_json or not os.path.exists(self.legacy_json):
+            return
+        if conn.execute("SELECT 1 FROM summaries LIMIT 1").fetchone():
+            return
+        try:
+            with open(self.legacy_json, "r", encoding="utf-8") as f:
+                results = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[WARN] Could not import {self.legacy_json}: {e}")
+            return
+        if isinstance(results, list) and results:
+            self._write_brief(conn, results, results, os.path.getmtime(self.legacy_json))
+            print(f"Imported {len(results)} summaries from {self.legacy_json} into {self.path}")
+
+    @staticmethod
+    def _upsert(conn: sqlite3.Connection, results: Iterable[Dict[str, str]], now: float,
+                contents: Optional[Dict[str, str]] = None) -> None:
+        # Article text is only indexed, not returned; a re-save without it
+        # keeps the text stored earlier
+        contents = contents or {}
+        conn.executemany(
+            """
+            INSERT INTO summaries (key, source, title, url, summarized_at, data, summary, content)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(key) DO UPDATE SET
+                source = excluded.source, title = excluded.title, url = excluded.url,
+                summarized_at = excluded.summarized_at, data = excluded.data,
+                summary = excluded.summary, content = COALESCE(excluded.content, summaries.content)
+            """,
+            [
+                (item_key(r), r.get("source", ""), r.get("title", ""), r.get("url"), now,
+                 json.dumps(r, ensure_ascii=False), r.get("summary"), contents.get(result_key(r)))
+                for r in results
+            ],
+        )
+
+    @staticmethod
+    def _bump_version(conn: sqlite3.Connection) -> None:
+        conn.execute("UPDATE meta SET value = value + 1 WHERE name = 'version'")
+
+    def _write_brief(self, conn: sqlite3.Connection, new: List[Dict[str, str]],
+                     brief: List[Dict[str, str]], now: float,
+                     contents: Optional[Dict[str, str]] = None) -> None:
+        with conn:
+            self._upsert(conn, new, now, contents)
+            conn.execute("DELETE FROM brief")
+            conn.executemany("INSERT INTO brief (position, key) VALUES (?, ?)",
+                             [(pos, item_key(r)) for pos, r in enumerate(brief)])
+            self._bump_version(conn)
+
+    @staticmethod
+    def _rows(cursor) -> List[Dict[str, str]]:
+        return [json.loads(data) for (data,) in cursor]
+
+    def _brief(self, conn: sqlite3.Connection) -> List[Dict[str, str]]:
+        return self._rows(conn.execute(
+            "SELECT s.data FROM brief b JOIN summaries s ON s.key = b.key ORDER BY b.position"
+        ))
+
+    # ---- writes ----
+
+    def add(self, result: Dict[str, str], content: Optional[str] = None) -> None:
+        """
+        Archives one summary as soon as it exists; the brief is unchanged.
+        `content` is the summarized article's text, indexed for search.
+        """
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                self._upsert(conn, [result], time.time(), {result_key(result): content})
+                self._bump_version(conn)
+
+    def save_brief(self, results: List[Dict[str, str]], merge: bool = False,
+                   limit: int = DIGEST_SIZE,
+                   contents: Optional[Dict[str, str]] = None,
+                   archive: bool = True) -> List[Dict[str, str]]:
+        """
+        Archives `results` and makes them the current brief, atomically. With
+        `merge`, they go first and are followed by the previous brief's items
+        they don't replace, capped at `limit`. `contents` maps each summarized
+        article's result_key() to its text, for the search index. Pass
+        `archive=False` when every result was already stored with add().
+        Returns the new brief.
+        """
+        with self._lock:
+            conn = self._connect()
+            brief = merge_results(results, self._brief(conn), limit) if merge else list(results)
+            self._write_brief(conn, results if archive else [], brief, time.time(), contents)
+        self.prune()
+        return brief
+
+    def prune(self, retention_days: Optional[float] = None) -> int:
+        """Deletes archived summaries past retention that aren't in the brief."""
+        days = self.retention_days if retention_days is None else retention_days
+        if days <= 0:
+            return 0
+        cutoff = time.time() - days * 86400
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                deleted = conn.execute(
+                    "DELETE FROM summaries WHERE summarized_at < ? AND key NOT IN (SELECT key FROM brief)",
+                    (cutoff,),
+                ).rowcount
+                if deleted:
+                    self._bump_version(conn)
+            if deleted:
+                # Hand the freed pages back to the filesystem a batch at a time
+                conn.execute("PRAGMA incremental_vacuum(2000)")
+        return deleted
+
+    def compact(self) -> None:
+        """
+        Merges the search index's segments, rewrites the database file and
+        truncates the WAL; for maintenance windows.
+        """
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute("INSERT INTO summaries_fts (summaries_fts) VALUES ('optimize')")
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            conn.execute("VACUUM")
+
+    # ---- reads ----
+
+    def version(self) -> int:
+        with self._lock:
+            return self._connect().execute("SELECT value FROM meta WHERE name = 'version'").fetchone()[0]
+
+    def brief(self) -> List[Dict[str, str]]:
+        with self._lock:
+            return self._brief(self._connect())
+
+    def by_url(self, url: str) -> Optional[Dict[str, str]]:
+        with self._lock:
+            rows = self._rows(self._connect().execute(
+                "SELECT data FROM summaries WHERE url = ? ORDER BY summarized_at DESC LIMIT 1", (url,)
+            ))
+        return rows[0] if rows else None
+
+    def query(self, source: Optional[str] = None, since: Timestamp = None, until: Timestamp = None,
+              url: Optional[str] = None, limit: int = 50, offset: int = 0) -> List[Dict[str, str]]:
+        """
+        Archived summaries, newest first. `source` matches by prefix ("YouTube"
+        covers every channel); `since`/`until` bound the summarization time.
+        Every filter is served from an index.
+        """
+        clauses, params = [], []
+        if source:
+            # Range form of a prefix match so the (source, time) index is used
+            clauses.append("source >= ? AND source < ?")
+            params += [source, source + "\U0010ffff"]
+        since, until = to_epoch(since), to_epoch(until)
+        if since is not None:
+            clauses.append("summarized_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("summarized_at < ?")
+            params.append(until)
+        if url:
+            clauses.append("url = ?")
+            params.append(url)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            return self._rows(self._connect().execute(
+                f"SELECT data FROM summaries {where} ORDER BY summarized_at DESC LIMIT ? OFFSET ?",
+                (*params, limit, offset),
+            ))
+
+    def search(self, text: str, source: Optional[str] = None, since: Timestamp = None,
+               until: Timestamp = None, limit: int = 20, offset: int = 0) -> List[Dict[str, str]]:
+        """
+        Archived summaries containing every word of `text` (stemmed, so
+        "elections" finds "election"), best match first. Titles weigh most,
+        then summaries, then article text. Each result gets a "snippet" with
+        the matched words in [brackets].
+        """
+        expression = match_expression(text)
+        if expression is None:
+            return []
+        clauses, params = ["summaries_fts MATCH ?"], [expression]
+        if source:
+            clauses.append("s.source >= ? AND s.source < ?")
+            params += [source, source + "\U0010ffff"]
+        since, until = to_epoch(since), to_epoch(until)
+        if since is not None:
+            clauses.append("s.summarized_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("s.summarized_at < ?")
+            params.append(until)
+        weights = ", ".join(str(w) for w in SEARCH_WEIGHTS)
+        with self._lock:
+            rows = self._connect().execute(
+                f"""
+                SELECT s.data, snippet(summaries_fts, -1, '[', ']', '...', 16)
+                FROM summaries_fts JOIN summaries s ON s.rowid = summaries_fts.rowid
+                WHERE {' AND '.join(clauses)}
+                ORDER BY bm25(summaries_fts, {weights}) LIMIT ? OFFSET ?
+                """,
+                (*params, limit, offset),
+            ).fetchall()
+        return [{**json.loads(data), "snippet": snippet} for data, snippet in rows]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            conn = self._connect()
+            archived = conn.execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+            in_brief = conn.execute("SELECT COUNT(*) FROM brief").fetchone()[0]
+        return {"archived": archived, "brief": in_brief, "version": self.version()}
+
+    def export_json(self, path: str) -> int:
+        """Writes the current brief to a JSON file (the old summarized_news.json format)."""
+        brief = self.brief()
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(brief, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        return len(brief)
+
+
+news_store = NewsStore(data_path("news.sqlite3"))
+
+
+# =========================
+# CLI
+# =========================
+def cli() -> None:
+    parser = argparse.ArgumentParser(description="NewsLens summary store maintenance")
+    parser.add_argument("--stats", action="store_true", help="Print row counts")
+    parser.add_argument("--export", metavar="FILE", help="Write the current brief to a JSON file")
+    parser.add_argument("--search", metavar="TEXT", help="Full-text search the archive")
+    parser.add_argument("--prune", action="store_true", help="Apply the retention policy now")
+    parser.add_argument("--compact", action="store_true", help="VACUUM the database and truncate the WAL")
+    args = parser.parse_args()
+
+    if args.prune:
+        print(f"Pruned {news_store.prune()} summaries older than {news_store.retention_days:g} days")
+    if args.compact:
+        news_store.compact()
+        print("Compacted the store")
+    if args.export:
+        print(f"Exported {news_store.export_json(args.export)} summaries to {args.export}")
+    if args.search:
+        for result in news_store.search(args.search):
+            print(f"[{result['source']}] {result['title']}\n    {result['snippet']}")
+    if args.stats or not (args.prune or args.compact or args.export or args.search):
+        print(news_store.stats())
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,104 @@
+import asyncio
+import threading
+import time
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at `capacity` per `period` seconds."""
+
+    def __init__(self, capacity: float, period: float = 60.0):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` tokens are available (0 if they are now)."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount: float) -> None:
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+
+    def drain(self) -> None:
+        self._refill()
+        self.tokens = min(self.tokens, 0.0)
+
+
+class RateLimiter:
+    """
+    Async limiter enforcing requests-per-minute and tokens-per-minute budgets,
+    the two limits Groq applies to every API key.
+    """
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        # A thread lock rather than an asyncio one: the budget is per API key,
+        # so it is shared by every event loop in the process
+        self._lock = threading.Lock()
+
+    async def acquire(self, tokens: float) -> None:
+        while True:
+            with self._lock:
+                delay = max(self.requests.wait_time(1), self.tokens.wait_time(tokens))
+                if delay <= 0:
+                    self.requests.take(1)
+                    self.tokens.take(tokens)
+                    return
+            await asyncio.sleep(delay)
+
+    def penalize(self) -> None:
+        """Empties both buckets after a 429, since the server says we are over budget."""
+        with self._lock:
+            self.requests.drain()
+            self.tokens.drain()
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD concurrency limit: halves on every rate-limit response and grows back
+    by one after `increase_after` consecutive successes, up to `maximum`.
+    Create one per event loop run.
+    """
+
+    def __init__(self, maximum: int, increase_after: int = 5):
+        self.maximum = max(1, maximum)
+        self.limit = self.maximum
+        self.increase_after = increase_after
+        self.in_flight = 0
+        self._successes = 0
+        self._cond = asyncio.Condition()
+
+    async def __aenter__(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+        return self
+
+    async def __aexit__(self, *exc_info):
+        async with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    async def on_success(self) -> None:
+        async with self._cond:
+            self._successes += 1
+            if self._successes >= self.increase_after and self.limit < self.maximum:
+                self.limit += 1
+                self._successes = 0
+                self._cond.notify_all()
+
+    async def on_rate_limited(self) -> None:
+        async with self._cond:
+            self.limit = max(1, self.limit // 2)
+            self._successes = 0
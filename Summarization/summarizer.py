@@ -0,0 +1,239 @@
+import asyncio
+import os
+from typing import Dict, List, Optional
+
+from groq import RateLimitError
+from langchain_core.callbacks import BaseCallbackHandler
+
+from Cache.summary_cache import summary_cache, summary_key
+from Metrics.metrics import LLM_REQUESTS, LLM_TOKENS, STAGE_ITEMS, timed
+from Preprocessing.compression import count_tokens
+from Summarization.rate_limiter import AdaptiveConcurrency, RateLimiter
+
+# Chatty openings the model sometimes adds despite the prompt
+SUMMARY_PREFIXES = ["Here is a summary", "Here's a summary", "The following is a summary", "Summary:"]
+
+# Defaults match Groq's free tier for llama-3.1-8b-instant
+LLM_CONCURRENCY = int(os.environ.get("NEWSLENS_LLM_CONCURRENCY", "4"))
+LLM_RPM = float(os.environ.get("NEWSLENS_LLM_RPM", "30"))
+LLM_TPM = float(os.environ.get("NEWSLENS_LLM_TPM", "6000"))
+LLM_MAX_RETRIES = int(os.environ.get("NEWSLENS_LLM_MAX_RETRIES", "4"))
+
+# Completion tokens budgeted per call on top of the prompt (3-4 lines of summary)
+SUMMARY_OUTPUT_TOKENS = 200
+
+
+def clean_summary(summary: str) -> str:
+    # Cleaning potential chatty prefixes if the model ignores the system prompt
+    clean = summary.strip()
+    for prefix in SUMMARY_PREFIXES:
+        if clean.lower().startswith(prefix.lower()):
+            clean = clean[len(prefix):].strip().lstrip(":").strip()
+    return clean
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """
+    Judged by the HTTP status only: error text can contain "429" for other
+    reasons (URLs, token counts, request ids).
+    """
+    if isinstance(error, RateLimitError):
+        return True
+    if getattr(error, "status_code", None) == 429:
+        return True
+    return getattr(getattr(error, "response", None), "status_code", None) == 429
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenUsage(BaseCallbackHandler):
+    """Collects the token usage the model reports for one chain call."""
+
+    # Runs in the calling task instead of an executor thread
+    run_inline = True
+
+    def __init__(self):
+        self.prompt_tokens: Optional[int] = None
+        self.completion_tokens: Optional[int] = None
+
+    def on_llm_end(self, response, **kwargs) -> None:
+        usage = None
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or usage
+        if usage:
+            self.prompt_tokens, self.completion_tokens = usage.get("input_tokens"), usage.get("output_tokens")
+            return
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        self.prompt_tokens, self.completion_tokens = usage.get("prompt_tokens"), usage.get("completion_tokens")
+
+
+def record_usage(usage: TokenUsage, prompt_tokens: int, summary: str) -> None:
+    """Counts the reported token usage, or estimates it when the model reported none."""
+    prompt = usage.prompt_tokens if usage.prompt_tokens is not None else prompt_tokens
+    completion = usage.completion_tokens if usage.completion_tokens is not None else count_tokens(summary)
+    LLM_TOKENS.inc(prompt, type="prompt")
+    LLM_TOKENS.inc(completion, type="completion")
+
+
+class Summarizer:
+    """
+    Runs the summarization chain over a list of articles.
+
+    Summaries are cached on a hash of (prompt template, model, title, content),
+    so articles that are unchanged since an earlier run never reach the LLM.
+    The rest are sent concurrently through the chain's async interface, paced
+    by a requests/tokens-per-minute limiter, with concurrency backing off
+    whenever Groq answers 429.
+
+    Multi-source story articles (see Preprocessing.clustering) go through
+    `story_chain` when one is given; both chains share the same limits.
+    """
+
+    def __init__(self, chain, prompt_template: str, model_name: str,
+                 concurrency: int = LLM_CONCURRENCY,
+                 requests_per_minute: float = LLM_RPM,
+                 tokens_per_minute: float = LLM_TPM,
+                 max_retries: int = LLM_MAX_RETRIES,
+                 story_chain=None, story_template: Optional[str] = None):
+        self.chain = chain
+        self.prompt_template = prompt_template
+        self.story_chain = story_chain
+        self.story_template = story_template
+        self.model_name = model_name
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+
+    def _prompt(self, article: Dict[str, str]):
+        """(chain, template) used for this article."""
+        if article.get("coverage") and self.story_chain is not None:
+            return self.story_chain, self.story_template
+        return self.chain, self.prompt_template
+
+    def _key(self, article: Dict[str, str]) -> str:
+        return summary_key(
+            self._prompt(article)[1],
+            self.model_name,
+            article.get("title", "No Title"),
+            article.get("content", "No Content"),
+        )
+
+    async def _invoke(self, article: Dict[str, str], slots: AdaptiveConcurrency) -> str:
+        inputs = {
+            "title": article.get("title", "No Title"),
+            "content": article.get("content", "No Content")
+        }
+        chain, template = self._prompt(article)
+        prompt_tokens = count_tokens(template + inputs["title"] + inputs["content"])
+        tokens = prompt_tokens + SUMMARY_OUTPUT_TOKENS
+
+        for attempt in range(self.max_retries + 1):
+            async with slots:
+                await self.limiter.acquire(tokens)
+                usage = TokenUsage()
+                try:
+                    with timed("llm_call"):
+                        summary = await chain.ainvoke(inputs, config={"callbacks": [usage]})
+                except Exception as e:
+                    rate_limited = is_rate_limit_error(e)
+                    LLM_REQUESTS.inc(outcome="rate_limited" if rate_limited else "error")
+                    if not rate_limited or attempt == self.max_retries:
+                        raise
+                    self.limiter.penalize()
+                    await slots.on_rate_limited()
+                    delay = retry_after(e) or 2 ** attempt
+                else:
+                    LLM_REQUESTS.inc(outcome="ok")
+                    STAGE_ITEMS.inc(stage="llm_call")
+                    record_usage(usage, prompt_tokens, summary)
+                    await slots.on_success()
+                    return clean_summary(summary)
+            print(f"[WARN] Rate limited, retrying in {delay:.1f}s (limit now {slots.limit} concurrent)")
+            await asyncio.sleep(delay)
+
+    async def asummarize_one(self, article: Dict[str, str],
+                             slots: Optional[AdaptiveConcurrency] = None) -> Optional[str]:
+        """
+        Summary for a single article, from the cache when possible. Errors are
+        reported and yield None so one bad article never sinks a batch.
+        """
+        key = self._key(article)
+        summary = summary_cache.get(key)
+        if summary is not None:
+            return summary
+        return await self._summarize_uncached(article, key, slots or AdaptiveConcurrency(self.concurrency))
+
+    async def _summarize_uncached(self, article: Dict[str, str], key: str,
+                                  slots: AdaptiveConcurrency) -> Optional[str]:
+        try:
+            summary = await self._invoke(article, slots)
+        except Exception as e:
+            print(f"[ERROR] Could not summarize article '{article.get('title', 'No Title')}': {e}")
+            return None
+        summary_cache.set(key, summary)
+        return summary
+
+    async def asummarize(self, articles: List[Dict[str, str]], verbose: bool = True) -> List[Dict[str, str]]:
+        """
+        Returns one {"source", "title", "summary"} dict per article that could
+        be summarized, in input order. Failures are reported and skipped.
+        """
+        summaries: List[Optional[str]] = [None] * len(articles)
+        keys = [self._key(article) for article in articles]
+        todo = []
+        for idx, key in enumerate(keys):
+            summaries[idx] = summary_cache.get(key)
+            if summaries[idx] is None:
+                todo.append(idx)
+
+        if verbose:
+            print(f"Reusing {len(articles) - len(todo)} cached summaries, sending {len(todo)} articles to the LLM.")
+
+        slots = AdaptiveConcurrency(self.concurrency)
+        done_count = 0
+
+        async def run(idx: int) -> None:
+            nonlocal done_count
+            summaries[idx] = await self._summarize_uncached(articles[idx], keys[idx], slots)
+            if summaries[idx] is None:
+                return
+            done_count += 1
+            # Print immediately for feedback
+            if verbose:
+                print(f"\n[{done_count}/{len(todo)}] Summarized: {articles[idx].get('title', 'No Title')}")
+                print(f"Summary: {summaries[idx]}\n")
+                print("-" * 50)
+
+        await asyncio.gather(*(run(idx) for idx in todo))
+
+        return [
+            self.result(article, summary)
+            for article, summary in zip(articles, summaries)
+            if summary is not None
+        ]
+
+    @staticmethod
+    def result(article: Dict[str, str], summary: str) -> Dict[str, str]:
+        result = {
+            "source": article.get("source", "Unknown"),
+            "title": article.get("title", "No Title"),
+            "summary": summary
+        }
+        if article.get("url"):
+            result["url"] = article["url"]
+        # Every source a multi-source story was summarized from
+        if article.get("coverage"):
+            result["coverage"] = article["coverage"]
+        return result
+
+    def summarize(self, articles: List[Dict[str, str]], verbose: bool = True) -> List[Dict[str, str]]:
+        """Blocking wrapper around asummarize for sync callers."""
+        return asyncio.run(self.asummarize(articles, verbose=verbose))
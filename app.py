@@ -1,6 +1,6 @@
 import os
 import sys
-import json
+import asyncio
 from typing import List, Dict
 from dotenv import load_dotenv
 
@@ -15,7 +15,13 @@ from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 
 # Import our cleaning pipeline
-from Preprocessing.preprocessing import fetch_and_process_data
+from Preprocessing.preprocessing import Dropped, fetch_and_process_data, preprocess_data
+from Preprocessing.clustering import CLUSTERING, cluster_articles, members
+from Summarization.summarizer import Summarizer
+from Pipeline.streaming import run_pipeline
+from Cache.seen_store import item_key, result_key, seen_store, with_fingerprints
+from Storage.news_store import news_store
+from Metrics.metrics import Progress, no_progress
 
 # ==========================================
 # CONFIGURATION
@@ -25,6 +31,11 @@ from Preprocessing.preprocessing import fetch_and_process_data
 # Or hardcode it here (not recommended for production).
 GROQ_API_KEY = os.environ.get("GROQ_API_KEY")
 
+# Stream items from fetch to summary instead of running each step to completion
+STREAMING = os.environ.get("NEWSLENS_STREAMING", "true").lower() == "true"
+# Only summarize items not seen in earlier runs and merge them into the existing brief
+INCREMENTAL = os.environ.get("NEWSLENS_INCREMENTAL", "false").lower() == "true"
+
 # ==========================================
 # LANGSMITH CONFIGURATION
 # ==========================================
@@ -46,15 +57,16 @@ if not GROQ_API_KEY:
 
 # Initialize the Groq Chat Model
 # Using 'mixtral-8x7b-32768' or 'llama3-70b-8192' as commonly available powerful models on Groq.
+MODEL_NAME = "llama-3.1-8b-instant"
+
 llm = ChatGroq(
     temperature=0,
-    model_name="llama-3.1-8b-instant", 
+    model_name=MODEL_NAME, 
     groq_api_key=GROQ_API_KEY
 )
 
 # Define the summarization prompt
-summarize_prompt = ChatPromptTemplate.from_template(
-    """
+SUMMARY_TEMPLATE = """
     You are a helpful news assistant.
     Summarize the following news content into strictly 3-4 lines.
     Capture the key points clearly.
@@ -66,65 +78,123 @@ summarize_prompt = ChatPromptTemplate.from_template(
 
     Summary:
     """
-)
+summarize_prompt = ChatPromptTemplate.from_template(SUMMARY_TEMPLATE)
+
+# Prompt for a story covered by several sources (one call per story cluster)
+STORY_TEMPLATE = """
+    You are a helpful news assistant.
+    The following reports from different sources cover the same news story.
+    Combine them into one summary of strictly 3-4 lines.
+    Capture the key points clearly and mention where the sources disagree.
+    
+    IMPORTANT: Return ONLY the summary text. Do not start with "Here is a summary" or similar phrases.
+
+    Story: {title}
+    Reports:
+    {content}
+
+    Summary:
+    """
+story_prompt = ChatPromptTemplate.from_template(STORY_TEMPLATE)
 
 # Create a chain
 # Input: {"title": ..., "content": ...} -> Model -> Output (Str)
 chain = summarize_prompt | llm | StrOutputParser()
+story_chain = story_prompt | llm | StrOutputParser()
+
+# Shared by app.main and the MCP server; reuses cached summaries of unchanged articles
+summarizer = Summarizer(chain, SUMMARY_TEMPLATE, MODEL_NAME,
+                        story_chain=story_chain, story_template=STORY_TEMPLATE)
+
+def mark_summarized(articles: List[Dict[str, str]], results: List[Dict[str, str]],
+                    dropped: List[Dropped]) -> None:
+    """
+    Marks every item behind a summarized article as seen, including the
+    duplicates folded into it during preprocessing; otherwise the next run
+    would summarize those on their own. Matched by key, not title: two
+    sources can share a headline, and a story's title is only its lead's.
+    """
+    summarized = {result_key(result) for result in results}
+    items = [item for article in articles if result_key(article) in summarized
+             for item in members(article)]
+    keys = {item_key(item) for item in items}
+    items += [item for item, kept_key in dropped if kept_key in keys]
+    seen_store.mark_seen(items)
+
+async def asummarize_new(items: List[Dict[str, str]]):
+    """
+    Used by the daemon: summarizes the already-fetched items that were not
+    summarized before and merges them into the existing brief.
+    """
+    items = seen_store.filter_new(with_fingerprints(items))
+    if not items:
+        print("No new or changed articles since the last run.")
+        return []
+
+    dropped: List[Dropped] = []
+    articles = await asyncio.to_thread(preprocess_data, items, dropped=dropped)
+    if CLUSTERING:
+        articles = await asyncio.to_thread(cluster_articles, articles)
+    print(f"\n>>> Summarizing {len(articles)} new articles...")
+    results = await summarizer.asummarize(articles, verbose=False)
+
+    mark_summarized(articles, results, dropped)
+    if not results:
+        return results
+
+    contents = {result_key(article): article.get("content") for article in articles}
+    final_results = await asyncio.to_thread(news_store.save_brief, results, True, contents=contents)
+    print(f"Merged {len(results)} new summaries into the brief ({news_store.path})")
+    return final_results
+
+def main(streaming: bool = STREAMING, incremental: bool = INCREMENTAL,
+         progress: Progress = no_progress):
+    """
+    Runs the pipeline once. `progress` receives each stage's start, item
+    counts and end (see Metrics.metrics.Progress).
+    """
+    if streaming:
+        print(">>> Fetching, Preprocessing and Summarizing News (streaming)...")
+        final_results = run_pipeline(summarizer, news_store, incremental=incremental, progress=progress)
+        if final_results:
+            print(f"\nDone! Summarized {len(final_results)} articles.")
+            print(f"Results saved to {news_store.path}")
+        return final_results
 
-def main():
     print(">>> PART 1: Fetching and Preprocessing Data...")
-    articles = fetch_and_process_data()
+    dropped: List[Dropped] = []
+    articles = fetch_and_process_data(only_new=incremental, dropped=dropped, progress=progress)
     
     if not articles:
         print("No articles found to summarize.")
-        return
+        return []
+
+    if CLUSTERING:
+        progress("cluster", {"stories": 0}, False)
+        articles = cluster_articles(articles)
+        progress("cluster", {"stories": len(articles)}, True)
 
     print(f"\n>>> PART 2: Summarizing {len(articles)} Articles using Groq LLM...")
     
-    final_results = []
-    
-    for idx, article in enumerate(articles, start=1):
-        try:
-            print(f"\n[{idx}/{len(articles)}] Summarizing: {article['title']}")
-            
-            # Invoke the chain
-            summary = chain.invoke({
-                "title": article['title'],
-                "content": article['content']
-            })
-            
-            # Cleaning potential chatty prefixes if the model ignores the system prompt
-            clean_summary = summary.strip()
-            # Simple heuristic to remove common prefixes if they still appear
-            prefixes = ["Here is a summary", "Here's a summary", "The following is a summary", "Summary:"]
-            for prefix in prefixes:
-                if clean_summary.lower().startswith(prefix.lower()):
-                    clean_summary = clean_summary[len(prefix):].strip().lstrip(":").strip()
-
-            # Update the article dictionary
-            processed_article = {
-                "source": article['source'],
-                "title": article['title'],
-                "summary": clean_summary
-            }
-            
-            final_results.append(processed_article)
-            
-            # Print immediately for feedback
-            print(f"Summary: {clean_summary}\n")
-            print("-" * 50)
-            
-        except Exception as e:
-            print(f"[ERROR] Could not summarize article: {e}")
-
-    # Optional: Save to a JSON file
-    output_filename = "summarized_news.json"
-    with open(output_filename, "w", encoding="utf-8") as f:
-        json.dump(final_results, f, indent=2, ensure_ascii=False)
+    progress("summarize", {"articles": 0, "failed": 0}, False)
+    final_results = summarizer.summarize(articles)
+    progress("summarize", {"articles": len(final_results), "failed": len(articles) - len(final_results)}, True)
+
+    # Remember what was summarized so incremental runs can skip it next time
+    mark_summarized(articles, final_results, dropped)
+    if not final_results:
+        # Keep the previous brief rather than replacing it with an empty one
+        print("No articles were summarized.")
+        return final_results
+
+    # Archive the summaries and make them (merged with the previous brief
+    # when incremental) the current brief in one transaction
+    contents = {result_key(article): article.get("content") for article in articles}
+    final_results = news_store.save_brief(final_results, merge=incremental, contents=contents)
     
     print(f"\nDone! Summarized {len(final_results)} articles.")
-    print(f"Results saved to {output_filename}")
+    print(f"Results saved to {news_store.path}")
+    return final_results
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,343 @@
+"""
+Local stand-in for BBC, CNN and YouTube, serving the recorded fixtures in
+benchmarks/fixtures/ at any scale.
+
+Feeds are built from the recorded RSS/Atom documents by repeating their item
+template; article pages and transcripts keep the recorded markup with the
+story text swapped in. Every item gets its own deterministic story, and some
+stories are covered by several sources so dedup and clustering have real
+work to do:
+
+- BBC article i tells story i
+- CNN article i tells story i when i % 4 == 0, otherwise a CNN-only story
+- the first channel's video i tells story i when i % 5 == 0
+- CNN article i when i % 8 == 0 and video i when i % 10 == 0 are short copies
+  of the BBC article under its headline with the last word changed, so dedup
+  folds them into it; being far shorter, the BBC copy is kept whichever
+  arrives first. The other shared stories have their own headline and text
+  and are left for clustering
+- every 7th video has no transcript (HTTP 404)
+
+    python benchmarks/fixture_server.py --port 8900 --latency 0.05
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import re
+import threading
+import time
+from functools import lru_cache
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+CHANNELS = {
+    "UC16niRr50-MSBwiO3YDb3RA": "BBC News",
+    "UCupvZG-5ko_eiXAupbDfxWw": "CNN",
+    "UCNye-wNBqNL5ZzHSJj3l8Bg": "Al Jazeera English",
+}
+SHARED_CHANNEL = "UC16niRr50-MSBwiO3YDb3RA"
+NO_TRANSCRIPT_EVERY = 7
+
+_SYLLABLES = ["ba", "ko", "ri", "ten", "mul", "sa", "vo", "dar", "ne", "pli", "gor", "fen", "ta", "lu", "qua", "zim"]
+_STOPWORDS = ["the", "of", "and", "to", "in", "a", "on", "for", "that", "with", "as", "by", "was", "said"]
+# Deterministic pseudo-words: 16 ** 3 = 4096 distinct terms
+VOCAB = [a + b + c for a in _SYLLABLES for b in _SYLLABLES for c in _SYLLABLES]
+TOPIC_WORDS = 25
+# Share of the original's text that a short copy keeps
+COPY_LENGTH = 0.3
+
+_ITEM_RE = re.compile(r"<item>.*?</item>", re.S)
+_ENTRY_RE = re.compile(r"<entry>.*?</entry>", re.S)
+# Paragraph bodies, inline markup included
+_BBC_PARAGRAPH_RE = re.compile(r'(<p class="ssrcss-1q0x1qg-Paragraph">)(.*?)(</p>)', re.S)
+_CNN_PARAGRAPH_RE = re.compile(r'(data-component-name="paragraph"[^>]*>)(.*?)(</div>)', re.S)
+_TAG_RE = re.compile(r"<[^>]+>")
+_TITLE_RE = re.compile(r"<title>[^<]*</title>")
+_H1_RE = re.compile(r"(<h1[^>]*>)[^<]*(</h1>)")
+
+
+def load_fixture(name: str) -> str:
+    with open(os.path.join(FIXTURES_DIR, name), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def fill(template: str, **values: str) -> str:
+    for name, value in values.items():
+        template = template.replace("{{" + name + "}}", value)
+    return template
+
+
+# =========================
+# Story text
+# =========================
+def topic(story: int) -> List[str]:
+    return random.Random(story).sample(VOCAB, TOPIC_WORDS)
+
+
+def story_words(story: int, variant: str, count: int) -> List[str]:
+    """Words of one source's telling of a story: topic words, filler and stopwords."""
+    rng = random.Random(f"{story}:{variant}")
+    topic_words = topic(story)
+    out = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.35:
+            out.append(rng.choice(_STOPWORDS))
+        elif roll < 0.7:
+            out.append(rng.choice(topic_words))
+        else:
+            out.append(rng.choice(VOCAB))
+    return out
+
+
+def story_text(story: int, variant: str, count: int) -> str:
+    words = story_words(story, variant, count)
+    sentences = []
+    for start in range(0, len(words), 15):
+        chunk = words[start:start + 15]
+        sentences.append(" ".join(chunk).capitalize() + ".")
+    return " ".join(sentences)
+
+
+def story_title(story: int, variant: str) -> str:
+    words = random.Random(f"title:{story}:{variant}").sample(topic(story), 7)
+    return " ".join(words).capitalize()
+
+
+def bbc_story(index: int) -> int:
+    return index
+
+
+def cnn_story(index: int) -> int:
+    return index if index % 4 == 0 else 100_000 + index
+
+
+def video_story(channel_id: str, index: int) -> int:
+    if channel_id == SHARED_CHANNEL and index % 5 == 0:
+        return index
+    return 200_000 + list(CHANNELS).index(channel_id) * 10_000 + index
+
+
+def cnn_is_copy(index: int) -> bool:
+    return index % 8 == 0
+
+
+def video_is_copy(channel_id: str, index: int) -> bool:
+    return channel_id == SHARED_CHANNEL and index % 10 == 0
+
+
+def copy_title(story: int, word: str) -> str:
+    """The BBC headline of `story` with its last word replaced."""
+    return story_title(story, "bbc").rsplit(" ", 1)[0] + " " + word
+
+
+def cnn_title(index: int) -> str:
+    if cnn_is_copy(index):
+        return copy_title(cnn_story(index), "update")
+    return story_title(cnn_story(index), "cnn")
+
+
+def video_title(channel_id: str, index: int) -> str:
+    if video_is_copy(channel_id, index):
+        return copy_title(video_story(channel_id, index), "live")
+    return story_title(video_story(channel_id, index), channel_id)
+
+
+def video_id(channel_id: str, index: int) -> str:
+    return f"v{list(CHANNELS).index(channel_id)}x{index:07d}"
+
+
+def parse_video_id(value: str) -> Optional[Tuple[str, int]]:
+    match = re.fullmatch(r"v(\d)x(\d{7})", value)
+    if not match or int(match.group(1)) >= len(CHANNELS):
+        return None
+    return list(CHANNELS)[int(match.group(1))], int(match.group(2))
+
+
+# =========================
+# Documents
+# =========================
+class Fixtures:
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+        self.bbc_rss = load_fixture("bbc_rss.xml")
+        self.cnn_rss = load_fixture("cnn_rss.xml")
+        self.youtube_feed = load_fixture("youtube_feed.xml")
+        self.bbc_article = load_fixture("bbc_article.html")
+        self.cnn_article = load_fixture("cnn_article.html")
+        self.transcript = json.loads(load_fixture("transcript.json"))
+
+    @staticmethod
+    def _repeat(document: str, pattern: re.Pattern, render) -> str:
+        template = pattern.search(document).group(0)
+        return document.replace(template, "".join(render(template)))
+
+    def bbc_feed(self, items: int) -> str:
+        return self._repeat(self.bbc_rss, _ITEM_RE, lambda template: (
+            fill(template,
+                 title=story_title(bbc_story(i), "bbc"),
+                 description=story_text(bbc_story(i), "bbc-summary", 30),
+                 link=f"{self.base_url}/bbc/news/articles/{i}")
+            for i in range(items)
+        ))
+
+    def cnn_feed(self, items: int) -> str:
+        return self._repeat(self.cnn_rss, _ITEM_RE, lambda template: (
+            fill(template,
+                 title=cnn_title(i),
+                 description=story_text(cnn_story(i), "cnn-summary", 30),
+                 link=f"{self.base_url}/cnn/world/{i}/index.html")
+            for i in range(items)
+        ))
+
+    def channel_feed(self, channel_id: str, items: int) -> str:
+        name = CHANNELS[channel_id]
+        document = fill(self.youtube_feed, channel_id=channel_id, channel_name=escape(name))
+        return self._repeat(document, _ENTRY_RE, lambda template: (
+            fill(template,
+                 video_id=video_id(channel_id, i),
+                 title=escape(video_title(channel_id, i)),
+                 description=escape(story_text(video_story(channel_id, i), channel_id + "-desc", 40)),
+                 link=f"https://www.youtube.com/watch?v={video_id(channel_id, i)}")
+            for i in range(items)
+        ))
+
+    @staticmethod
+    def _page(html: str, pattern: re.Pattern, story: int, variant: str, title: str,
+              length: float = 1.0) -> str:
+        paragraph = itertools.count()
+
+        def replace(match: re.Match) -> str:
+            count = max(int(len(_TAG_RE.sub(" ", match.group(2)).split()) * length), 12)
+            return match.group(1) + story_text(story, f"{variant}:{next(paragraph)}", count) + match.group(3)
+
+        html = pattern.sub(replace, html)
+        html = _TITLE_RE.sub(f"<title>{escape(title)}</title>", html, count=1)
+        return _H1_RE.sub(lambda m: m.group(1) + escape(title) + m.group(2), html, count=1)
+
+    def bbc_page(self, index: int) -> str:
+        story = bbc_story(index)
+        return self._page(self.bbc_article, _BBC_PARAGRAPH_RE, story, "bbc", story_title(story, "bbc"))
+
+    def cnn_page(self, index: int) -> str:
+        story = cnn_story(index)
+        return self._page(self.cnn_article, _CNN_PARAGRAPH_RE, story, "cnn", cnn_title(index),
+                          COPY_LENGTH if cnn_is_copy(index) else 1.0)
+
+    def transcript_json(self, channel_id: str, index: int) -> Optional[str]:
+        if index % NO_TRANSCRIPT_EVERY == NO_TRANSCRIPT_EVERY - 1:
+            return None
+        lines = self.transcript
+        if video_is_copy(channel_id, index):
+            lines = lines[:int(len(lines) * COPY_LENGTH)]
+        words = story_words(video_story(channel_id, index), channel_id, 8 * len(lines))
+        # Auto-generated captions: lower case, no punctuation, ~8 words a line
+        snippets = [
+            {**snippet, "text": " ".join(words[i * 8:(i + 1) * 8]).lower()}
+            for i, snippet in enumerate(lines)
+        ]
+        return json.dumps(snippets)
+
+
+# =========================
+# HTTP server
+# =========================
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 turns bursts of concurrent connects into 1s SYN retries
+    request_queue_size = 128
+
+
+class FixtureServer:
+    """Serves Fixtures over HTTP/1.1 with keep-alive and a fixed per-request latency."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.05):
+        self.latency = latency
+        self.requests = 0
+        handler = self._handler()
+        self.httpd = _HTTPServer((host, port), handler)
+        self.base_url = f"http://{host}:{self.httpd.server_address[1]}"
+        self.fixtures = Fixtures(self.base_url)
+        self._lock = threading.Lock()
+        # Rendering is cached so the server's own CPU time stays out of the measurements
+        self.render = lru_cache(maxsize=8192)(self._render)
+
+    def _render(self, path: str, items: int) -> Tuple[int, str, Optional[str]]:
+        parts = path.strip("/").split("/")
+        fixtures = self.fixtures
+        if path == "/bbc/rss.xml":
+            return 200, "application/rss+xml", fixtures.bbc_feed(items)
+        if path == "/cnn/rss.xml":
+            return 200, "application/rss+xml", fixtures.cnn_feed(items)
+        if parts[:2] == ["youtube", "feed"] and len(parts) == 3 and parts[2] in CHANNELS:
+            return 200, "application/atom+xml", fixtures.channel_feed(parts[2], items)
+        if parts[:3] == ["bbc", "news", "articles"] and len(parts) == 4 and parts[3].isdigit():
+            return 200, "text/html; charset=utf-8", fixtures.bbc_page(int(parts[3]))
+        if parts[:2] == ["cnn", "world"] and len(parts) == 4 and parts[2].isdigit():
+            return 200, "text/html; charset=utf-8", fixtures.cnn_page(int(parts[2]))
+        if parts[:2] == ["youtube", "transcript"] and len(parts) == 3:
+            video = parse_video_id(parts[2])
+            body = fixtures.transcript_json(*video) if video else None
+            if body is not None:
+                return 200, "application/json", body
+        return 404, "text/plain", "not found"
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                items = int(parse_qs(url.query).get("items", ["20"])[0])
+                status, content_type, body = server.render(url.path, items)
+                data = body.encode("utf-8")
+                with server._lock:
+                    server.requests += 1
+                time.sleep(server.latency)
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "FixtureServer":
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="NewsLens fixture server")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds added to every response")
+    args = parser.parse_args()
+
+    server = FixtureServer(port=args.port, latency=args.latency)
+    print(f"Serving fixtures on {server.base_url}")
+    print(f"  {server.base_url}/bbc/rss.xml?items=20")
+    print(f"  {server.base_url}/cnn/rss.xml?items=20")
+    print(f"  {server.base_url}/youtube/feed/{SHARED_CHANNEL}?items=5")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
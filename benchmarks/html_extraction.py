@@ -0,0 +1,110 @@
+"""
+Micro-benchmark of the article-body extractors on saved fixture pages.
+
+For every page in benchmarks/fixtures/ it reports, per backend, the median
+parse+extract time and the memory the parsed document tree occupies. Memory
+is measured as RSS growth in a fresh interpreter while holding several trees,
+so it also counts libxml2's C allocations, which tracemalloc would not see.
+
+    python benchmarks/html_extraction.py --repeat 50
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if root_dir not in sys.path:
+    sys.path.append(root_dir)
+
+from bs4 import BeautifulSoup
+
+from News_Agents.bbc_news_agent import ArticleFetcher as BBCFetcher
+from News_Agents.cnn_news_agent import ArticleFetcher as CNNFetcher
+from News_Agents.html_extract import parse_html
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# fixture file -> {backend: extractor}
+EXTRACTORS = {
+    "cnn_article.html": {"lxml": CNNFetcher.extract_cnn, "bs4": CNNFetcher.extract_cnn_soup},
+    "bbc_article.html": {"lxml": BBCFetcher.extract_bbc, "bs4": BBCFetcher.extract_bbc_soup},
+}
+
+# backend -> function building the document tree the extractor works on
+PARSERS = {
+    "lxml": parse_html,
+    "bs4": lambda html: BeautifulSoup(html, "html.parser"),
+}
+
+# Trees held at once when measuring memory, to rise above allocator noise
+MEMORY_COPIES = 20
+
+
+def load_fixture(name: str) -> str:
+    with open(os.path.join(FIXTURES_DIR, name), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def time_extraction(extract, html: str, repeat: int) -> float:
+    extract(html)  # warm-up
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        extract(html)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def rss_kib() -> int:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+
+
+def measure_tree_memory(fixture: str, backend: str) -> int:
+    """Builds trees in a child interpreter; returns the RSS one parsed page adds, in KiB."""
+    out = subprocess.run(
+        [sys.executable, __file__, "--memory-child", fixture, backend],
+        check=True, capture_output=True, text=True,
+    )
+    return int(out.stdout.strip())
+
+
+def memory_child(fixture: str, backend: str) -> None:
+    html = load_fixture(fixture)
+    parse = PARSERS[backend]
+    parse(html)  # warm-up: first-use allocations aren't per-page cost
+    before = rss_kib()
+    trees = [parse(html) for _ in range(MEMORY_COPIES)]
+    after = rss_kib()
+    print((after - before) // len(trees))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="HTML extraction micro-benchmark")
+    parser.add_argument("--repeat", type=int, default=50, help="Timed runs per page and backend")
+    parser.add_argument("--memory-child", nargs=2, metavar=("FIXTURE", "BACKEND"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.memory_child:
+        memory_child(*args.memory_child)
+        return
+
+    print(f"{'page':<18} {'size':>8} {'backend':<8} {'median':>10} {'tree mem':>10} {'speedup':>8}  same text")
+    for fixture, backends in EXTRACTORS.items():
+        html = load_fixture(fixture)
+        texts = {backend: extract(html) for backend, extract in backends.items()}
+        same = "yes" if len(set(texts.values())) == 1 else "NO"
+        medians = {backend: time_extraction(extract, html, args.repeat) for backend, extract in backends.items()}
+        for backend in backends:
+            print(
+                f"{fixture:<18} {len(html) // 1024:>6}KB {backend:<8} "
+                f"{medians[backend] * 1000:>8.2f}ms {measure_tree_memory(fixture, backend):>8}KB "
+                f"{medians['bs4'] / medians[backend]:>7.1f}x  {same}"
+            )
+
+
+if __name__ == "__main__":
+    main()
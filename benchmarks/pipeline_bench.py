@@ -0,0 +1,517 @@
+"""
+Offline end-to-end benchmark of the news pipeline.
+
+Nothing leaves the machine: BBC, CNN and YouTube are replayed by
+benchmarks/fixture_server.py, the Groq model is replaced by a deterministic
+fake chat model with a fixed latency, and the brief is mailed to a local
+SMTP sink (benchmarks/smtp_sink.py). Everything else is the real code:
+app.main() runs the pipeline the way production does (streaming unless
+NEWSLENS_STREAMING=false), then the brief is read back from the news store,
+rendered and sent by the delivery engine.
+
+Each scale runs in a fresh interpreter with empty caches and store (three
+times by default, keeping the median of every figure). Fetching,
+preprocessing, summarization and storing overlap in the streaming pipeline,
+so they are reported together as the "pipeline" wall time, and each of them
+by the latency percentiles of its operations (HTTP requests, preprocessed
+items, LLM calls, store writes). Rendering and email are timed on their own.
+The peak RSS of the run is reported as well.
+
+    python benchmarks/pipeline_bench.py                      # 10, 100 and 1000 items
+    python benchmarks/pipeline_bench.py --scales 10,100 --repeat 1 --llm-latency 0.3
+    python benchmarks/pipeline_bench.py --save-baseline      # record benchmarks/baseline.json
+    python benchmarks/pipeline_bench.py --baseline benchmarks/baseline.json --tolerance 0.25
+
+When compared against a baseline, stages whose wall time, p95 latency or
+peak memory grew by more than the tolerance are reported as regressions and
+the exit status is 1.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if root_dir not in sys.path:
+    sys.path.append(root_dir)
+
+from benchmarks.fixture_server import FixtureServer
+from benchmarks.smtp_sink import SmtpSink
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_SCALES = "10,100,1000"
+STAGES = ["pipeline", "fetch", "preprocess", "cluster", "summarize", "store", "render", "email"]
+RESULT_PREFIX = "BENCH_RESULT "
+# Changes smaller than this are noise at any tolerance
+MIN_DELTA_SECONDS = 0.05
+MIN_DELTA_KIB = 4096
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Linear-interpolated percentile, q in [0, 100]."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    pos = (len(ordered) - 1) * q / 100
+    low = int(pos)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (pos - low)
+
+
+def brief_digest(brief: List[Dict]) -> str:
+    """Short hash of what the brief says, leaving out timestamps and the fixture server's port."""
+    content = [
+        [item.get("source"), item.get("title"), urlsplit(item.get("url") or "").path, item.get("summary")]
+        for item in brief
+    ]
+    return hashlib.sha1(json.dumps(content).encode("utf-8")).hexdigest()[:12]
+
+
+def median_run(runs: List[Dict]) -> Dict:
+    """Combines repeated runs of one scale: every number becomes its median across the runs."""
+    def combine(values):
+        first = values[0]
+        if isinstance(first, dict):
+            return {key: combine([value[key] for value in values]) for key in first}
+        if isinstance(first, (int, float)) and not isinstance(first, bool):
+            return type(first)(statistics.median(values))
+        return first
+    combined = combine(runs)
+    combined["repeats"] = len(runs)
+    return combined
+
+
+def source_limits(scale: int) -> Dict[str, int]:
+    """Per-source item counts adding up to about `scale` items."""
+    per_source = max(scale // 3, 1)
+    return {
+        "bbc": per_source,
+        "cnn": per_source,
+        "youtube_per_channel": max((scale - 2 * per_source) // 3, 1),
+    }
+
+
+# =========================
+# Child: one measured run
+# =========================
+class Recorder:
+    def __init__(self):
+        self.stages: Dict[str, Dict] = {}
+        self._latencies: Dict[str, List[float]] = {}
+
+    def record(self, stage: str, seconds: float) -> None:
+        self._latencies.setdefault(stage, []).append(seconds)
+
+    def timed(self, stage: str, fn):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.record(stage, time.perf_counter() - start)
+        return wrapper
+
+    def atimed(self, stage: str, fn):
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                self.record(stage, time.perf_counter() - start)
+        return wrapper
+
+    def _operations(self, name: str) -> Dict:
+        latencies = self._latencies.get(name)
+        if not latencies:
+            return {}
+        return {
+            "operations": len(latencies),
+            "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        }
+
+    @contextmanager
+    def stage(self, name: str, items: int = 0):
+        """
+        Times one stage; `items` is the number of items it handled, which the
+        block may instead set on the yielded dict once it is known.
+        """
+        count = {"items": items}
+        start = time.perf_counter()
+        yield count
+        seconds = time.perf_counter() - start
+        items = count["items"]
+        self.stages[name] = {
+            "items": items,
+            "seconds": round(seconds, 4),
+            "items_per_second": round(items / seconds, 1) if seconds else 0.0,
+            **self._operations(name),
+        }
+
+    def operations(self, name: str, items: int) -> None:
+        """Records a stage that overlaps with others: only its operation latencies, no wall time."""
+        self.stages[name] = {"items": items, **self._operations(name)}
+
+    def from_metrics(self, name: str, stage: Optional[Dict]) -> None:
+        """Records a stage from the pipeline's own Metrics report (Metrics.metrics.report())."""
+        if stage:
+            self.stages[name] = {
+                "items": stage.get("items", stage["operations"]),
+                **{key: stage[key] for key in ("operations", "p50_ms", "p95_ms", "p99_ms")},
+            }
+
+
+class TimedChain:
+    """Records the latency of every ainvoke() of the wrapped chain under "summarize"."""
+
+    def __init__(self, chain, recorder: Recorder):
+        self.chain = chain
+        self.recorder = recorder
+
+    async def ainvoke(self, inputs, **kwargs):
+        return await self.recorder.atimed("summarize", self.chain.ainvoke)(inputs, **kwargs)
+
+
+def fake_chat_model(latency: float):
+    """
+    Deterministic stand-in for ChatGroq: after `latency` seconds it answers
+    with the first sentences of the text it was asked to summarize.
+    """
+    from langchain_core.language_models.chat_models import BaseChatModel
+    from langchain_core.messages import AIMessage
+    from langchain_core.outputs import ChatGeneration, ChatResult
+
+    class FakeChatModel(BaseChatModel):
+        latency: float = 0.1
+
+        @property
+        def _llm_type(self) -> str:
+            return "newslens-fake"
+
+        @staticmethod
+        def _reply(messages) -> ChatResult:
+            prompt = messages[-1].content
+            for marker in ("Reports:", "Content:"):
+                if marker in prompt:
+                    prompt = prompt.split(marker, 1)[1]
+                    break
+            words = prompt.replace("Summary:", "").split()[:60]
+            return ChatResult(generations=[ChatGeneration(message=AIMessage(content=" ".join(words)))])
+
+        def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+            time.sleep(self.latency)
+            return self._reply(messages)
+
+        async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+            await asyncio.sleep(self.latency)
+            return self._reply(messages)
+
+    return FakeChatModel(latency=latency)
+
+
+def run_child(scale: int, base_url: str, llm_latency: float) -> Dict:
+    """Runs the pipeline once against the fixture server; the environment is set by the parent."""
+    import resource
+
+    from langchain_core.output_parsers import StrOutputParser
+
+    import app
+    from Mail_SMTP import mail
+    from Mail_SMTP.delivery import SmtpDelivery
+    from Mail_SMTP.renderer import render_digest
+    from Metrics.metrics import report
+    from News_Agents import youtube_news_agent
+    from News_Agents.bbc_news_agent import NewsScraper as BBCScraper
+    from News_Agents.cnn_news_agent import NewsScraper as CNNScraper
+    from News_Agents.http_client import get_session
+    from News_Agents.youtube_news_agent import TranscriptsDisabled, YoutubeNewsAgent
+    from Pipeline import streaming
+    from Preprocessing import preprocessing
+    from Storage.news_store import news_store
+
+    limits = source_limits(scale)
+    # A few spare entries per feed: some videos have no transcript
+    BBCScraper.BBC_RSS = f"{base_url}/bbc/rss.xml?items={limits['bbc']}"
+    CNNScraper.CNN_RSS = f"{base_url}/cnn/rss.xml?items={limits['cnn']}"
+    youtube_items = limits["youtube_per_channel"] + limits["youtube_per_channel"] // 5 + 2
+    YoutubeNewsAgent.feed_url = staticmethod(lambda channel_id: f"{base_url}/youtube/feed/{channel_id}?items={youtube_items}")
+
+    class FixtureTranscriptApi:
+        """youtube_transcript_api.YouTubeTranscriptApi.fetch() over the fixture server."""
+
+        def fetch(self, video_id: str):
+            resp = get_session().get(f"{base_url}/youtube/transcript/{video_id}", timeout=10)
+            if resp.status_code == 404:
+                raise TranscriptsDisabled(video_id)
+            resp.raise_for_status()
+            return [type("Snippet", (), snippet) for snippet in resp.json()]
+
+    youtube_news_agent.YouTubeTranscriptApi = FixtureTranscriptApi
+
+    recorder = Recorder()
+    session = get_session()
+    session.send = recorder.timed("fetch", session.send)
+
+    # Counts what each source returns without changing how it is called
+    fetched = []
+
+    def counted(fn):
+        def wrapper():
+            items = fn()
+            fetched.append(len(items))
+            return items
+        return wrapper
+
+    sources = [(name, counted(fn)) for name, fn in preprocessing.SOURCES]
+    streaming.SOURCES = preprocessing.SOURCES = sources
+
+    llm = fake_chat_model(llm_latency)
+    summarizer = app.summarizer
+    # Per LLM round trip, once a concurrency slot and the rate limiter let it through
+    summarizer.chain = TimedChain(app.summarize_prompt | llm | StrOutputParser(), recorder)
+    summarizer.story_chain = TimedChain(app.story_prompt | llm | StrOutputParser(), recorder)
+    news_store.add = recorder.timed("store", news_store.add)
+    news_store.save_brief = recorder.timed("store", news_store.save_brief)
+    SmtpDelivery._send_one = recorder.timed("email", SmtpDelivery._send_one)
+
+    with recorder.stage("pipeline") as pipeline:
+        results = app.main()
+        pipeline["items"] = len(results)
+
+    metrics = report()["stages"]
+    articles = metrics.get("preprocess", {}).get("items", 0)
+    stories = metrics.get("cluster", {}).get("items", articles)
+    recorder.operations("fetch", sum(fetched))
+    recorder.from_metrics("preprocess", metrics.get("preprocess"))
+    recorder.from_metrics("cluster", metrics.get("cluster"))
+    recorder.operations("summarize", stories)
+    recorder.operations("store", len(results))
+
+    brief = mail.load_news()
+    with recorder.stage("render", len(brief)):
+        digest = render_digest(brief)
+
+    recipients = len(os.environ["RECIPIENT_EMAILS"].split(","))
+    with recorder.stage("email", recipients):
+        stats = mail.send_email("NewsLens benchmark", digest)
+
+    return {
+        "scale": scale,
+        "streaming": app.STREAMING,
+        "fetched": sum(fetched),
+        "articles": articles,
+        "stories": stories,
+        "summaries": len(results),
+        "emails_sent": stats.sent if stats else 0,
+        # Changes when the pipeline's output changes, not just its speed
+        "brief_sha1": brief_digest(brief),
+        # KiB on Linux
+        "peak_rss_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "stages": recorder.stages,
+    }
+
+
+# =========================
+# Parent: servers, runs and reports
+# =========================
+def child_env(scale: int, workdir: str, smtp_port: int, args) -> Dict[str, str]:
+    limits = source_limits(scale)
+    env = dict(os.environ)
+    env.update({
+        "PYTHONPATH": root_dir,
+        "NEWSLENS_CACHE_DIR": os.path.join(workdir, "cache"),
+        "NEWSLENS_DATA_DIR": os.path.join(workdir, "data"),
+        "NEWSLENS_BBC_LIMIT": str(limits["bbc"]),
+        "NEWSLENS_CNN_LIMIT": str(limits["cnn"]),
+        "NEWSLENS_YOUTUBE_PER_CHANNEL": str(limits["youtube_per_channel"]),
+        "NEWSLENS_BBC_FULL_TEXT": "true",
+        # Slow fetches are measured, not cut off
+        "NEWSLENS_SOURCE_TIMEOUT": "3600",
+        # One clustering window, so the stories don't depend on how fast each source was
+        "NEWSLENS_CLUSTER_WINDOW": "0",
+        "NEWSLENS_LLM_CONCURRENCY": str(args.llm_concurrency),
+        "NEWSLENS_LLM_RPM": str(args.llm_rpm),
+        "NEWSLENS_LLM_TPM": str(args.llm_tpm),
+        "NEWSLENS_SMTP_HOST": "127.0.0.1",
+        "NEWSLENS_SMTP_PORT": str(smtp_port),
+        "NEWSLENS_SMTP_SSL": "false",
+        "NEWSLENS_SMTP_RATE": str(args.smtp_rate),
+        "GROQ_API_KEY": "offline-benchmark",
+        "LANGCHAIN_TRACING_V2": "false",
+        "GMAIL_USER": "bench@example.com",
+        "GMAIL_APP_PASSWORD": "offline-benchmark",
+        "RECIPIENT_EMAILS": ",".join(f"reader{i}@example.com" for i in range(args.recipients)),
+    })
+    return env
+
+
+def run_once(scale: int, base_url: str, smtp_port: int, args) -> Dict:
+    with tempfile.TemporaryDirectory(prefix="newslens-bench-") as workdir:
+        # Run from an empty directory so no .env or summarized_news.json is picked up
+        proc = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", str(scale),
+             "--base-url", base_url, "--llm-latency", str(args.llm_latency)],
+            cwd=workdir, env=child_env(scale, workdir, smtp_port, args),
+            capture_output=True, text=True,
+        )
+    if args.verbose or proc.returncode != 0:
+        print(proc.stdout)
+        print(proc.stderr, file=sys.stderr)
+    if proc.returncode != 0:
+        raise SystemExit(f"[ERROR] Benchmark run at scale {scale} failed")
+    line = next(l for l in reversed(proc.stdout.splitlines()) if l.startswith(RESULT_PREFIX))
+    return json.loads(line[len(RESULT_PREFIX):])
+
+
+def run_scale(scale: int, base_url: str, smtp_port: int, args) -> Dict:
+    return median_run([run_once(scale, base_url, smtp_port, args) for _ in range(args.repeat)])
+
+
+def print_report(run: Dict) -> None:
+    print(f"\n=== {run['scale']} items: fetched {run['fetched']}, {run['articles']} after dedup, "
+          f"{run['stories']} stories, {run['summaries']} summaries, {run['emails_sent']} emails | "
+          f"peak RSS {run['peak_rss_kib'] / 1024:.1f} MB ===")
+    print(f"{'stage':<11} {'items':>6} {'wall':>9} {'items/s':>9} {'ops':>6} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for name in STAGES:
+        stage = run["stages"].get(name)
+        if stage is None:
+            continue
+        if "operations" in stage:
+            ops = f"{stage['operations']:>6} {stage['p50_ms']:>7.1f}ms {stage['p95_ms']:>7.1f}ms {stage['p99_ms']:>7.1f}ms"
+        else:
+            ops = f"{'-':>6} {'-':>9} {'-':>9} {'-':>9}"
+        if "seconds" in stage:
+            wall = f"{stage['seconds']:>8.3f}s {stage['items_per_second']:>9.1f}"
+        else:
+            # Overlaps with the other pipeline stages; see "pipeline"
+            wall = f"{'-':>9} {'-':>9}"
+        print(f"{name:<11} {stage['items']:>6} {wall} {ops}")
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> int:
+    """Prints the change against `baseline` for every shared scale; returns the number of regressions."""
+    regressions = 0
+    print(f"\n=== Compared with baseline (tolerance {tolerance:.0%}) ===")
+    if baseline.get("config") != results.get("config"):
+        print(f"[WARN] Baseline was recorded with different settings: {baseline.get('config')}")
+
+    def check(label: str, old: Optional[float], new: Optional[float], min_delta: float, unit: str) -> None:
+        nonlocal regressions
+        if not old or new is None:
+            return
+        change = (new - old) / old
+        flag = ""
+        if change > tolerance and new - old > min_delta:
+            flag = "  REGRESSION"
+            regressions += 1
+        elif change < -tolerance and old - new > min_delta:
+            flag = "  improved"
+        print(f"  {label:<28} {old:>10.3f}{unit} -> {new:>10.3f}{unit}  {change:>+7.1%}{flag}")
+
+    for scale, run in results["runs"].items():
+        old_run = baseline.get("runs", {}).get(scale)
+        if old_run is None:
+            print(f"  {scale} items: not in baseline")
+            continue
+        print(f"  {scale} items:")
+        if old_run.get("brief_sha1") != run.get("brief_sha1"):
+            print("  [NOTE] The brief differs from the baseline's: the pipeline's output changed")
+        for name in STAGES:
+            old, new = old_run["stages"].get(name, {}), run["stages"].get(name, {})
+            check(f"{name} wall", old.get("seconds"), new.get("seconds"), MIN_DELTA_SECONDS, "s")
+            if "p95_ms" in old and "p95_ms" in new:
+                check(f"{name} p95", old["p95_ms"] / 1000, new["p95_ms"] / 1000, MIN_DELTA_SECONDS, "s")
+        check("peak RSS (MB)", old_run["peak_rss_kib"] / 1024, run["peak_rss_kib"] / 1024, MIN_DELTA_KIB / 1024, "")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline NewsLens pipeline benchmark")
+    parser.add_argument("--scales", default=DEFAULT_SCALES, help="Comma-separated item counts")
+    parser.add_argument("--http-latency", type=float, default=0.05, help="Fixture server latency per request (s)")
+    parser.add_argument("--llm-latency", type=float, default=0.1, help="Fake LLM latency per call (s)")
+    parser.add_argument("--llm-concurrency", type=int, default=4)
+    # Groq's quotas are not what is being measured; set them to the real values to include them
+    parser.add_argument("--llm-rpm", type=float, default=1e9)
+    parser.add_argument("--llm-tpm", type=float, default=1e12)
+    parser.add_argument("--smtp-latency", type=float, default=0.005, help="SMTP sink latency per message (s)")
+    parser.add_argument("--smtp-rate", type=float, default=0, help="Delivery rate limit, 0 for none")
+    parser.add_argument("--recipients", type=int, default=25)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per scale; the median of each figure is reported")
+    parser.add_argument("--output", metavar="FILE", help="Also write the results as JSON")
+    parser.add_argument("--baseline", metavar="FILE", help=f"Compare with this baseline (default {os.path.relpath(BASELINE_FILE)} if present)")
+    parser.add_argument("--no-baseline", action="store_true", help="Skip the comparison")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Relative slowdown reported as a regression")
+    parser.add_argument("--verbose", action="store_true", help="Show the pipeline's own output")
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--base-url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        result = run_child(args.child, args.base_url, args.llm_latency)
+        print(RESULT_PREFIX + json.dumps(result))
+        return
+
+    scales = [int(s) for s in args.scales.split(",") if s.strip()]
+    fixtures = FixtureServer(latency=args.http_latency).start()
+    sink = SmtpSink(latency=args.smtp_latency).start()
+    print(f"Fixture server on {fixtures.base_url}, SMTP sink on port {sink.port}")
+
+    results = {
+        "config": {
+            # Inherited by the runs, like every other NEWSLENS_* setting
+            "streaming": os.environ.get("NEWSLENS_STREAMING", "true").lower() == "true",
+            "http_latency": args.http_latency,
+            "llm_latency": args.llm_latency,
+            "llm_concurrency": args.llm_concurrency,
+            "smtp_latency": args.smtp_latency,
+            "recipients": args.recipients,
+        },
+        "repeat": args.repeat,
+        "python": sys.version.split()[0],
+        "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "runs": {},
+    }
+    try:
+        for scale in scales:
+            print(f"Running {scale} items...")
+            run = run_scale(scale, fixtures.base_url, sink.port, args)
+            results["runs"][str(scale)] = run
+            print_report(run)
+    finally:
+        fixtures.stop()
+        sink.stop()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    regressions = 0
+    baseline_file = args.baseline or (BASELINE_FILE if os.path.exists(BASELINE_FILE) and not args.save_baseline else None)
+    if baseline_file and not args.no_baseline:
+        with open(baseline_file, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+
+    if args.save_baseline:
+        with open(BASELINE_FILE, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nBaseline saved to {os.path.relpath(BASELINE_FILE)}")
+
+    if regressions:
+        print(f"\n{regressions} regressions against the baseline")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Minimal local SMTP server that accepts and discards every message, for
+benchmarking the mail delivery engine without a real provider.
+
+    python benchmarks/smtp_sink.py --port 2525
+"""
+import argparse
+import base64
+import socketserver
+import threading
+import time
+from typing import List, Optional
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    # The default backlog of 5 turns bursts of concurrent connects into 1s SYN retries
+    request_queue_size = 128
+
+
+class SmtpSink:
+    """
+    Speaks just enough ESMTP for smtplib (EHLO, MAIL, RCPT, DATA, RSET, NOOP,
+    QUIT), counts what it receives and optionally waits `latency` seconds
+    before accepting each message, like a provider's queueing time.
+
+    With `username` and `password` it offers AUTH PLAIN and rejects other
+    credentials with 535. Replies queued in `data_replies` (e.g. "451 Try
+    again later") are given to the next DATA commands instead of accepting the
+    message; after a 421 the sink closes the connection, as servers do.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                 username: Optional[str] = None, password: Optional[str] = None):
+        self.latency = latency
+        self.username = username
+        self.password = password
+        self.messages = 0
+        self.bytes = 0
+        self.connections = 0
+        # Recipients of every accepted message, in the order they were accepted
+        self.recipients: List[str] = []
+        self.data_replies: List[str] = []
+        self._lock = threading.Lock()
+        sink = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def reply(self, line: str) -> None:
+                self.wfile.write(line.encode("ascii") + b"\r\n")
+
+            def handle(self):
+                with sink._lock:
+                    sink.connections += 1
+                self.reply("220 newslens-sink ESMTP")
+                recipients = []
+                while True:
+                    line = self.rfile.readline()
+                    if not line:
+                        return
+                    verb = line[:4].decode("ascii", errors="replace").upper()
+                    if verb == "EHLO":
+                        auth = b"250-AUTH PLAIN\r\n" if sink.username else b""
+                        self.wfile.write(b"250-newslens-sink\r\n" + auth + b"250-SIZE 52428800\r\n250 8BITMIME\r\n")
+                    elif verb == "AUTH":
+                        self.reply("235 Authenticated" if self.authenticated(line) else "535 Authentication failed")
+                    elif verb in ("MAIL", "RSET"):
+                        recipients = []
+                        self.reply("250 OK")
+                    elif verb == "RCPT":
+                        address = line.decode("ascii", errors="replace").partition(":")[2].strip()
+                        recipients.append(address.strip("<>"))
+                        self.reply("250 OK")
+                    elif verb in ("HELO", "NOOP"):
+                        self.reply("250 OK")
+                    elif verb == "DATA":
+                        self.reply("354 End data with <CR><LF>.<CR><LF>")
+                        size = 0
+                        while (chunk := self.rfile.readline()) not in (b".\r\n", b""):
+                            size += len(chunk)
+                        if sink.latency:
+                            time.sleep(sink.latency)
+                        with sink._lock:
+                            failure = sink.data_replies.pop(0) if sink.data_replies else None
+                            if failure is None:
+                                sink.messages += 1
+                                sink.bytes += size
+                                sink.recipients.extend(recipients)
+                        if failure is not None:
+                            self.reply(failure)
+                            if failure.startswith("421"):
+                                return
+                        else:
+                            self.reply("250 OK queued")
+                    elif verb == "QUIT":
+                        self.reply("221 Bye")
+                        return
+                    else:
+                        self.reply("502 Command not implemented")
+
+            def authenticated(self, line: bytes) -> bool:
+                """Checks an "AUTH PLAIN <base64 of \\0user\\0password>" command."""
+                parts = line.split()
+                if len(parts) != 3 or parts[1].upper() != b"PLAIN":
+                    return False
+                try:
+                    _, user, password = base64.b64decode(parts[2]).decode("utf-8").split("\0")
+                except ValueError:
+                    return False
+                return (user, password) == (sink.username, sink.password)
+
+        self.server = _TCPServer((host, port), Handler)
+        self.host, self.port = self.server.server_address[:2]
+
+    def start(self) -> "SmtpSink":
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Discarding SMTP server")
+    parser.add_argument("--port", type=int, default=2525)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds before each message is accepted")
+    args = parser.parse_args()
+
+    sink = SmtpSink(port=args.port, latency=args.latency)
+    print(f"SMTP sink listening on {sink.host}:{sink.port}")
+    try:
+        sink.server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"Received {sink.messages} messages ({sink.bytes} bytes) over {sink.connections} connections")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 import sys
 import os
 import time
+import asyncio
+import argparse
 from dotenv import load_dotenv
 
 # Load environment variables once at the start
@@ -12,33 +14,132 @@ load_dotenv()
 import app
 from Mail_SMTP import mail
 
+from Preprocessing.preprocessing import SOURCE_TIMEOUT
+from Pipeline.scheduler import Schedule, Scheduler
+from News_Agents.async_agents import afetch_bbc, afetch_channel, afetch_cnn
+from News_Agents.http_client import get_session
+from News_Agents.youtube_news_agent import YoutubeNewsAgent
+from Metrics.metrics import write_report
+from Storage import data_path
+
+# Daemon schedules: seconds between runs, or "HH:MM" for once a day
+POLL_BBC = os.environ.get("NEWSLENS_POLL_BBC", "300")
+POLL_CNN = os.environ.get("NEWSLENS_POLL_CNN", "300")
+POLL_YOUTUBE = os.environ.get("NEWSLENS_POLL_YOUTUBE", "900")
+SUMMARIZE_SCHEDULE = os.environ.get("NEWSLENS_SUMMARIZE_SCHEDULE", "1800")
+EMAIL_SCHEDULE = os.environ.get("NEWSLENS_EMAIL_SCHEDULE", "07:00")
+# JSON report of the metrics of the last run (per-stage latency, items, bytes, cache hits, LLM tokens)
+RUN_REPORT = os.environ.get("NEWSLENS_RUN_REPORT", data_path("run_report.json"))
+
 def header(text):
     print("\n" + "="*60)
     print(f">>> {text}")
     print("="*60 + "\n")
 
-def main():
+def save_run_report(path, **fields):
+    written = write_report(path, finished_at=time.strftime("%Y-%m-%dT%H:%M:%S"), **fields)
+    if written:
+        print(f"Run report written to {written}")
+
+def main(report_path=RUN_REPORT):
     print(">>> STARTING NEWS AUTOMATION PIPELINE (Integrated Mode) <<<\n")
+    started_at = time.strftime("%Y-%m-%dT%H:%M:%S")
+    started = time.perf_counter()
+    steps = {}
+    status = "failed"
 
-    # Step 1: Run the App (Fetch -> Process -> Summarize -> Save JSON)
-    header("STEP 1: Fetching & Summarizing News")
-    try:
-        app.main()
-        print("\n[SUCCESS] News processing completed.")
-    except Exception as e:
-        print(f"\n[ERROR] Failed during news processing: {e}")
-        sys.exit(1)
-
-    # Step 2: Run the Mailer (Read JSON -> Format -> Send Email)
-    header("STEP 2: Sending Email")
     try:
-        mail.main()
-        print("\n[SUCCESS] Email sequence completed.")
-    except Exception as e:
-        print(f"\n[ERROR] Failed during email sending: {e}")
-        sys.exit(1)
+        # Step 1: Run the App (Fetch -> Process -> Summarize -> Save JSON)
+        header("STEP 1: Fetching & Summarizing News")
+        step_start = time.perf_counter()
+        try:
+            app.main()
+            print("\n[SUCCESS] News processing completed.")
+        except Exception as e:
+            print(f"\n[ERROR] Failed during news processing: {e}")
+            sys.exit(1)
+        finally:
+            steps["fetch_and_summarize"] = round(time.perf_counter() - step_start, 3)
+
+        # Step 2: Run the Mailer (Read JSON -> Format -> Send Email)
+        header("STEP 2: Sending Email")
+        step_start = time.perf_counter()
+        try:
+            mail.main()
+            print("\n[SUCCESS] Email sequence completed.")
+        except Exception as e:
+            print(f"\n[ERROR] Failed during email sending: {e}")
+            sys.exit(1)
+        finally:
+            steps["email"] = round(time.perf_counter() - step_start, 3)
+
+        status = "ok"
+        header("PIPELINE COMPLETED SUCCESSFULLY")
+    finally:
+        # Written for failed runs too: those are the ones worth looking into
+        save_run_report(report_path, mode="run", status=status, started_at=started_at,
+                        seconds=round(time.perf_counter() - started, 3), steps=steps)
+
+def build_scheduler(report_path=RUN_REPORT) -> Scheduler:
+    """
+    One poll job per source (and per YouTube channel), each keeping the latest
+    items it saw; the summarize job picks up whatever is new among them. The
+    run report is refreshed after every summarize and email job, with the
+    metrics accumulated since the daemon started.
+    """
+    latest = {}
+    scheduler = Scheduler()
+    started = time.perf_counter()
 
-    header("PIPELINE COMPLETED SUCCESSFULLY")
+    def poll(name, fetch):
+        async def job():
+            items = await asyncio.wait_for(fetch(), SOURCE_TIMEOUT)
+            latest[name] = items
+            print(f"[POLL] {name}: {len(items)} items")
+        return job
+
+    scheduler.add("BBC", poll("BBC", afetch_bbc), Schedule.parse(POLL_BBC))
+    scheduler.add("CNN", poll("CNN", afetch_cnn), Schedule.parse(POLL_CNN))
+    youtube = YoutubeNewsAgent()
+    for name, channel_id in youtube.CHANNELS.items():
+        source = f"YouTube - {name}"
+        fetch = lambda name=name, channel_id=channel_id: afetch_channel(name, channel_id, agent=youtube)
+        scheduler.add(source, poll(source, fetch), Schedule.parse(POLL_YOUTUBE))
+
+    def report(job):
+        save_run_report(report_path, mode="daemon", last_job=job,
+                        uptime_seconds=round(time.perf_counter() - started, 3))
+
+    async def summarize():
+        await app.asummarize_new([item for items in latest.values() for item in items])
+        await asyncio.to_thread(report, "Summarize")
+
+    async def email():
+        await asyncio.to_thread(mail.main)
+        await asyncio.to_thread(report, "Email")
+
+    # Give the first polls time to land before summarizing
+    scheduler.add("Summarize", summarize, Schedule.parse(SUMMARIZE_SCHEDULE), jitter=0, run_at_start=False)
+    scheduler.add("Email", email, Schedule.parse(EMAIL_SCHEDULE), jitter=0, run_at_start=False)
+    return scheduler
+
+def daemon(report_path=RUN_REPORT):
+    print(">>> STARTING NEWS AUTOMATION DAEMON <<<\n")
+    # LangChain, the Groq client and the HTTP pools are created once and reused by every run
+    get_session()
+    try:
+        asyncio.run(build_scheduler(report_path).run_forever())
+    except KeyboardInterrupt:
+        print("\n>>> Daemon stopped.")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="NewsLens news automation pipeline")
+    parser.add_argument("--daemon", action="store_true",
+                        help="Stay resident: poll sources, summarize and email on schedules")
+    parser.add_argument("--report", default=RUN_REPORT, metavar="FILE",
+                        help=f"Where to write the JSON run report (default {RUN_REPORT})")
+    args = parser.parse_args()
+    if args.daemon:
+        daemon(args.report)
+    else:
+        main(args.report)
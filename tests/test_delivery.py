@@ -0,0 +1,95 @@
+import os
+import sys
+import unittest
+from email.mime.text import MIMEText
+
+# Ensure we can import from the project root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.smtp_sink import SmtpSink
+from Mail_SMTP.delivery import SmtpDelivery
+
+SENDER = "news@example.com"
+RECIPIENTS = [f"reader{i}@example.com" for i in range(5)]
+
+
+def build_message(recipient):
+    msg = MIMEText(f"Brief for {recipient}")
+    msg["From"] = SENDER
+    msg["To"] = recipient
+    msg["Subject"] = "Brief"
+    return msg
+
+
+class SmtpDeliveryTest(unittest.TestCase):
+    def setUp(self):
+        self.sink = SmtpSink(username="news", password="secret").start()
+        self.addCleanup(self.sink.stop)
+
+    def delivery(self, password="secret", **options):
+        options.setdefault("connections", 2)
+        return SmtpDelivery("news", password, host=self.sink.host, port=self.sink.port,
+                            use_ssl=False, rate=0, timeout=5, **options)
+
+    def test_one_message_per_recipient(self):
+        stats = self.delivery().send(SENDER, RECIPIENTS + RECIPIENTS[:2], build_message)
+
+        self.assertEqual(sorted(self.sink.recipients), sorted(RECIPIENTS))
+        self.assertEqual(self.sink.messages, len(RECIPIENTS))
+        self.assertEqual((stats.sent, stats.failed, stats.retries), (len(RECIPIENTS), 0, 0))
+        self.assertIsNone(stats.aborted)
+
+    def test_stats_count_connections(self):
+        stats = self.delivery(connections=3).send(SENDER, RECIPIENTS, build_message)
+
+        self.assertEqual(stats.sent, len(RECIPIENTS))
+        self.assertEqual(stats.connections, self.sink.connections)
+        self.assertLessEqual(stats.connections, 3)
+        self.assertEqual(stats.failures, {})
+
+    def test_transient_reply_is_retried(self):
+        self.sink.data_replies.append("451 Try again later")
+        stats = self.delivery(connections=1).send(SENDER, RECIPIENTS[:1], build_message)
+
+        self.assertEqual(self.sink.recipients, RECIPIENTS[:1])
+        self.assertEqual((stats.sent, stats.failed, stats.retries), (1, 0, 1))
+
+    def test_closed_session_is_retried_on_fresh_connection(self):
+        self.sink.data_replies.append("421 Closing connection")
+        stats = self.delivery(connections=1).send(SENDER, RECIPIENTS[:1], build_message)
+
+        self.assertEqual(self.sink.recipients, RECIPIENTS[:1])
+        self.assertEqual((stats.sent, stats.failed, stats.retries), (1, 0, 1))
+        self.assertEqual(stats.connections, 2)
+        self.assertEqual(self.sink.connections, 2)
+
+    def test_permanent_reply_is_not_retried(self):
+        self.sink.data_replies.append("554 Message rejected")
+        stats = self.delivery(connections=1).send(SENDER, RECIPIENTS[:2], build_message)
+
+        self.assertEqual(self.sink.recipients, RECIPIENTS[1:2])
+        self.assertEqual((stats.sent, stats.failed, stats.retries), (1, 1, 0))
+        self.assertEqual(list(stats.failures), RECIPIENTS[:1])
+
+    def test_rejected_login_stops_delivery(self):
+        stats = self.delivery(password="wrong").send(SENDER, RECIPIENTS, build_message)
+
+        self.assertEqual(self.sink.messages, 0)
+        self.assertEqual((stats.sent, stats.failed, stats.retries), (0, len(RECIPIENTS), 0))
+        self.assertEqual(set(stats.failures), set(RECIPIENTS))
+        self.assertTrue(stats.aborted.startswith("535"))
+        # Only the first recipient's login was attempted
+        self.assertEqual(self.sink.connections, 1)
+        self.assertEqual(stats.connections, 0)
+
+    def test_reconnects_after_messages_per_connection(self):
+        stats = self.delivery(connections=1, messages_per_connection=2).send(SENDER, RECIPIENTS, build_message)
+
+        self.assertEqual(stats.sent, len(RECIPIENTS))
+        self.assertEqual(stats.connections, 3)
+        self.assertEqual(self.sink.connections, 3)
+        self.assertEqual(self.sink.recipients, RECIPIENTS)
+
+
+if __name__ == "__main__":
+    unittest.main()